@@ -0,0 +1,182 @@
+"""
+Gera um corpus sintético e reprodutível de NFSe (PDF e PNG) a partir do
+modelo em `test_files/`, variando número de páginas, resolução e layout.
+"""
+
+import random
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+import pdfplumber
+from PIL import Image, ImageDraw, ImageFont
+
+TEMPLATE_PDF = (
+    Path(__file__).resolve().parent.parent
+    / 'test_files'
+    / 'NFSe_ficticia_layout_completo.pdf'
+)
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+LINES_PER_PAGE = 60
+
+LAYOUTS = ('padrao', 'capa')
+PAGE_COUNTS = (1, 3, 10)
+IMAGE_DPIS = (100, 200, 300)
+
+FILLER_LINE = 'Anexo - Discriminação complementar dos serviços prestados.'
+
+
+def load_template_lines() -> List[str]:
+    """Linhas de texto do modelo de NFSe usado como base do corpus."""
+    with pdfplumber.open(TEMPLATE_PDF) as pdf:
+        return pdf.pages[0].extract_text().splitlines()
+
+
+def _fake_cnpj(rng: random.Random) -> str:
+    digits = ''.join(str(rng.randrange(10)) for _ in range(12))
+    checks = f'{rng.randrange(100):02d}'
+    return f'{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-{checks}'
+
+
+def make_invoice_lines(template: List[str], rng: random.Random) -> Dict:
+    """Variação do modelo com CNPJ e Razão Social do prestador aleatórios."""
+    cnpj = _fake_cnpj(rng)
+    nome = f'EMPRESA SINTÉTICA {rng.randrange(10**6):06d} LTDA'
+
+    lines = []
+    in_prestador = False
+    for template_line in template:
+        line = template_line
+        if line.startswith('Dados do Prestador'):
+            in_prestador = True
+        elif line.startswith('Dados do Tomador'):
+            in_prestador = False
+        elif in_prestador and line.startswith('Razão Social:'):
+            line = f'Razão Social: {nome}'
+        elif in_prestador and line.startswith('CNPJ:'):
+            line = f'CNPJ: {cnpj} ' + line.split(' ', 2)[-1]
+        lines.append(line)
+
+    expected = {'cnpj_prestador': cnpj, 'nome_prestador': nome}
+    return {'lines': lines, 'expected': expected}
+
+
+def paginate(lines: List[str], layout: str, page_count: int) -> List[List[str]]:
+    """
+    Distribui a nota nas páginas conforme o layout: 'padrao' (nota na
+    primeira página, seguida de anexos) ou 'capa' (uma capa antes da nota).
+    """
+    filler = [FILLER_LINE] * (LINES_PER_PAGE // 2)
+    pages = [lines]
+    if layout == 'capa':
+        pages.insert(0, ['Capa do lote de documentos fiscais', *filler])
+    while len(pages) < page_count:
+        pages.append([f'Página {len(pages) + 1}', *filler])
+    return pages[:page_count]
+
+
+def _pdf_string(text: str) -> bytes:
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return escaped.encode('cp1252', errors='replace')
+
+
+def write_pdf(pages: List[List[str]], pdf_path: Path) -> None:
+    """Escreve um PDF de texto mínimo (Helvetica, WinAnsi), sem dependências."""
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+        b'/Encoding /WinAnsiEncoding >>',
+    ]
+    page_ids = []
+    for lines in pages:
+        content = [b'BT /F1 9 Tf 11 TL 36 806 Td']
+        content.extend(b'(' + _pdf_string(line) + b") '" for line in lines)
+        content.append(b'ET')
+        stream = zlib.compress(b'\n'.join(content))
+        objects.append(
+            b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream)
+            + stream
+            + b'\nendstream'
+        )
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+            % (PAGE_WIDTH, PAGE_HEIGHT, len(objects))
+        )
+        page_ids.append(len(objects))
+
+    kids = b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        kids,
+        len(page_ids),
+    )
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+    xref_offset = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\n' % (len(objects) + 1)
+    output += b'startxref\n%d\n%%%%EOF\n' % xref_offset
+    pdf_path.write_bytes(bytes(output))
+
+
+def write_png(lines: List[str], image_path: Path, dpi: int) -> None:
+    """Renderiza a nota como uma página A4 escaneada na resolução `dpi`."""
+    scale = dpi / 72
+    width, height = int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)
+    font = ImageFont.load_default(size=max(int(9 * scale), 8))
+    line_height = int(11 * scale)
+
+    image = Image.new('L', (width, height), color=255)
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(lines):
+        position = (int(36 * scale), int(36 * scale) + index * line_height)
+        draw.text(position, line, fill=0, font=font)
+    image.save(image_path, dpi=(dpi, dpi))
+
+
+def generate_corpus(output_dir: Path, seed: int = 0) -> List[Dict]:
+    """
+    Gera o corpus em `output_dir` e devolve o manifesto: caminho, tipo,
+    variação e resultado esperado de cada documento. A mesma semente
+    produz sempre o mesmo corpus.
+    """
+    rng = random.Random(seed)
+    template = load_template_lines()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = []
+    for layout in LAYOUTS:
+        for page_count in PAGE_COUNTS:
+            if layout == 'capa' and page_count == 1:
+                continue
+            invoice = make_invoice_lines(template, rng)
+            pdf_path = output_dir / f'nfse_{layout}_{page_count}p.pdf'
+            write_pdf(paginate(invoice['lines'], layout, page_count), pdf_path)
+            manifest.append({
+                'path': pdf_path,
+                'file_type': 'pdf',
+                'variant': f'{layout}/{page_count}p',
+                'expected': invoice['expected'],
+            })
+
+    for dpi in IMAGE_DPIS:
+        invoice = make_invoice_lines(template, rng)
+        image_path = output_dir / f'nfse_{dpi}dpi.png'
+        write_png(invoice['lines'], image_path, dpi)
+        manifest.append({
+            'path': image_path,
+            'file_type': 'image',
+            'variant': f'{dpi}dpi',
+            'expected': invoice['expected'],
+        })
+
+    return manifest
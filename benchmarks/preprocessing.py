@@ -0,0 +1,178 @@
+"""
+Benchmark do pré-processamento de imagens antes do OCR: compara latência
+(pré-processamento e OCR) e acurácia dos campos extraídos para cada
+combinação de etapas, com e sem o OCR restrito à região do prestador,
+sobre as imagens de exemplo de test_files/ e variações delas (inclinada e
+em 600 dpi).
+
+Uso:
+    python -m benchmarks.preprocessing --output ocr_bench.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import pytesseract
+from PIL import Image
+
+from benchmarks.run import summarize
+from extractor.data_extractor import ExtractorConfig, NFSeExtractor
+from extractor.preprocessing import preprocess_image
+from extractor.regions import ocr_image
+
+TEST_FILES_DIR = Path(__file__).resolve().parent.parent / 'test_files'
+DEFAULT_REPEAT = 3
+SKEW_ANGLE = 2.5
+HIGH_DPI = 600
+
+SAMPLE_IMAGES = {
+    'nfse_test.png': {
+        'cnpj_prestador': '12.345.678/0001-90',
+        'nome_prestador': 'EMPRESA FICTÍCIA LTDA',
+    },
+    'nfse2.png': {
+        'cnpj_prestador': '22.222.222/0002-20',
+        'nome_prestador': 'EMPRESA FICTÍCIA LTDA PNG 2 TESTE',
+    },
+}
+
+PRESETS = {
+    'sem_preprocessamento': {'OCR_PREPROCESS': False, 'OCR_ROI': False},
+    'escala': {
+        'OCR_GRAYSCALE': False,
+        'OCR_BINARIZE': False,
+        'OCR_DESKEW': False,
+        'OCR_ROI': False,
+    },
+    'escala_cinza': {
+        'OCR_BINARIZE': False,
+        'OCR_DESKEW': False,
+        'OCR_ROI': False,
+    },
+    'escala_cinza_binaria': {'OCR_DESKEW': False, 'OCR_ROI': False},
+    'completo': {'OCR_ROI': False},
+    'completo_roi': {},
+}
+
+
+def build_config(overrides: Dict) -> ExtractorConfig:
+    """Configuração derivada de ExtractorConfig com as opções do preset."""
+    return type('PresetConfig', (ExtractorConfig,), overrides)()
+
+
+def load_samples(test_files_dir: Path = TEST_FILES_DIR) -> List[Dict]:
+    """Carrega as imagens de exemplo e gera as variações de cada uma."""
+    samples = []
+    for file_name, expected in SAMPLE_IMAGES.items():
+        path = test_files_dir / file_name
+        if not path.exists():
+            continue
+        with Image.open(path) as original:
+            original.load()
+
+        skewed = original.convert('RGB').rotate(
+            SKEW_ANGLE, expand=True, fillcolor='white'
+        )
+        high_dpi = original.resize((original.width * 2, original.height * 2))
+        high_dpi.info['dpi'] = (HIGH_DPI, HIGH_DPI)
+
+        for variant, image in (
+            ('original', original),
+            ('inclinada', skewed),
+            (f'{HIGH_DPI}dpi', high_dpi),
+        ):
+            samples.append({
+                'name': f'{file_name}:{variant}',
+                'image': image,
+                'expected': expected,
+            })
+    return samples
+
+
+def field_accuracy(result: Dict, expected: Dict) -> float:
+    """Fração dos campos esperados extraídos exatamente."""
+    matches = sum(result.get(field) == value for field, value in expected.items())
+    return matches / len(expected)
+
+
+def run_preset(samples: List[Dict], config: ExtractorConfig, repeat: int) -> Dict:
+    """
+    Mede o pré-processamento e o OCR de cada amostra. Sem o Tesseract
+    instalado, apenas o pré-processamento é medido.
+    """
+    extractor = NFSeExtractor()
+    preprocess_samples = []
+    ocr_samples = []
+    accuracies = []
+    ocr_error = None
+    for _ in range(repeat):
+        for sample in samples:
+            started = time.perf_counter()
+            image = preprocess_image(sample['image'], config)
+            preprocess_samples.append(time.perf_counter() - started)
+
+            if ocr_error:
+                continue
+            started = time.perf_counter()
+            try:
+                text = ocr_image(image, config)
+            except pytesseract.TesseractNotFoundError as e:
+                ocr_error = str(e) or 'Tesseract OCR não instalado'
+                continue
+            ocr_samples.append(time.perf_counter() - started)
+            accuracies.append(
+                field_accuracy(
+                    extractor.extract_from_text(text), sample['expected']
+                )
+            )
+
+    report = {'preprocess': summarize(preprocess_samples)}
+    if ocr_error:
+        report['ocr'] = {'skipped': ocr_error}
+        return report
+    report['ocr'] = summarize(ocr_samples)
+    report['field_accuracy'] = round(sum(accuracies) / len(accuracies), 3)
+    return report
+
+
+def run_benchmarks(repeat: int, test_files_dir: Path = TEST_FILES_DIR) -> Dict:
+    samples = load_samples(test_files_dir)
+    return {
+        'repeat': repeat,
+        'samples': [sample['name'] for sample in samples],
+        'results': {
+            name: run_preset(samples, build_config(overrides), repeat)
+            for name, overrides in PRESETS.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--output', type=str, help='Arquivo JSON de saída.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        '--test-files',
+        type=str,
+        default=str(TEST_FILES_DIR),
+        help='Diretório com as imagens de exemplo.',
+    )
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.repeat, Path(args.test_files))
+    if not report['samples']:
+        print('Nenhuma imagem de exemplo encontrada', file=sys.stderr)
+        sys.exit(1)
+
+    serialized = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(serialized + '\n', encoding='utf-8')
+    print(serialized)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark dos leitores, do extrator (com os layouts padrão e com 50
+layouts) e da view /api/extract/ sobre o corpus sintético. Mede throughput
+e latências p50/p95/p99 por alvo, grava o resultado em JSON e compara com
+uma baseline salva.
+
+Uso:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import generate_corpus
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25
+COMPARED_METRICS = ('p50_ms', 'p95_ms')
+SYNTHETIC_LAYOUTS = 50
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Percentil com interpolação linear sobre amostras já ordenadas."""
+    position = (len(sorted_samples) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    weight = position - lower
+    return sorted_samples[lower] * (1 - weight) + sorted_samples[upper] * weight
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Resume latências (em segundos) em throughput e percentis (em ms)."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'samples': len(ordered),
+        'throughput_per_s': round(len(ordered) / total, 3) if total else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def measure(
+    operation: Callable[[Dict], object], entries: List[Dict], repeat: int
+) -> Dict:
+    """Executa a operação sobre cada documento `repeat` vezes."""
+    samples = []
+    for _ in range(repeat):
+        for entry in entries:
+            started = time.perf_counter()
+            operation(entry)
+            samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def synthetic_layouts(count: int = SYNTHETIC_LAYOUTS) -> tuple:
+    """Layouts fictícios, para medir a identificação com muitos layouts."""
+    from extractor.layouts import LayoutTemplate  # noqa: PLC0415
+
+    return tuple(
+        LayoutTemplate(
+            name=f'municipio_{index}',
+            prestador_start=f'Emitente {index:03d}:',
+            prestador_end=rf'^\s*Destinatário {index:03d}:',
+            razao_social=r'Empresa:\s*(.+?)(?:\n|$)',
+        )
+        for index in range(count)
+    )
+
+
+def _setup_django() -> None:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nfse_project.settings')
+    import django  # noqa: PLC0415
+    from django.conf import settings  # noqa: PLC0415
+
+    django.setup()
+    settings.NFSE_CACHE = {'PATH': None, 'MAX_ENTRIES': 0}
+    settings.ALLOWED_HOSTS = ['*']
+
+
+def _view_operation() -> Callable[[Dict], object]:
+    from django.test import Client  # noqa: PLC0415
+
+    client = Client()
+
+    def post(entry: Dict):
+        with open(entry['path'], 'rb') as file:
+            response = client.post('/api/extract/', {'file': file})
+        if response.status_code != 200:  # noqa: PLR2004
+            raise RuntimeError(response.json().get('error'))
+        return response
+
+    return post
+
+
+def run_benchmarks(corpus_dir: Path, repeat: int) -> Dict:
+    """Gera o corpus e mede cada alvo; alvos indisponíveis são ignorados."""
+    _setup_django()
+    from extractor.data_extractor import (  # noqa: PLC0415
+        ExtractorConfig,
+        ImageReader,
+        NFSeExtractor,
+        PDFReader,
+    )
+
+    manifest = generate_corpus(corpus_dir)
+    pdfs = [entry for entry in manifest if entry['file_type'] == 'pdf']
+    images = [entry for entry in manifest if entry['file_type'] == 'image']
+    texts = [{'text': PDFReader.read(str(entry['path']))} for entry in pdfs]
+    extractor = NFSeExtractor()
+    many_layouts = NFSeExtractor(
+        type('ManyLayouts', (ExtractorConfig,), {'LAYOUTS': synthetic_layouts()})()
+    )
+
+    targets = {
+        'pdf_reader': (lambda entry: PDFReader.read(str(entry['path'])), pdfs),
+        'image_reader': (
+            lambda entry: ImageReader.read(str(entry['path'])),
+            images,
+        ),
+        'nfse_extractor': (
+            lambda entry: extractor.extract_from_text(entry['text']),
+            texts,
+        ),
+        'nfse_extractor_50_layouts': (
+            lambda entry: many_layouts.extract_from_text(entry['text']),
+            texts,
+        ),
+        'extract_view_pdf': (_view_operation(), pdfs),
+        'extract_view_image': (_view_operation(), images),
+    }
+
+    results = {}
+    for name, (operation, entries) in targets.items():
+        try:
+            operation(entries[0])
+        except Exception as e:
+            results[name] = {'skipped': str(e)}
+            continue
+        results[name] = measure(operation, entries, repeat)
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'repeat': repeat,
+        'corpus': [
+            {'variant': entry['variant'], 'file_type': entry['file_type']}
+            for entry in manifest
+        ],
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Lista as regressões: métricas acima da baseline além da tolerância."""
+    regressions = []
+    for name, baseline_result in baseline['results'].items():
+        current_result = current['results'].get(name, {})
+        for metric in COMPARED_METRICS:
+            if metric not in baseline_result or metric not in current_result:
+                continue
+            limit = baseline_result[metric] * (1 + tolerance)
+            if current_result[metric] > limit:
+                regressions.append(
+                    f'{name}.{metric}: {current_result[metric]:.3f} ms '
+                    f'> {limit:.3f} ms (baseline {baseline_result[metric]:.3f})'
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--output', type=str, help='Arquivo JSON de saída.')
+    parser.add_argument(
+        '--baseline', type=str, help='Baseline JSON para comparação.'
+    )
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help='Grava o resultado atual como nova baseline em --baseline.',
+    )
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help='Piora relativa tolerada antes de acusar regressão.',
+    )
+    parser.add_argument(
+        '--corpus-dir',
+        type=str,
+        help='Diretório do corpus sintético (padrão: temporário).',
+    )
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus_dir or tempfile.mkdtemp(prefix='nfse_bench_'))
+    try:
+        report = run_benchmarks(corpus_dir, args.repeat)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    serialized = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(serialized + '\n', encoding='utf-8')
+    print(serialized)
+
+    if not args.baseline:
+        return
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline or not baseline_path.exists():
+        baseline_path.write_text(serialized + '\n', encoding='utf-8')
+        print(f'Baseline gravada em {baseline_path}', file=sys.stderr)
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSÃO {regression}', file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print('Sem regressões em relação à baseline', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
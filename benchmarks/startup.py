@@ -0,0 +1,146 @@
+"""
+Benchmark do tempo de inicialização da CLI (`extract_cli.py`).
+
+Cada cenário roda em um interpretador novo: `--help` e a extração de um PDF
+com camada de texto. Mede o tempo total (mediana de várias execuções) e,
+com `python -X importtime`, o tempo de importação de cada módulo de topo e
+quais dependências pesadas (pdfplumber, pdfminer, pytesseract, Pillow) e
+módulos de outros modos da CLI (lote, --split, --texts, cache) foram
+carregados. Sai com 1 se algum cenário passar do seu alvo.
+
+Uso:
+    task bench_startup
+    python -m benchmarks.startup
+    python -m benchmarks.startup --output startup.json --repeat 10
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFAULT_REPEAT = 5
+SAMPLE_PDF = Path('test_files/NFSe_ficticia_layout_completo.pdf')
+
+# Argumentos da CLI e tempo total alvo (mediana, em ms) de cada cenário
+SCENARIOS = {
+    'help': (['--help'], 200),
+    'single_pdf': ([str(SAMPLE_PDF)], 300),
+}
+
+# Prefixos dos módulos carregados só quando um leitor precisa deles (do
+# Pillow, a extensão em C; o pacote PIL em si é mínimo)
+HEAVY_MODULES = ('pdfplumber.', 'pdfminer', 'pytesseract.', 'PIL._imaging')
+
+# Módulos que só os outros modos da CLI usam (importados nas funções run_*;
+# extractor.archives decide o modo, mas carrega tarfile e zipfile sob demanda)
+MODE_MODULES = (
+    'extractor.batch',
+    'extractor.invoices',
+    'concurrent.futures.process',
+    'sqlite3',
+    'gzip',
+    'tarfile',
+    'zipfile',
+)
+
+_IMPORTTIME_LINE = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$', re.MULTILINE
+)
+
+
+def parse_importtime(output: str) -> Dict[str, int]:
+    """Tempo cumulativo (µs) de cada módulo na saída de `-X importtime`."""
+    return {
+        match.group(4): int(match.group(2))
+        for match in _IMPORTTIME_LINE.finditer(output)
+    }
+
+
+def top_level_imports(output: str) -> Dict[str, float]:
+    """Tempo cumulativo (ms) dos módulos importados diretamente pela CLI."""
+    return {
+        match.group(4): int(match.group(2)) / 1000
+        for match in _IMPORTTIME_LINE.finditer(output)
+        if len(match.group(3)) == 1
+    }
+
+
+def heavy_modules(
+    modules: Dict[str, int], prefixes: Tuple[str, ...] = HEAVY_MODULES
+) -> List[str]:
+    return sorted(
+        name
+        for name in modules
+        if any(name.startswith(prefix) for prefix in prefixes)
+    )
+
+
+def _run_cli(args: List[str], importtime: bool = False):
+    flags = ['-X', 'importtime'] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, 'extract_cli.py', *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def run_scenario(args: List[str], repeat: int) -> Dict:
+    """Tempo total em processos novos e importações do cenário."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _run_cli(args)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    output = _run_cli(args, importtime=True).stderr
+    modules = parse_importtime(output)
+    imports = top_level_imports(output)
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'import_ms': round(sum(imports.values()), 3),
+        'slowest_imports': dict(
+            sorted(imports.items(), key=lambda item: -item[1])[:5]
+        ),
+        'heavy_modules': heavy_modules(modules),
+        'mode_modules': heavy_modules(modules, MODE_MODULES),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--output', type=str, help='Arquivo JSON de saída.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    for name, (cli_args, target_ms) in SCENARIOS.items():
+        result = run_scenario(cli_args, args.repeat)
+        result['target_ms'] = target_ms
+        results[name] = result
+        if result['median_ms'] > target_ms:
+            failures.append(
+                f'{name}: {result["median_ms"]:.1f} ms > alvo {target_ms} ms'
+            )
+
+    serialized = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(serialized + '\n', encoding='utf-8')
+    print(serialized)
+
+    for failure in failures:
+        print(f'ACIMA DO ALVO {failure}', file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
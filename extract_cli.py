@@ -1,15 +1,164 @@
 import argparse
 import json
 import logging
+import os
 import sys
+from contextlib import nullcontext
 from pathlib import Path
 
-from extractor.data_extractor import ExtractorError, extract_nfse_data
+from extractor import metrics
 
+# Os módulos de cada modo (lote, --split, --texts, cache) são importados na
+# função do modo, para que `--help` e a extração de um arquivo não paguem por
+# eles; daqui só vêm os padrões da ajuda (sqlite3 e gzip ficam sob demanda).
+from extractor.cache import DEFAULT_CACHE_PATH
+from extractor.corpus import DEFAULT_BATCH_SIZE
+from extractor.data_extractor import (
+    ExtractorError,
+    detect_file_type,
+    extract_nfse_data,
+)
+
+
+def run_single(file_path_str, cache_path=None, timings=False):
+    file_path = Path(file_path_str)
+
+    if not file_path.exists():
+        logging.error(f'Arquivo não encontrado: {file_path_str}')
+        sys.exit(1)
+
+    try:
+        file_type = detect_file_type(file_path_str)
+    except ExtractorError as e:
+        logging.error(e)
+        sys.exit(1)
+
+    logging.info(f'Processando {file_type.upper()}: {file_path_str}')
+
+    try:
+        with metrics.collect_timings() as stage_timings:
+            if cache_path:
+                from extractor.cache import build_cache  # noqa: PLC0415
+
+                cache = build_cache(path=cache_path)
+                result = cache.get_or_extract(
+                    file_path_str, file_type, extract_nfse_data
+                )
+                if cache.hits:
+                    logging.info('Resultado obtido do cache')
+            else:
+                result = extract_nfse_data(file_path_str, file_type)
+        if timings:
+            _log_timings(stage_timings)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    except ExtractorError as e:
+        logging.error(f'Falha na extração: {e}')
+        sys.exit(1)
+    except Exception as e:
+        logging.critical(f'Um erro inesperado e fatal ocorreu: {e}')
+        sys.exit(1)
+
+
+def _log_timings(stage_timings):
+    for stage, elapsed_ms in metrics.as_milliseconds(stage_timings).items():
+        logging.info(f'Etapa {stage}: {elapsed_ms:.3f} ms')
+
+
+def _record_writer(competencia):
+    """
+    Gravador dos resultados no banco da aplicação. O Django só é carregado
+    quando há gravação.
+    """
+    import django  # noqa: PLC0415
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nfse_project.settings')
+    django.setup()
+    from extractor.storage import RecordWriter, parse_competencia  # noqa: PLC0415
+
+    try:
+        return RecordWriter(parse_competencia(competencia))
+    except ValueError as e:
+        logging.error(e)
+        sys.exit(1)
+
+
+def run_batch_mode(
+    sources, manifest, workers, cache_path=None, timings=False, save=None
+):
+    from extractor.batch import collect_files, run_batch  # noqa: PLC0415
+
+    files = collect_files(sources, manifest=manifest)
+    writer = _record_writer(save) if save else None
+
+    processed = 0
+    failures = 0
+    records = run_batch(
+        files, workers=workers, cache_path=cache_path, timings=timings
+    )
+    with writer or nullcontext():
+        for record in records:
+            processed += 1
+            if 'error' in record:
+                failures += 1
+                logging.warning(f'Falha em {record["file"]}: {record["error"]}')
+            elif writer:
+                writer.add(record)
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+
+    logging.info(f'Lote concluído: {processed} arquivo(s), {failures} falha(s)')
+    if writer:
+        logging.info(f'{writer.saved} registro(s) gravado(s) no banco')
+    if failures:
+        sys.exit(1)
+
+
+def run_split_mode(file_path_str, workers, pages_per_invoice):
+    from extractor.invoices import extract_invoices  # noqa: PLC0415
+
+    if not Path(file_path_str).exists():
+        logging.error(f'Arquivo não encontrado: {file_path_str}')
+        sys.exit(1)
+
+    invoices = 0
+    try:
+        file_type = detect_file_type(file_path_str)
+        records = extract_invoices(
+            file_path_str,
+            file_type,
+            workers=workers,
+            pages_per_invoice=pages_per_invoice,
+        )
+        for record in records:
+            invoices += 1
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+    except ExtractorError as e:
+        logging.error(f'Falha na extração: {e}')
+        sys.exit(1)
+
+    logging.info(f'Documento concluído: {invoices} nota(s)')
 
-def main():
-    SUPPORTED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'gif'}
 
+def run_texts_mode(corpus_path, batch_size):
+    from extractor.corpus import extract_corpus  # noqa: PLC0415
+
+    if not Path(corpus_path).exists():
+        logging.error(f'Corpus não encontrado: {corpus_path}')
+        sys.exit(1)
+
+    processed = 0
+    try:
+        for columns in extract_corpus(corpus_path, batch_size=batch_size):
+            processed += len(columns['id'])
+            print(json.dumps(columns, ensure_ascii=False), flush=True)
+    except ExtractorError as e:
+        logging.error(f'Falha na extração: {e}')
+        sys.exit(1)
+
+    logging.info(f'Corpus concluído: {processed} texto(s)')
+
+
+def main():
     logging.basicConfig(
         level=logging.INFO,
         format='%(levelname)s: %(message)s',
@@ -24,39 +173,120 @@ def main():
     parser.add_argument(
         'filepath',
         type=str,
-        help='Caminho completo para o arquivo PDF ou de imagem.',
+        nargs='*',
+        help='Caminho completo para o arquivo PDF ou de imagem. '
+        'Em modo lote, aceita vários arquivos, diretórios e padrões glob. '
+        'Arquivos .zip e .tar.gz são lidos em memória, um registro por '
+        'membro (implica --batch).',
+    )
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Processa vários arquivos em paralelo e emite JSON Lines '
+        'na ordem de conclusão.',
+    )
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        help='Arquivo com um caminho por linha (implica --batch).',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Número de processos do modo lote e do --split '
+        '(padrão: núcleos da CPU).',
+    )
+    parser.add_argument(
+        '--cache',
+        type=str,
+        nargs='?',
+        const=str(DEFAULT_CACHE_PATH),
+        default=None,
+        metavar='CAMINHO',
+        help='Reaproveita resultados de arquivos já processados, guardados '
+        f'em um cache SQLite (padrão: {DEFAULT_CACHE_PATH}).',
+    )
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='Mostra a duração de cada etapa da extração (no modo lote, '
+        "inclui a chave 'timings', em milissegundos, em cada registro).",
+    )
+    parser.add_argument(
+        '--save',
+        type=str,
+        metavar='COMPETENCIA',
+        help='Grava os resultados no banco da aplicação, associados ao mês '
+        'de competência (AAAA-MM ou MM/AAAA) (implica --batch).',
+    )
+    parser.add_argument(
+        '--split',
+        action='store_true',
+        help='Extrai cada NFSe de um PDF com várias notas, emitindo JSON '
+        "Lines com as páginas de cada nota ('first_page', 'last_page').",
+    )
+    parser.add_argument(
+        '--pages-per-invoice',
+        type=int,
+        default=None,
+        metavar='N',
+        help='Com --split, divide o PDF a cada N páginas em vez de usar os '
+        'cabeçalhos do prestador.',
+    )
+    parser.add_argument(
+        '--texts',
+        type=str,
+        metavar='CORPUS',
+        help='Reextrai de um corpus JSON Lines de textos brutos já lidos '
+        '(sem PDF nem OCR), emitindo um lote colunar por linha.',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help='Textos por lote colunar do modo --texts '
+        f'(padrão: {DEFAULT_BATCH_SIZE}).',
     )
 
     args = parser.parse_args()
+    for option, value in (
+        ('--workers', args.workers),
+        ('--pages-per-invoice', args.pages_per_invoice),
+        ('--batch-size', args.batch_size),
+    ):
+        if value is not None and value < 1:
+            parser.error(f'{option} deve ser pelo menos 1')
 
-    file_path_str = args.filepath
-    file_path = Path(file_path_str)
+    if args.texts:
+        run_texts_mode(args.texts, args.batch_size)
+        return
 
-    if not file_path.exists():
-        logging.error(f'Arquivo não encontrado: {file_path_str}')
-        sys.exit(1)
-
-    file_extension = file_path.suffix.lower().lstrip('.')
-    if file_extension == 'pdf':
-        file_type = 'pdf'
-    elif file_extension in SUPPORTED_IMAGE_EXTENSIONS:
-        file_type = 'image'
-    else:
-        logging.error(f"Extensão de arquivo não suportada: '{file_extension}'")
-        sys.exit(1)
+    if args.split:
+        if args.batch or args.manifest or len(args.filepath) != 1:
+            parser.error('--split aceita exatamente um arquivo, sem --batch')
+        run_split_mode(args.filepath[0], args.workers, args.pages_per_invoice)
+        return
 
-    logging.info(f'Processando {file_type.upper()}: {file_path_str}')
+    from extractor.archives import is_archive  # noqa: PLC0415
 
-    try:
-        result = extract_nfse_data(file_path_str, file_type)
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+    archive_given = len(args.filepath) == 1 and is_archive(args.filepath[0])
+    if args.batch or args.manifest or archive_given or args.save:
+        if not args.filepath and not args.manifest:
+            parser.error('informe ao menos um caminho ou --manifest')
+        run_batch_mode(
+            args.filepath,
+            args.manifest,
+            args.workers,
+            args.cache,
+            args.timings,
+            args.save,
+        )
+        return
 
-    except ExtractorError as e:
-        logging.error(f'Falha na extração: {e}')
-        sys.exit(1)
-    except Exception as e:
-        logging.critical(f'Um erro inesperado e fatal ocorreu: {e}')
-        sys.exit(1)
+    if len(args.filepath) != 1:
+        parser.error('informe exatamente um arquivo (ou use --batch)')
+    run_single(args.filepath[0], args.cache, args.timings)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from .models import ExtractionJob, NFSeRecord, ProcessedFile
+
+
+@admin.register(ExtractionJob)
+class ExtractionJobAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'file_type', 'status', 'created_at']
+    list_filter = ['status', 'file_type']
+    readonly_fields = ['id', 'result', 'error', 'created_at', 'updated_at']
+
+
+@admin.register(NFSeRecord)
+class NFSeRecordAdmin(admin.ModelAdmin):
+    list_display = ['cnpj_prestador', 'nome_prestador', 'competencia', 'file_name']
+    list_filter = ['competencia']
+    search_fields = ['cnpj_prestador']
+
+
+@admin.register(ProcessedFile)
+class ProcessedFileAdmin(admin.ModelAdmin):
+    list_display = ['path', 'size', 'processed_at', 'error']
+    search_fields = ['path']
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ExtractorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'extractor'
+
+    def ready(self):  # noqa: PLR6301
+        from django.conf import settings  # noqa: PLC0415
+
+        from . import metrics  # noqa: PLC0415
+
+        metrics.configure(getattr(settings, 'NFSE_METRICS_ENABLED', False))
@@ -0,0 +1,122 @@
+"""
+Leitura de arquivos compactados (.zip, .tar, .tar.gz, .tgz) sem extraí-los
+para o disco.
+
+Os membros com extensão suportada são lidos um por vez, em memória, e
+entregues como bytes aos leitores, que já aceitam conteúdo em memória.
+Arquivos .tar são percorridos em modo de fluxo, sem índice: apenas o
+membro atual é mantido. Um membro maior que `MAX_FILE_BYTES` (pelo
+cabeçalho ou, como o cabeçalho pode mentir, pela leitura, que para no
+limite) vira um FileTooLargeError, sem ser descompactado por inteiro.
+"""
+
+import zlib
+from typing import BinaryIO, Iterator, Tuple, Union
+
+from .data_extractor import (
+    DEFAULT_CONFIG,
+    ExtractorError,
+    FileTooLargeError,
+    ProcessingError,
+    Source,
+    UnsupportedFileTypeError,
+    _open_source,
+    check_file_size,
+    describe_source,
+    detect_file_type,
+    is_path_source,
+)
+from .lazy import lazy_import
+
+# Carregados só quando um arquivo compactado é lido, não a cada `is_archive`
+tarfile = lazy_import('tarfile')
+zipfile = lazy_import('zipfile')
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+Member = Tuple[str, Union[bytes, ExtractorError]]
+
+
+def is_archive(file_name: str) -> bool:
+    """Indica se o nome é de um arquivo compactado suportado."""
+    return file_name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _is_supported(member_name: str) -> bool:
+    try:
+        detect_file_type(member_name)
+    except UnsupportedFileTypeError:
+        return False
+    return True
+
+
+def _read_member(
+    stream: BinaryIO, name: str, size: int
+) -> Union[bytes, FileTooLargeError]:
+    """
+    Conteúdo do membro, lido até no máximo `MAX_FILE_BYTES` + 1 bytes, ou o
+    erro se o tamanho declarado ou o lido passar do limite.
+    """
+    limit = DEFAULT_CONFIG.MAX_FILE_BYTES
+    try:
+        check_file_size(size, name)
+    except FileTooLargeError as e:
+        return e
+    if limit is None:
+        return stream.read()
+    content = stream.read(limit + 1)
+    if len(content) > limit:
+        return FileTooLargeError(
+            f'Arquivo {name} excede o limite de {limit} bytes'
+        )
+    return content
+
+
+def _iter_zip(source: Source) -> Iterator[Member]:
+    with zipfile.ZipFile(_open_source(source)) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and _is_supported(info.filename):
+                with archive.open(info) as member:
+                    yield (
+                        info.filename,
+                        _read_member(member, info.filename, info.file_size),
+                    )
+
+
+def _iter_tar(source: Source) -> Iterator[Member]:
+    if is_path_source(source):
+        archive = tarfile.open(source, mode='r|*')
+    else:
+        archive = tarfile.open(fileobj=_open_source(source), mode='r|*')
+    with archive:
+        for member in archive:
+            if member.isfile() and _is_supported(member.name):
+                yield (
+                    member.name,
+                    _read_member(
+                        archive.extractfile(member), member.name, member.size
+                    ),
+                )
+
+
+def iter_members(source: Source, archive_name: str) -> Iterator[Member]:
+    """
+    Entrega (nome, conteúdo) de cada membro com extensão suportada, na
+    ordem do arquivo; no lugar do conteúdo, um FileTooLargeError para
+    membros acima do limite. O nome é prefixado por `archive_name`, para
+    identificar o resultado de cada membro.
+    """
+    iter_archive = (
+        _iter_zip if archive_name.lower().endswith('.zip') else _iter_tar
+    )
+    try:
+        for member_name, content in iter_archive(source):
+            yield f'{archive_name}/{member_name}', content
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error) as e:
+        raise ProcessingError(
+            f'Arquivo compactado inválido: {describe_source(source)} ({e})'
+        )
+    except OSError as e:
+        raise ProcessingError(
+            f'Erro ao ler o arquivo compactado {describe_source(source)}: {e}'
+        )
@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import metrics
+from .cache import get_default_cache
+from .data_extractor import extract_nfse_data, is_path_source
+from .executors import EXECUTORS, submit_rebuilding
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _options():
+    options = getattr(settings, 'NFSE_ASYNC', {})
+    workers = options.get('WORKERS') or os.cpu_count() or 1
+    return {
+        'executor': options.get('EXECUTOR', 'process'),
+        'workers': workers,
+        'max_concurrent': options.get('MAX_CONCURRENT') or workers,
+    }
+
+
+@functools.cache
+def get_extraction_executor():
+    """
+    Executor dedicado e de tamanho fixo para leitura de PDF e OCR;
+    recriado por `submit_rebuilding` se o pool quebrar.
+    """
+    options = _options()
+    return EXECUTORS[options['executor']](max_workers=options['workers'])
+
+
+def _extraction_semaphore() -> asyncio.Semaphore:
+    """
+    Semáforo que limita as extrações simultâneas do event loop atual.
+    Um por loop, já que primitivas do asyncio não podem atravessar loops.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_options()['max_concurrent'])
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def extract_async(source, file_type):
+    """
+    Extrai os dados sem bloquear o event loop: hash e cache rodam em
+    threads, e a extração no executor dedicado, limitada pelo semáforo.
+    Requisições acima do limite aguardam sem ocupar threads nem núcleos.
+    """
+    cache = get_default_cache()
+    key = await sync_to_async(cache.key_for, thread_sensitive=False)(
+        source, file_type
+    )
+    result = await sync_to_async(cache.get, thread_sensitive=False)(key)
+    if result is not None:
+        return result
+
+    executor = get_extraction_executor()
+    if isinstance(executor, ProcessPoolExecutor) and not is_path_source(source):
+        source = await sync_to_async(source.read, thread_sensitive=False)()
+
+    async with _extraction_semaphore():
+        recorded = await asyncio.wrap_future(
+            submit_rebuilding(
+                get_extraction_executor,
+                metrics.call_recorded,
+                extract_nfse_data,
+                source,
+                file_type,
+            )
+        )
+    result = metrics.replay(recorded)
+
+    await sync_to_async(cache.set, thread_sensitive=False)(key, result)
+    return result
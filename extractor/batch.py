@@ -0,0 +1,244 @@
+import functools
+import glob
+import itertools
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    BrokenExecutor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from . import metrics
+from .archives import is_archive, iter_members
+from .cache import ExtractionCache, build_cache
+from .data_extractor import (
+    ExtractorError,
+    UnsupportedFileTypeError,
+    detect_file_type,
+    extract_nfse_data,
+)
+from .executors import submit_rebuilding
+
+PENDING_PER_WORKER = 4
+
+
+def _iter_directory(directory: Path) -> Iterator[Path]:
+    """Percorre um diretório recursivamente em ordem estável."""
+    for root, dir_names, file_names in os.walk(directory):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            yield Path(root) / file_name
+
+
+def _iter_manifest(manifest_path: str) -> Iterator[str]:
+    """Lê um manifesto com um caminho por linha, ignorando linhas vazias e '#'."""
+    with open(manifest_path, encoding='utf-8') as manifest:
+        for line in manifest:
+            entry = line.strip()
+            if entry and not entry.startswith('#'):
+                yield entry
+
+
+def _is_supported(file_path: Path) -> bool:
+    if is_archive(file_path.name):
+        return True
+    try:
+        detect_file_type(file_path.name)
+    except UnsupportedFileTypeError:
+        return False
+    return True
+
+
+def collect_files(
+    sources: Iterable[str], manifest: Optional[str] = None
+) -> Iterator[Path]:
+    """
+    Expande arquivos, diretórios e padrões glob (e as entradas de um
+    manifesto) nos arquivos a processar, sem repetições.
+    Arquivos de diretórios e globs são filtrados pelas extensões suportadas
+    (incluindo arquivos compactados); caminhos explícitos são sempre
+    entregues, para que o erro seja reportado.
+    """
+    entries = iter(sources)
+    if manifest:
+        entries = itertools.chain(entries, _iter_manifest(manifest))
+
+    seen = set()
+    for entry in entries:
+        entry_path = Path(entry)
+        if entry_path.is_dir():
+            candidates = _iter_directory(entry_path)
+        elif glob.has_magic(entry):
+            candidates = (
+                Path(match)
+                for match in sorted(glob.iglob(entry, recursive=True))
+                if Path(match).is_file()
+            )
+        else:
+            candidates = iter([entry_path])
+
+        for candidate in candidates:
+            if candidate != entry_path and not _is_supported(candidate):
+                continue
+            if candidate in seen:
+                continue
+            seen.add(candidate)
+            yield candidate
+
+
+@functools.cache
+def _process_cache(cache_path: str) -> ExtractionCache:
+    """Um cache por processo worker, todos apoiados no mesmo arquivo SQLite."""
+    return build_cache(path=cache_path)
+
+
+def extract_file(
+    file_path_str: str,
+    cache_path: Optional[str] = None,
+    timings: bool = False,
+    content: Optional[bytes] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Extrai os dados de um único arquivo para o processamento em lote.
+    Falhas não são propagadas: viram um registro com a chave 'error'.
+    Com `timings`, o registro traz a duração de cada etapa em milissegundos.
+    Com `content` (membro de um arquivo compactado), o conteúdo em memória
+    é lido no lugar do caminho.
+    """
+    source = file_path_str if content is None else content
+    with metrics.collect_timings() as stage_timings:
+        try:
+            file_type = detect_file_type(file_path_str)
+            if cache_path:
+                result = _process_cache(cache_path).get_or_extract(
+                    source, file_type, extract_nfse_data
+                )
+            else:
+                result = extract_nfse_data(source, file_type)
+        except Exception as e:
+            result = {'error': str(e)}
+
+    record = {'file': file_path_str, **result}
+    if timings:
+        record['timings'] = metrics.as_milliseconds(stage_timings)
+    return record
+
+
+Entry = Tuple[str, Union[bytes, ExtractorError, None]]
+
+
+def iter_entries(files: Iterable[Path]) -> Iterator[Entry]:
+    """
+    Expande os arquivos compactados em seus membros, lidos em memória um
+    por vez: (nome, conteúdo) para membros, (caminho, None) para arquivos
+    comuns e (caminho, erro) para arquivos compactados ilegíveis.
+    """
+    for file_path in files:
+        if not is_archive(file_path.name):
+            yield str(file_path), None
+            continue
+        try:
+            yield from iter_members(file_path, str(file_path))
+        except ExtractorError as e:
+            yield str(file_path), e
+
+
+def _indexed_record(
+    cache: ExtractionCache, file_path_str: str, timings: bool
+) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Registro em cache de um arquivo inalterado desde a última execução,
+    consultado pelo índice de arquivos (um stat, sem ler o conteúdo).
+    """
+    try:
+        file_type = detect_file_type(file_path_str)
+    except UnsupportedFileTypeError:
+        return None
+    result = cache.lookup_file(file_path_str, file_type)
+    if result is None:
+        return None
+    record = {'file': file_path_str, **result}
+    if timings:
+        record['timings'] = {}
+    return record
+
+
+def run_batch(
+    files: Iterable[Path],
+    workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    timings: bool = False,
+) -> Iterator[Dict[str, Optional[str]]]:
+    """
+    Distribui a extração dos arquivos entre processos e entrega os
+    resultados na ordem em que terminam.
+    A quantidade de tarefas pendentes é limitada, então a lista de arquivos
+    pode ser consumida de forma preguiçosa, mesmo com dezenas de milhares.
+    Arquivos compactados são expandidos e cada membro vira um registro.
+    Com `cache_path`, os workers compartilham o cache em disco e os
+    arquivos inalterados desde a última execução (mesmo caminho, mtime e
+    tamanho) são respondidos pelo índice, sem ir aos workers.
+    Com `timings`, cada registro inclui a duração das etapas.
+    Se um worker morre (falta de memória, falha no código nativo), o pool
+    é recriado e só o arquivo que o derrubou vira um registro de erro.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * PENDING_PER_WORKER
+    cache = _process_cache(cache_path) if cache_path else None
+    get_executor = functools.cache(
+        functools.partial(ProcessPoolExecutor, max_workers=workers)
+    )
+    pending = {}
+
+    def submit(name: str, content: Optional[bytes]) -> Future:
+        return submit_rebuilding(
+            get_executor, extract_file, name, cache_path, timings, content
+        )
+
+    def collect(limit: int) -> Iterator[Dict[str, Optional[str]]]:
+        """
+        Entrega resultados até restarem menos de `limit` tarefas. Quando um
+        worker morre, todas as tarefas do pool quebrado falham: elas são
+        executadas de novo, uma de cada vez, e só a que derrubar o pool
+        outra vez vira um registro de erro.
+        """
+        broken = []
+        while len(pending) >= limit or (broken and pending):
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, content = pending.pop(future)
+                if isinstance(future.exception(), BrokenExecutor):
+                    broken.append((name, content))
+                else:
+                    yield _collect(future, name)
+        for name, content in broken:
+            yield _collect(submit(name, content), name)
+
+    try:
+        for name, content in iter_entries(files):
+            if isinstance(content, ExtractorError):
+                yield {'file': name, 'error': str(content)}
+                continue
+            if cache and content is None:
+                record = _indexed_record(cache, name, timings)
+                if record is not None:
+                    yield record
+                    continue
+            pending[submit(name, content)] = (name, content)
+            yield from collect(max_pending)
+        yield from collect(1)
+    finally:
+        if get_executor.cache_info().currsize:
+            get_executor().shutdown()
+
+
+def _collect(future, file_path_str: str) -> Dict[str, Optional[str]]:
+    """Obtém o resultado de uma tarefa, convertendo falhas do worker em erro."""
+    try:
+        return future.result()
+    except Exception as e:
+        return {'file': file_path_str, 'error': f'Falha no worker: {e}'}
@@ -0,0 +1,367 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from .data_extractor import (
+    DEFAULT_CONFIG,
+    ExtractorConfig,
+    Source,
+    is_path_source,
+)
+
+if TYPE_CHECKING:
+    import sqlite3
+
+DEFAULT_CACHE_PATH = Path('.cache') / 'extraction.sqlite3'
+DIGEST_BLOCK_SIZE = 1024 * 1024
+# Precisão do `accessed_at` em disco: leituras repetidas dentro do intervalo
+# não geram escrita.
+TOUCH_INTERVAL = 60 * 60
+# Arquivos modificados há menos que isso não entram no índice de arquivos: uma
+# nova escrita no mesmo instante poderia manter o mesmo mtime.
+RACY_WINDOW_NS = 2 * 10**9
+
+Result = Dict[str, Optional[str]]
+
+
+def file_digest(source: Source) -> str:
+    """
+    Calcula o SHA-256 do conteúdo, lido em blocos. Objetos de arquivo são
+    devolvidos à posição original para que a extração possa lê-los.
+    """
+    if is_path_source(source):
+        with open(source, 'rb') as file:
+            return hashlib.file_digest(file, 'sha256').hexdigest()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+
+    position = source.tell()
+    try:
+        digest = hashlib.sha256()
+        for block in iter(lambda: source.read(DIGEST_BLOCK_SIZE), b''):
+            digest.update(block)
+        return digest.hexdigest()
+    finally:
+        source.seek(position)
+
+
+def make_key(
+    digest: str, file_type: str, config: Optional[ExtractorConfig] = None
+) -> str:
+    """Monta a chave do cache a partir do conteúdo, tipo e configuração."""
+    config = config or DEFAULT_CONFIG
+    return f'{digest}:{file_type.lower()}:{config.fingerprint()}'
+
+
+class MemoryCache:
+    """Camada em memória com despejo LRU por quantidade e expiração por TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Result]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return dict(value)
+
+    def set(self, key: str, value: Result) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Camada em disco (SQLite), compartilhável entre processos.
+    O despejo remove as entradas acessadas há mais tempo.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 100_000,
+        ttl: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self) -> 'sqlite3.Connection':
+        import sqlite3  # noqa: PLC0415 - só o cache em disco usa o SQLite
+
+        # Conexões SQLite não podem atravessar um fork: reabre por processo.
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS extraction_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS extraction_cache_accessed_at '
+                'ON extraction_cache (accessed_at)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS file_index ('
+                'path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, '
+                'size INTEGER NOT NULL, digest TEXT NOT NULL)'
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> Optional[Result]:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT value, stored_at, accessed_at FROM extraction_cache '
+                'WHERE key = ?',
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, stored_at, accessed_at = row
+            if self.ttl is not None and now - stored_at > self.ttl:
+                with connection:
+                    connection.execute(
+                        'DELETE FROM extraction_cache WHERE key = ?', (key,)
+                    )
+                return None
+            if now - accessed_at >= TOUCH_INTERVAL:
+                with connection:
+                    connection.execute(
+                        'UPDATE extraction_cache SET accessed_at = ? '
+                        'WHERE key = ?',
+                        (now, key),
+                    )
+            return json.loads(value)
+
+    def set(self, key: str, value: Result) -> None:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO extraction_cache '
+                    '(key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                connection.execute(
+                    'DELETE FROM extraction_cache WHERE key IN ('
+                    'SELECT key FROM extraction_cache '
+                    'ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,),
+                )
+
+    def get_file_digest(
+        self, path: str, mtime_ns: int, size: int
+    ) -> Optional[str]:
+        """Digest já calculado do arquivo, se mtime e tamanho não mudaram."""
+        with self._lock:
+            row = (
+                self
+                ._connect()
+                .execute(
+                    'SELECT digest FROM file_index '
+                    'WHERE path = ? AND mtime_ns = ? AND size = ?',
+                    (path, mtime_ns, size),
+                )
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def set_file_digest(
+        self, path: str, mtime_ns: int, size: int, digest: str
+    ) -> None:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO file_index '
+                    '(path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)',
+                    (path, mtime_ns, size, digest),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute('DELETE FROM extraction_cache')
+                connection.execute('DELETE FROM file_index')
+
+    def __len__(self) -> int:
+        with self._lock:
+            connection = self._connect()
+            return connection.execute(
+                'SELECT COUNT(*) FROM extraction_cache'
+            ).fetchone()[0]
+
+
+class ExtractionCache:
+    """
+    Cache de resultados de extração endereçado pelo conteúdo do arquivo.
+    Consulta as camadas em ordem e promove os acertos para as anteriores.
+    """
+
+    def __init__(self, *tiers, config: Optional[ExtractorConfig] = None):
+        self.tiers = tiers
+        self.config = config or DEFAULT_CONFIG
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, source: Source, file_type: str) -> str:
+        return make_key(file_digest(source), file_type, self.config)
+
+    def get(self, key: str) -> Optional[Result]:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for previous_tier in self.tiers[:index]:
+                    previous_tier.set(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Result) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    @property
+    def file_index(self) -> Optional[SQLiteCache]:
+        """Camada em disco, que guarda também o índice de arquivos."""
+        for tier in self.tiers:
+            if isinstance(tier, SQLiteCache):
+                return tier
+        return None
+
+    def lookup_file(self, path: str, file_type: str) -> Optional[Result]:
+        """
+        Resultado de um arquivo que não mudou desde a última extração (mesmo
+        caminho, mtime e tamanho), sem ler o conteúdo: custa um stat e uma
+        consulta ao índice. Exige a camada em disco.
+        """
+        if self.file_index is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        digest = self.file_index.get_file_digest(
+            os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+        )
+        if digest is None:
+            return None
+        return self.get(make_key(digest, file_type, self.config))
+
+    def _file_key(self, path: str, file_type: str) -> str:
+        """
+        Chave de um arquivo em disco: o digest vem do índice quando o
+        arquivo não mudou; caso contrário, é calculado e indexado.
+        """
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        digest = self.file_index.get_file_digest(
+            path, stat.st_mtime_ns, stat.st_size
+        )
+        if digest is None:
+            digest = file_digest(path)
+            if time.time_ns() - stat.st_mtime_ns >= RACY_WINDOW_NS:
+                self.file_index.set_file_digest(
+                    path, stat.st_mtime_ns, stat.st_size, digest
+                )
+        return make_key(digest, file_type, self.config)
+
+    def get_or_extract(
+        self,
+        source: Source,
+        file_type: str,
+        extract: Callable[[Source, str], Result],
+    ) -> Result:
+        """
+        Retorna o resultado em cache ou executa `extract` e o armazena.
+        Arquivos em disco inalterados não são relidos para o hash (ver
+        `lookup_file`).
+        """
+        if is_path_source(source) and self.file_index is not None:
+            key = self._file_key(source, file_type)
+        else:
+            key = self.key_for(source, file_type)
+        result = self.get(key)
+        if result is None:
+            result = extract(source, file_type)
+            self.set(key, result)
+        return result
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def build_cache(
+    path: Optional[str] = None,
+    max_entries: int = 1024,
+    disk_max_entries: int = 100_000,
+    ttl: Optional[float] = None,
+) -> ExtractionCache:
+    """Monta o cache em camadas; a camada em disco só existe com `path`."""
+    tiers = [MemoryCache(max_entries=max_entries, ttl=ttl)]
+    if path:
+        tiers.append(SQLiteCache(path, max_entries=disk_max_entries, ttl=ttl))
+    return ExtractionCache(*tiers)
+
+
+@functools.cache
+def get_default_cache() -> ExtractionCache:
+    """Cache da aplicação web, configurado por `settings.NFSE_CACHE`."""
+    from django.conf import settings  # noqa: PLC0415
+
+    options = getattr(settings, 'NFSE_CACHE', {})
+    return build_cache(
+        path=options.get('PATH'),
+        max_entries=options.get('MAX_ENTRIES', 1024),
+        disk_max_entries=options.get('DISK_MAX_ENTRIES', 100_000),
+        ttl=options.get('TTL'),
+    )
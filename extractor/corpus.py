@@ -0,0 +1,50 @@
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .data_extractor import NFSeExtractor, ProcessingError
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iter_corpus(corpus_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Lê um corpus JSON Lines de textos brutos (opcionalmente .gz), linha a
+    linha. Cada linha é um objeto {"id": ..., "text": ...} ou apenas a
+    string do texto; sem "id", o número da linha é usado.
+    """
+    import gzip  # noqa: PLC0415 - só corpus .gz precisam do módulo
+
+    opener = gzip.open if Path(corpus_path).suffix == '.gz' else open
+    with opener(corpus_path, 'rt', encoding='utf-8') as corpus:
+        for line_number, line in enumerate(corpus, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if isinstance(record, str):
+                    yield str(line_number), record
+                else:
+                    yield str(record.get('id', line_number)), record['text']
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                raise ProcessingError(
+                    f'Linha {line_number} do corpus inválida: {e}'
+                )
+
+
+def extract_corpus(
+    corpus_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    extractor: Optional[NFSeExtractor] = None,
+) -> Iterator[Dict[str, List[Optional[str]]]]:
+    """
+    Reextrai os dados de um corpus de textos brutos, sem passar pelos
+    leitores, em lotes colunares com memória constante.
+    """
+    extractor = extractor or NFSeExtractor()
+    records = iter_corpus(corpus_path)
+    while batch := list(islice(records, batch_size)):
+        ids = [record_id for record_id, _ in batch]
+        columns = extractor.extract_columns(text for _, text in batch)
+        yield {'id': ids, **columns}
@@ -1,11 +1,39 @@
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import io
+import json
+import os
 import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from functools import cached_property
+from itertools import chain, islice
 from pathlib import Path
-from typing import Dict, Optional
-
-import pdfplumber
-import pytesseract
-from pdfminer.pdfparser import PDFSyntaxError
-from PIL import Image
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from . import limits, metrics
+from .layouts import BUILTIN_LAYOUTS, Layout, LayoutRegistry, LayoutTemplate
+from .lazy import lazy_import
+from .preprocessing import preprocess_image
+from .regions import ocr_image
+
+# Carregados no primeiro uso (ver extractor/lazy)
+pdfplumber = lazy_import('pdfplumber')
+pdfium = lazy_import('pypdfium2')
+pytesseract = lazy_import('pytesseract')
+Image = lazy_import('PIL.Image')
 
 
 class ExtractorError(Exception):
@@ -32,6 +60,43 @@ class ProcessingError(ExtractorError):
     pass
 
 
+class LimitExceededError(ExtractorError):
+    """O documento excede um dos limites de processamento configurados"""
+
+    pass
+
+
+class FileTooLargeError(LimitExceededError):
+    """Arquivo maior que `MAX_FILE_BYTES`"""
+
+    pass
+
+
+class ImageTooLargeError(LimitExceededError):
+    """Imagem (ou página a rasterizar) com mais pixels que `MAX_IMAGE_PIXELS`"""
+
+    pass
+
+
+class TooManyPagesError(LimitExceededError):
+    """PDF com mais páginas que `MAX_PDF_PAGES`"""
+
+    pass
+
+
+class ExtractionTimeoutError(LimitExceededError):
+    """Extração interrompida por exceder o orçamento de tempo ou de CPU"""
+
+    pass
+
+
+def _fingerprint_value(value):
+    """Forma serializável de conjuntos e expressões compiladas."""
+    if isinstance(value, re.Pattern):
+        return [value.pattern, value.flags]
+    return sorted(value)
+
+
 class ExtractorConfig:
     """Configurações para o extrator de dados NFSe"""
 
@@ -39,71 +104,446 @@ class ExtractorConfig:
     RAZAO_SOCIAL_PRESTADOR = r'Razão Social:\s*(.+?)(?:\n|$)'
     PRESTADOR_START = r'Dados do Prestador de Serviços'
     PRESTADOR_END = r'Dados do Tomador'
+    # Layouts de outros municípios, além do definido acima (ver extractor/layouts)
+    LAYOUTS = BUILTIN_LAYOUTS
     OCR_LANG = 'por'
+    # Pré-processamento das imagens antes do OCR (ver extractor/preprocessing)
+    OCR_PREPROCESS = True
+    OCR_TARGET_DPI = 300
+    OCR_MAX_SIDE = 3508  # lado maior de uma folha A4 a 300 dpi
+    OCR_GRAYSCALE = True
+    OCR_BINARIZE = True
+    OCR_DESKEW = True
+    OCR_MAX_SKEW_ANGLE = 5.0
+    OCR_SKEW_STEP = 0.5
+    OCR_DETECT_ORIENTATION = False
+    # OCR só da região do prestador, localizada por uma passada reduzida
+    OCR_ROI = True
+    OCR_ROI_SCALE = 0.5
+    OCR_ROI_MARGIN = 0.01  # fração da altura acima do cabeçalho do prestador
+    OCR_ROI_MIN_PIXELS = 1_000_000
+    # Motor de OCR: 'auto' (tesserocr, se instalado), 'tesserocr' ou 'pytesseract'
+    OCR_ENGINE = 'auto'
+    OCR_ENGINE_WORKERS = None  # instâncias no pool; padrão: núcleos da CPU
+    OCR_ENGINE_MAX_JOBS = 500  # chamadas até reciclar uma instância
+    # Leitura direta da camada de texto (pdfium), sem análise de layout
+    PDF_FAST_PATH = True
+    # OCR das páginas de PDF sem camada de texto (digitalizadas)
+    PDF_OCR = True
+    PDF_OCR_DPI = 300
+    PDF_OCR_WORKERS = None  # páginas em OCR simultâneo; padrão: núcleos da CPU
+    IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'gif'})
+
+    # Limites por documento (None desativa). Os pixels são lidos do
+    # cabeçalho da imagem, antes da decodificação; os tempos são em segundos
+    # (prazo total e CPU, ver extractor/limits).
+    MAX_FILE_BYTES = 50 * 1024 * 1024
+    MAX_IMAGE_PIXELS = 80_000_000  # folha A3 a 600 dpi: ~70 milhões
+    MAX_PDF_PAGES = 1000
+    MAX_EXTRACTION_SECONDS = 120
+    MAX_EXTRACTION_CPU_SECONDS = 120
+
+    @cached_property
+    def layouts(self) -> LayoutRegistry:
+        """
+        Registro com o layout padrão (acima) seguido de `LAYOUTS`. O
+        `PRESTADOR_START` e o `PRESTADOR_END` são expressões regulares,
+        comparadas sem distinguir maiúsculas.
+        """
+        default = LayoutTemplate(
+            name='padrao',
+            prestador_start=re.compile(self.PRESTADOR_START),
+            prestador_end=self.PRESTADOR_END,
+            razao_social=self.RAZAO_SOCIAL_PRESTADOR,
+        )
+        return LayoutRegistry((default, *self.LAYOUTS), self.CNPJ_PRESTADOR)
+
+    def fingerprint(self) -> str:
+        """Resumo das configurações, usado para invalidar resultados em cache."""
+        settings = {
+            name: getattr(self, name) for name in dir(self) if name.isupper()
+        }
+        serialized = json.dumps(
+            settings, sort_keys=True, default=_fingerprint_value
+        )
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:16]
+
+
+DEFAULT_CONFIG = ExtractorConfig()
+
+
+Source = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+
+def is_path_source(source: Source) -> bool:
+    """Indica se a origem é um caminho no disco (e não conteúdo em memória)."""
+    return isinstance(source, (str, os.PathLike))
+
+
+def _open_source(source: Source) -> Union[str, BinaryIO]:
+    """
+    Converte a origem no que pdfplumber e PIL aceitam: um caminho ou um
+    objeto de arquivo. Bytes e memoryviews são lidos sem passar pelo disco.
+    """
+    if is_path_source(source):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+def _tell(source: Source) -> Optional[int]:
+    """Posição de leitura de um objeto de arquivo, para relê-lo depois."""
+    if is_path_source(source) or isinstance(
+        source, (bytes, bytearray, memoryview)
+    ):
+        return None
+    return source.tell()
+
+
+def _seek(source: Source, position: Optional[int]) -> None:
+    if position is not None:
+        source.seek(position)
+
+
+def describe_source(source: Source) -> str:
+    """Nome legível da origem, para mensagens de erro."""
+    if is_path_source(source):
+        return os.fspath(source)
+    return getattr(source, 'name', None) or '<conteúdo em memória>'
+
+
+def check_file_size(size: Optional[int], source: Source) -> None:
+    """Levanta FileTooLargeError se o arquivo passar de `MAX_FILE_BYTES`."""
+    limit = DEFAULT_CONFIG.MAX_FILE_BYTES
+    if limit is not None and size is not None and size > limit:
+        raise FileTooLargeError(
+            f'Arquivo {describe_source(source)} com {size} bytes excede o '
+            f'limite de {limit} bytes'
+        )
+
+
+def _check_pixels(width: int, height: int) -> None:
+    limit = DEFAULT_CONFIG.MAX_IMAGE_PIXELS
+    if limit is not None and width * height > limit:
+        raise ImageTooLargeError(
+            f'Imagem com {width}x{height} pixels excede o limite de {limit} pixels'
+        )
+
+
+def _check_page_count(count: int) -> None:
+    limit = DEFAULT_CONFIG.MAX_PDF_PAGES
+    if limit is not None and count > limit:
+        raise TooManyPagesError(
+            f'PDF com {count} páginas excede o limite de {limit} páginas'
+        )
+
+
+def _timeout_error() -> ExtractionTimeoutError:
+    return ExtractionTimeoutError(
+        'Tempo limite da extração excedido '
+        f'({DEFAULT_CONFIG.MAX_EXTRACTION_SECONDS} s, '
+        f'{DEFAULT_CONFIG.MAX_EXTRACTION_CPU_SECONDS} s de CPU)'
+    )
+
+
+def check_deadline() -> None:
+    """Levanta ExtractionTimeoutError se o prazo da extração venceu."""
+    if limits.expired():
+        raise _timeout_error()
+
+
+@contextmanager
+def _time_budget() -> Iterator[None]:
+    """Prazo e orçamento de CPU de uma extração (ver extractor/limits)."""
+    with (
+        limits.deadline(DEFAULT_CONFIG.MAX_EXTRACTION_SECONDS),
+        limits.cpu_budget(
+            DEFAULT_CONFIG.MAX_EXTRACTION_CPU_SECONDS, _timeout_error
+        ),
+    ):
+        yield
+
+
+def _pdf_syntax_error() -> type:
+    """
+    PDFSyntaxError do pdfminer, importado só quando há uma falha: o pacote
+    pdfminer lê os metadados da distribuição ao ser importado.
+    """
+    from pdfminer.pdfparser import PDFSyntaxError  # noqa: PLC0415
+
+    return PDFSyntaxError
+
+
+@contextmanager
+def _pdf_errors(file_path: Source) -> Iterator[None]:
+    """Converte as falhas de leitura de um PDF nas exceções do extrator."""
+    try:
+        yield
+    except GeneratorExit:
+        # Leitura interrompida pelo consumidor (páginas lidas sob demanda):
+        # não é uma falha, e as classes abaixo não precisam ser carregadas.
+        raise
+    except _pdf_syntax_error() as e:
+        raise ProcessingError(
+            f'Arquivo PDF corrompido ou com sintaxe inválida: {e}'
+        )
+    except pytesseract.TesseractNotFoundError:
+        raise ProcessingError(
+            'Tesseract OCR não instalado ou presente no PATH do sistema.'
+        )
+    except PermissionError:
+        raise ProcessingError(
+            f'Sem permissão para ler o arquivo: {describe_source(file_path)}'
+        )
+    except Exception as e:
+        if isinstance(e, ExtractorError):
+            raise
+        raise ProcessingError(f'Erro inesperado ao processar o PDF: {e}')
 
 
 class Reader:
     """Classe base para leitores de arquivo"""
 
     @staticmethod
-    def read(file_path: str) -> str:
+    def read(file_path: Source) -> str:
         raise NotImplementedError('O método read() deve ser implementado')
 
+    def iter_pages(self, file_path: Source) -> Iterator[str]:
+        """Por padrão, trata o documento inteiro como uma única página."""
+        yield self.read(file_path)
+
 
 class PDFReader(Reader):
     """Leitor para arquivos PDF usando pdfplumber"""
 
     @staticmethod
-    def read(file_path: str) -> str:
-        try:
-            if not Path(file_path).exists():
+    def read(file_path: Source) -> str:
+        return '\n'.join(PDFReader.iter_pages(file_path))
+
+    @staticmethod
+    def iter_pages(file_path: Source) -> Iterator[str]:
+        """
+        Entrega o texto do PDF uma página por vez.
+        A análise de layout roda uma única vez por página, e somente para as
+        páginas efetivamente consumidas pelo chamador.
+        Aceita um caminho, bytes ou um objeto de arquivo já aberto.
+        """
+        with _pdf_errors(file_path):
+            if is_path_source(file_path) and not Path(file_path).exists():
                 raise FileNotFoundError(f'Arquivo PDF não encontrado: {file_path}')
 
-            with pdfplumber.open(file_path) as pdf:
+            fast_pages = PDFReader._fast_text_pages(file_path)
+            if fast_pages is not None:
+                yield from fast_pages
+                return
+
+            with pdfplumber.open(_open_source(file_path)) as pdf:
                 if not pdf.pages:
                     raise ProcessingError('PDF não contém páginas válidas')
+                _check_page_count(len(pdf.pages))
 
-                full_text = '\n'.join(
-                    page.extract_text()
-                    for page in pdf.pages
-                    if page.extract_text()
-                )
+                has_text = False
+                for page_text in PDFReader._iter_page_texts(pdf):
+                    has_text = has_text or bool(page_text.strip())
+                    yield page_text
 
-                if not full_text.strip():
+                if not has_text:
                     raise ProcessingError('Não foi possível extrair texto do PDF')
 
-                return full_text
+    @staticmethod
+    def read_pages(file_path: Source, page_numbers: List[int]) -> List[str]:
+        """
+        Texto das páginas indicadas (numeradas a partir de 1), uma entrada
+        por página, mesmo vazia. As páginas digitalizadas são lidas por OCR
+        na própria thread: quem chama distribui os intervalos de páginas.
+        """
+        texts = []
+        with (
+            _pdf_errors(file_path),
+            pdfplumber.open(_open_source(file_path), pages=page_numbers) as pdf,
+        ):
+            for page in pdf.pages:
+                check_deadline()
+                try:
+                    page_text, image = PDFReader._scan_page(
+                        page, DEFAULT_CONFIG.PDF_OCR
+                    )
+                finally:
+                    page.close()
+                if image is not None:
+                    page_text = ImageReader.ocr(image)
+                texts.append(page_text or '')
+        return texts
 
-        except PDFSyntaxError as e:
-            raise ProcessingError(
-                f'Arquivo PDF corrompido ou com sintaxe inválida: {e}'
+    @staticmethod
+    def _iter_text_layer(file_path: Source) -> Iterator[str]:
+        """
+        Texto de cada página lido direto da camada de texto pelo pdfium (em
+        C), sem o modelo de caracteres e de layout do pdfplumber.
+        """
+        pdf = pdfium.PdfDocument(_open_source(file_path))
+        try:
+            _check_page_count(len(pdf))
+            for index in range(len(pdf)):
+                check_deadline()
+                page = pdf[index]
+                try:
+                    with metrics.timed('pdf_text'):
+                        text_page = page.get_textpage()
+                        text = text_page.get_text_bounded()
+                        text_page.close()
+                finally:
+                    page.close()
+                yield text.replace('\r\n', '\n')
+        finally:
+            pdf.close()
+
+    @staticmethod
+    def _read_until_prestador(pages: Iterator[str]) -> Optional[List[str]]:
+        """
+        Consome as páginas até a que contém a âncora de início de algum
+        layout. Devolve as páginas lidas, ou None se nenhuma âncora aparecer
+        ou o pdfium não conseguir ler o arquivo (o pdfplumber assume nesses
+        casos).
+        """
+        leading_pages = []
+        try:
+            for text in pages:
+                leading_pages.append(text)
+                if DEFAULT_CONFIG.layouts.match_start(text):
+                    return leading_pages
+        except (pdfium.PdfiumError, OSError):
+            return None
+        return None
+
+    @staticmethod
+    def _fast_text_pages(file_path: Source) -> Optional[Iterator[str]]:
+        """
+        Caminho rápido: páginas lidas pelo pdfium, se o documento tiver o
+        marcador do prestador na camada de texto. Caso contrário, devolve
+        None e reposiciona objetos de arquivo para a leitura pelo pdfplumber.
+        """
+        if not DEFAULT_CONFIG.PDF_FAST_PATH:
+            return None
+
+        position = _tell(file_path)
+        pages = PDFReader._iter_text_layer(file_path)
+        leading_pages = PDFReader._read_until_prestador(pages)
+        if leading_pages is None:
+            pages.close()
+            _seek(file_path, position)
+            return None
+        return PDFReader._chain_pages(leading_pages, pages)
+
+    @staticmethod
+    def _chain_pages(leading_pages: List[str], pages: Iterator[str]):
+        pages_read = 0
+        with closing(pages):
+            try:
+                for text in chain(leading_pages, pages):
+                    pages_read += 1
+                    yield text
+            finally:
+                metrics.observe_pages(pages_read)
+
+    @staticmethod
+    def _scan_page(page, rasterize: bool) -> Tuple[str, Optional[Image.Image]]:
+        """
+        Texto de uma página pela camada de texto e, se ela não tiver texto,
+        mas tiver imagens (digitalização), a página rasterizada para o OCR.
+        """
+        with metrics.timed('pdf_layout'):
+            page_text = page.extract_text()
+        if (page_text and page_text.strip()) or not rasterize:
+            return page_text, None
+        if not page.images:
+            return page_text, None
+
+        config = DEFAULT_CONFIG
+        scale = config.PDF_OCR_DPI / 72  # dimensões da página em pontos
+        _check_pixels(round(page.width * scale), round(page.height * scale))
+        with metrics.timed('pdf_raster'):
+            image = page.to_image(resolution=config.PDF_OCR_DPI).original
+        image.info['dpi'] = (config.PDF_OCR_DPI, config.PDF_OCR_DPI)
+        return page_text, image
+
+    @staticmethod
+    def _page_content(page, executor) -> Union[str, Future, None]:
+        """
+        Texto de uma página, ou o OCR agendado no executor para as páginas
+        digitalizadas; a página é liberada assim que deixa de ser necessária.
+        """
+        try:
+            page_text, image = PDFReader._scan_page(page, executor is not None)
+            if image is None:
+                return page_text
+            return executor.submit(
+                contextvars.copy_context().run, ImageReader.ocr, image
             )
-        except PermissionError:
-            raise ProcessingError(f'Sem permissão para ler o arquivo: {file_path}')
-        except Exception as e:
-            if isinstance(e, ExtractorError):
-                raise
-            raise ProcessingError(f'Erro inesperado ao processar o PDF: {e}')
+        finally:
+            page.close()
+
+    @staticmethod
+    def _iter_page_texts(pdf) -> Iterator[str]:
+        """
+        Entrega, em ordem, o texto de cada página com conteúdo. O OCR das
+        páginas digitalizadas roda em paralelo com a leitura das seguintes,
+        com no máximo `PDF_OCR_WORKERS` páginas em OCR ao mesmo tempo.
+        """
+        workers = DEFAULT_CONFIG.PDF_OCR_WORKERS or os.cpu_count() or 1
+        executor = None
+        if DEFAULT_CONFIG.PDF_OCR:
+            # As threads só são criadas se houver página a digitalizar.
+            executor = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+        in_flight = 0
+        pages_read = 0
+        try:
+            for page in pdf.pages:
+                check_deadline()
+                content = PDFReader._page_content(page, executor)
+                pages_read += 1
+                pending.append(content)
+                in_flight += isinstance(content, Future)
+
+                while pending and (
+                    not isinstance(pending[0], Future)
+                    or pending[0].done()
+                    or in_flight >= workers
+                ):
+                    content = pending.popleft()
+                    if isinstance(content, Future):
+                        in_flight -= 1
+                        content = content.result()
+                    if content:
+                        yield content
+
+            while pending:
+                content = pending.popleft()
+                if isinstance(content, Future):
+                    content = content.result()
+                if content:
+                    yield content
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            metrics.observe_pages(pages_read)
 
 
 class ImageReader(Reader):
     """Leitor para arquivos de imagem usando Tesseract OCR"""
 
     @staticmethod
-    def read(file_path: str) -> str:
+    def read(file_path: Source) -> str:
         try:
-            if not Path(file_path).exists():
+            if is_path_source(file_path) and not Path(file_path).exists():
                 raise FileNotFoundError(
                     f'Arquivo de imagem não encontrado: {file_path}'
                 )
 
-            image = Image.open(file_path)
-            image.verify()
-            image = Image.open(file_path)
-
-            extracted_text = pytesseract.image_to_string(
-                image, lang=ExtractorConfig.OCR_LANG
-            )
+            image = ImageReader._load(file_path)
+            extracted_text = ImageReader.ocr(image)
 
             if not extracted_text.strip():
                 raise ProcessingError('Não foi possível extrair texto da imagem')
@@ -114,57 +554,186 @@ class ImageReader(Reader):
                 'Tesseract OCR não instalado ou presente no PATH do sistema.'
             )
         except PermissionError:
-            raise ProcessingError(f'Sem permissão para ler o arquivo: {file_path}')
+            raise ProcessingError(
+                f'Sem permissão para ler o arquivo: {describe_source(file_path)}'
+            )
+        except Image.DecompressionBombError as e:
+            raise ImageTooLargeError(str(e))
         except Exception as e:
             if isinstance(e, ExtractorError):
                 raise
+            if limits.expired():
+                # O Tesseract foi encerrado ao esgotar o prazo.
+                raise _timeout_error()
             raise ProcessingError(
                 f'Arquivo não é uma imagem válida ou ocorreu um erro no OCR: {e}'
             )
 
+    @staticmethod
+    def _load(file_path: Source) -> Image.Image:
+        """
+        Abre a imagem e confere o número de pixels pelo cabeçalho, antes de
+        decodificá-la.
+        """
+        with metrics.timed('image_load'):
+            image = Image.open(_open_source(file_path))
+            try:
+                _check_pixels(image.width, image.height)
+            except ImageTooLargeError:
+                image.close()
+                raise
+            image.load()
+        metrics.observe_pixels(image.width * image.height)
+        return image
+
+    @staticmethod
+    def ocr(image: Image.Image) -> str:
+        """
+        Pré-processa e executa o OCR de uma imagem já carregada. Compartilhado
+        com o PDFReader, para as páginas digitalizadas.
+        """
+        with metrics.timed('preprocess'):
+            image = preprocess_image(image, DEFAULT_CONFIG)
+
+        with metrics.timed('ocr'):
+            return ocr_image(image, DEFAULT_CONFIG)
+
 
 class NFSeExtractor:
     """Extrator de dados de NFSe a partir de uma string de texto"""
 
     def __init__(self, config: ExtractorConfig = None):
-        self.config = config or ExtractorConfig()
+        self.config = config or DEFAULT_CONFIG
 
     def extract_from_text(self, text: str) -> Dict[str, Optional[str]]:
         """
         Extrai CNPJ e Razão Social do texto da NFSe.
         Este é o método público principal da classe.
+        O layout é identificado pelo primeiro marcador de início encontrado.
         """
-        prestador_section = self._isolate_prestador_section(text)
-
-        return {
-            'cnpj_prestador': self._extract_cnpj(prestador_section),
-            'nome_prestador': self._extract_razao_social(prestador_section),
-        }
-
-    def _isolate_prestador_section(self, text: str) -> str:
-        """Isola a seção do prestador para uma busca mais precisa."""
-        start_match = re.search(self.config.PRESTADOR_START, text, re.IGNORECASE)
-        if not start_match:
-            return text
-
-        text_after_start = text[start_match.end() :]
-        end_match = re.search(
-            self.config.PRESTADOR_END, text_after_start, re.IGNORECASE
-        )
-
-        if end_match:
-            return text_after_start[: end_match.start()]
-
-        return text_after_start
+        with metrics.timed('regex'):
+            layout, start, end = self._find_section(text)
+
+            return {
+                'cnpj_prestador': self._extract_cnpj(text, start, end, layout),
+                'nome_prestador': self._extract_razao_social(
+                    text, start, end, layout
+                ),
+            }
+
+    def extract_columns(
+        self, texts: Iterable[str]
+    ) -> Dict[str, List[Optional[str]]]:
+        """Extrai de vários textos, com os resultados organizados em colunas."""
+        columns = {'cnpj_prestador': [], 'nome_prestador': []}
+        for text in texts:
+            for field, value in self.extract_from_text(text).items():
+                columns[field].append(value)
+        return columns
+
+    def extract_many(
+        self, texts: Iterable[str], batch_size: int = 1000
+    ) -> Iterator[Dict[str, List[Optional[str]]]]:
+        """
+        Extrai de um fluxo de textos já lidos (sem PDF nem OCR), entregando
+        lotes colunares de até `batch_size` itens. Apenas um lote fica em
+        memória por vez, qualquer que seja o tamanho do fluxo.
+        """
+        texts = iter(texts)
+        while batch := list(islice(texts, batch_size)):
+            yield self.extract_columns(batch)
 
-    def _extract_cnpj(self, text: str) -> Optional[str]:
-        """Extrai o primeiro CNPJ encontrado no texto fornecido."""
-        match = re.search(self.config.CNPJ_PRESTADOR, text)
+    def extract_from_chunks(
+        self, chunks: Iterable[str]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Extrai CNPJ e Razão Social a partir do texto entregue em partes
+        (páginas ou blocos de OCR), unidas por quebra de linha.
+        Deixa de consumir as partes assim que a seção do prestador termina
+        ou que os dois campos são encontrados dentro dela. Cada parte é
+        buscada uma vez, junto com a anterior (para os trechos que cruzam a
+        divisa), e os campos já encontrados são mantidos: o custo é linear
+        no tamanho do texto, mesmo sem o fim da seção.
+        """
+        consumed = []
+        layout = None
+        found = {'cnpj_prestador': None, 'nome_prestador': None}
+        carried = 0
+        for chunk in chunks:
+            previous = consumed[-1] if consumed else None
+            consumed.append(chunk)
+            if previous is None:
+                window, offset = chunk, 0
+            else:
+                window, offset = f'{previous}\n{chunk}', len(previous) + 1
+
+            with metrics.timed('regex'):
+                if layout is None:
+                    detected = self.config.layouts.match_start(chunk)
+                    if not detected:
+                        continue
+                    layout, start_match = detected
+                    start = offset + start_match.end()
+                    carried = start_match.end()
+                else:
+                    start, carried = carried, 0
+
+                end_match = layout.prestador_end_pattern.search(window, start)
+                end = end_match.start() if end_match else len(window)
+                if found['cnpj_prestador'] is None:
+                    found['cnpj_prestador'] = self._extract_cnpj(
+                        window, start, end, layout
+                    )
+                if found['nome_prestador'] is None:
+                    found['nome_prestador'] = self._extract_razao_social(
+                        window, start, end, layout
+                    )
+            if end_match or all(found.values()):
+                return found
+
+        if layout is None:
+            return self.extract_from_text('\n'.join(consumed))
+        return found
+
+    def _find_section(self, text: str) -> Tuple[Layout, int, int]:
+        """
+        Identifica o layout e localiza a seção do prestador por posição, sem
+        copiar o texto. Sem marcador de início, usa o layout padrão e a seção
+        é o documento inteiro.
+        """
+        detected = self.config.layouts.match_start(text)
+        if not detected:
+            return self.config.layouts.default, 0, len(text)
+
+        layout, start_match = detected
+        start = start_match.end()
+        end_match = layout.prestador_end_pattern.search(text, start)
+        return layout, start, end_match.start() if end_match else len(text)
+
+    def _extract_cnpj(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        layout: Optional[Layout] = None,
+    ) -> Optional[str]:
+        """Extrai o primeiro CNPJ encontrado no trecho [start, end) do texto."""
+        end = len(text) if end is None else end
+        layout = layout or self.config.layouts.default
+        match = layout.cnpj_pattern.search(text, start, end)
         return match.group(0) if match else None
 
-    def _extract_razao_social(self, text: str) -> Optional[str]:
-        """Extrai a Razão Social do texto fornecido."""
-        match = re.search(self.config.RAZAO_SOCIAL_PRESTADOR, text)
+    def _extract_razao_social(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        layout: Optional[Layout] = None,
+    ) -> Optional[str]:
+        """Extrai a Razão Social do trecho [start, end) do texto."""
+        end = len(text) if end is None else end
+        layout = layout or self.config.layouts.default
+        match = layout.razao_social_pattern.search(text, start, end)
         return match.group(1).strip() if match else None
 
 
@@ -179,17 +748,53 @@ def get_reader(file_type: str) -> Reader:
     raise UnsupportedFileTypeError(f'Tipo de arquivo não suportado: {file_type}')
 
 
-def extract_nfse_data(
-    file_path_str: str, file_type: str
-) -> Dict[str, Optional[str]]:
+def detect_file_type(file_name: str) -> str:
+    """Determina o tipo de arquivo ('pdf' ou 'image') a partir da extensão."""
+    file_extension = Path(file_name).suffix.lower().lstrip('.')
+
+    if file_extension == 'pdf':
+        return 'pdf'
+    if file_extension in ExtractorConfig.IMAGE_EXTENSIONS:
+        return 'image'
+    raise UnsupportedFileTypeError(
+        f"Extensão de arquivo não suportada: '{file_extension}'"
+    )
+
+
+def extract_nfse_data(source: Source, file_type: str) -> Dict[str, Optional[str]]:
     """
     Orquestra o processo de extração de dados de um arquivo NFSe.
+    A origem pode ser um caminho, bytes ou um objeto de arquivo (por
+    exemplo, um upload do Django), sem necessidade de arquivo temporário.
+    Os limites `MAX_*` da configuração são aplicados: o tamanho antes da
+    leitura, e o prazo e a CPU durante toda a extração.
     """
-    file_path = Path(file_path_str)
-    if not file_path.exists():
-        raise FileNotFoundError(f'Arquivo não encontrado: {file_path_str}')
-
-    reader = get_reader(file_type)
-    raw_text = reader.read(str(file_path))
-    data_extractor = NFSeExtractor()
-    return data_extractor.extract_from_text(raw_text)
+    if is_path_source(source):
+        if not Path(source).exists():
+            raise FileNotFoundError(f'Arquivo não encontrado: {source}')
+        source = os.fspath(source)
+
+    size = _source_size(source)
+    if metrics.is_enabled():
+        metrics.observe_bytes(size)
+
+    try:
+        check_file_size(size, source)
+        with metrics.timed('total'), _time_budget():
+            reader = get_reader(file_type)
+            with closing(reader.iter_pages(source)) as pages:
+                return NFSeExtractor().extract_from_chunks(pages)
+    except ExtractorError as e:
+        metrics.count_error(e)
+        raise
+
+
+def _source_size(source: Source) -> Optional[int]:
+    """Tamanho em bytes da origem, quando conhecido sem lê-la."""
+    if is_path_source(source):
+        return os.path.getsize(source)
+    if isinstance(source, memoryview):
+        return source.nbytes
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    return getattr(source, 'size', None)
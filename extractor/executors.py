@@ -0,0 +1,42 @@
+"""
+Pools de execução (processos ou threads) das extrações em segundo plano.
+
+Se um worker de um pool de processos morre (falta de memória, falha no
+código nativo), o pool inteiro quebra: as tarefas pendentes falham com
+BrokenProcessPool e novas submissões são recusadas. `submit_rebuilding`
+recria o pool nesse caso. Este módulo não depende do Django, para que a
+CLI também o use.
+"""
+
+import threading
+from concurrent.futures import (
+    BrokenExecutor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable
+
+EXECUTORS = {
+    'process': ProcessPoolExecutor,
+    'thread': ThreadPoolExecutor,
+}
+
+_rebuild_lock = threading.Lock()
+
+
+def submit_rebuilding(get_executor: Callable, *args) -> Future:
+    """
+    Submete a tarefa ao executor de `get_executor` (uma função com
+    functools.cache). Se o pool quebrou, porque um worker morreu
+    (BrokenExecutor), ele é recriado e a tarefa, submetida de novo.
+    """
+    executor = get_executor()
+    try:
+        return executor.submit(*args)
+    except BrokenExecutor:
+        with _rebuild_lock:
+            if get_executor() is executor:
+                get_executor.cache_clear()
+                executor.shutdown(wait=False)
+        return get_executor().submit(*args)
@@ -0,0 +1,254 @@
+"""
+Extração de documentos com várias NFSe.
+
+Fornecedores costumam enviar um único PDF com todas as notas do mês. O
+documento é dividido em notas pelas âncoras de início do prestador (uma
+nova nota começa na página em que a âncora reaparece) ou a cada
+`pages_per_invoice` páginas, e cada nota vira um registro com o seu
+intervalo de páginas, entregue assim que a nota termina.
+
+A camada de texto de todas as páginas é lida de uma vez pelo pdfium, em
+poucos milissegundos. Só as páginas sem texto (digitalizadas) exigem o
+trabalho pesado: elas são agrupadas em intervalos contíguos, distribuídos
+entre processos que os leem por OCR.
+
+Os limites da configuração valem para o documento inteiro, como em
+`extract_nfse_data`: o tamanho antes da leitura e o prazo e a CPU até a
+última nota, inclusive nos processos que fazem o OCR, que recebem o prazo
+restante a cada intervalo.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import limits, metrics
+from .data_extractor import (
+    DEFAULT_CONFIG,
+    ExtractorConfig,
+    ExtractorError,
+    FileNotFoundError,
+    NFSeExtractor,
+    PDFReader,
+    ProcessingError,
+    Source,
+    _check_page_count,
+    _open_source,
+    _pdf_errors,
+    _source_size,
+    _time_budget,
+    check_file_size,
+    extract_nfse_data,
+    is_path_source,
+    pdfium,
+    pdfplumber,
+)
+
+PAGES_PER_TASK = 4
+PENDING_PER_WORKER = 2
+
+Page = Tuple[int, str]
+
+
+def _page_ranges(page_numbers: List[int], size: int) -> List[List[int]]:
+    """Agrupa números de página em intervalos contíguos de até `size`."""
+    ranges = []
+    for number in page_numbers:
+        current = ranges[-1] if ranges else None
+        if current and current[-1] == number - 1 and len(current) < size:
+            current.append(number)
+        else:
+            ranges.append([number])
+    return ranges
+
+
+def _text_layer(source: Source) -> Optional[List[str]]:
+    """Camada de texto de todas as páginas, ou None se o pdfium falhar."""
+    if not DEFAULT_CONFIG.PDF_FAST_PATH:
+        return None
+    try:
+        return list(PDFReader._iter_text_layer(source))
+    except (pdfium.PdfiumError, OSError):
+        return None
+
+
+def _count_pages(source: Source) -> int:
+    with _pdf_errors(source), pdfplumber.open(_open_source(source)) as pdf:
+        if not pdf.pages:
+            raise ProcessingError('PDF não contém páginas válidas')
+        _check_page_count(len(pdf.pages))
+        return len(pdf.pages)
+
+
+def _read_pages(
+    source: Source, page_numbers: List[int], seconds: Optional[float]
+) -> List[str]:
+    """`PDFReader.read_pages` em um worker, com o prazo restante da extração."""
+    with limits.deadline(seconds):
+        return PDFReader.read_pages(source, page_numbers)
+
+
+def iter_pages(source: Source, workers: Optional[int] = None) -> Iterator[Page]:
+    """
+    Entrega, em ordem, (número, texto) de cada página do PDF. As páginas
+    sem camada de texto são lidas pelo pdfplumber, com OCR das
+    digitalizadas, em intervalos de até `PAGES_PER_TASK` páginas
+    distribuídos entre `workers` processos (padrão: núcleos da CPU).
+    """
+    texts = _text_layer(source)
+    if texts is None:
+        texts = [''] * _count_pages(source)
+        pending_pages = list(range(1, len(texts) + 1))
+    elif DEFAULT_CONFIG.PDF_OCR:
+        pending_pages = [
+            number
+            for number, text in enumerate(texts, start=1)
+            if not text.strip()
+        ]
+    else:
+        pending_pages = []
+    metrics.observe_pages(len(texts))
+
+    ranges = _page_ranges(pending_pages, PAGES_PER_TASK)
+    workers = min(workers or os.cpu_count() or 1, len(ranges))
+    if workers <= 1:
+        # Um único processo: lê os intervalos aqui, sem o custo do pool.
+        for page_numbers in ranges:
+            for number, text in zip(
+                page_numbers, PDFReader.read_pages(source, page_numbers)
+            ):
+                texts[number - 1] = text
+        yield from _with_text_check(enumerate(texts, start=1))
+        return
+
+    yield from _with_text_check(_read_in_workers(source, texts, ranges, workers))
+
+
+def _read_in_workers(
+    source: Source, texts: List[str], ranges: List[List[int]], workers: int
+) -> Iterator[Page]:
+    """
+    Lê os intervalos em processos, mantendo no máximo `PENDING_PER_WORKER`
+    intervalos por processo em andamento, e entrega as páginas em ordem
+    assim que o intervalo de cada uma fica pronto.
+    """
+    pending_ranges = iter(ranges)
+    pending = deque()
+    read = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def submit_next():
+            while len(pending) < workers * PENDING_PER_WORKER:
+                page_numbers = next(pending_ranges, None)
+                if page_numbers is None:
+                    return
+                future = executor.submit(
+                    _read_pages, source, page_numbers, limits.remaining()
+                )
+                pending.append((page_numbers, future))
+
+        submit_next()
+        try:
+            for number, text in enumerate(texts, start=1):
+                while pending and number >= pending[0][0][0]:
+                    page_numbers, future = pending.popleft()
+                    read.update(zip(page_numbers, future.result()))
+                    submit_next()
+                yield number, read.pop(number, text)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def _with_text_check(pages: Iterable[Page]) -> Iterator[Page]:
+    has_text = False
+    for number, text in pages:
+        has_text = has_text or bool(text.strip())
+        yield number, text
+    if not has_text:
+        raise ProcessingError('Não foi possível extrair texto do PDF')
+
+
+def split_invoices(
+    pages: Iterable[Page],
+    pages_per_invoice: Optional[int] = None,
+    config: ExtractorConfig = DEFAULT_CONFIG,
+) -> Iterator[Tuple[int, int, str]]:
+    """
+    Agrupa as páginas em notas e entrega (primeira página, última página,
+    texto) de cada uma assim que a seguinte começa. Com `pages_per_invoice`,
+    as notas têm tamanho fixo; caso contrário, uma nota começa em cada
+    página com uma âncora de início, e páginas anteriores à primeira âncora
+    pertencem à primeira nota.
+    """
+    numbers = []
+    texts = []
+    has_start = False
+    for number, text in pages:
+        if pages_per_invoice:
+            starts_invoice = len(numbers) >= pages_per_invoice
+        else:
+            page_has_start = bool(config.layouts.match_start(text))
+            starts_invoice = page_has_start and has_start
+            has_start = has_start or page_has_start
+
+        if starts_invoice:
+            yield numbers[0], numbers[-1], '\n'.join(texts)
+            numbers, texts = [], []
+        numbers.append(number)
+        texts.append(text)
+
+    if numbers:
+        yield numbers[0], numbers[-1], '\n'.join(texts)
+
+
+def extract_invoices(
+    source: Source,
+    file_type: str = 'pdf',
+    workers: Optional[int] = None,
+    pages_per_invoice: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Extrai CNPJ e Razão Social de cada NFSe de um documento, entregando um
+    registro por nota, com as chaves 'first_page' e 'last_page', à medida
+    que as notas são lidas. Uma imagem é sempre uma nota de uma página.
+    O prazo e o orçamento de CPU valem do início até a última nota,
+    incluindo o tempo entre as notas entregues.
+    """
+    if is_path_source(source):
+        if not Path(source).exists():
+            raise FileNotFoundError(f'Arquivo não encontrado: {source}')
+        source = os.fspath(source)
+    elif isinstance(source, (bytearray, memoryview)):
+        source = bytes(source)
+    elif not isinstance(source, bytes):
+        # Os processos recebem o conteúdo: objetos de arquivo não são
+        # serializáveis.
+        source = source.read()
+
+    if file_type.lower() != 'pdf':
+        yield {
+            'first_page': 1,
+            'last_page': 1,
+            **extract_nfse_data(source, file_type),
+        }
+        return
+
+    extractor = NFSeExtractor()
+    try:
+        check_file_size(_source_size(source), source)
+        with _time_budget():
+            invoices = split_invoices(
+                iter_pages(source, workers), pages_per_invoice
+            )
+            for first_page, last_page, text in invoices:
+                yield {
+                    'first_page': first_page,
+                    'last_page': last_page,
+                    **extractor.extract_from_text(text),
+                }
+    except ExtractorError as e:
+        metrics.count_error(e)
+        raise
@@ -0,0 +1,182 @@
+import functools
+import os
+import socket
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import metrics
+from .cache import get_default_cache
+from .data_extractor import ExtractorError, extract_nfse_data
+from .executors import EXECUTORS, submit_rebuilding
+from .models import ExtractionJob
+
+INTERRUPTED_ERROR = 'Tarefa interrompida: o processo do servidor foi encerrado'
+
+# Distingue execuções do mesmo pid (comum em contêineres reiniciados)
+_INSTANCE = uuid.uuid4().hex[:12]
+
+
+def worker_id() -> str:
+    """Identidade do processo atual, gravada nas tarefas que ele executa."""
+    return f'{socket.gethostname()}:{os.getpid()}:{_INSTANCE}'
+
+
+def _process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_orphaned(worker: str) -> bool:
+    """
+    Indica se o processo de uma tarefa pendente deixou de existir: tarefas
+    sem processo registrado, do pid atual em uma execução anterior ou de um
+    pid que não existe mais nesta máquina. Sobre outras máquinas (ou fora
+    de POSIX), nada se conclui.
+    """
+    if not worker:
+        return True
+    host, pid, instance = worker.rsplit(':', 2)
+    if host != socket.gethostname() or os.name != 'posix':
+        return False
+    if int(pid) == os.getpid():
+        return instance != _INSTANCE
+    return not _process_exists(int(pid))
+
+
+def fail_orphaned_jobs() -> int:
+    """
+    Marca como falhas as tarefas pendentes cujo processo foi encerrado
+    (reinício ou queda do servidor): sem isso, ficariam pendentes para
+    sempre. Devolve quantas foram marcadas.
+    """
+    pending = ExtractionJob.objects.filter(
+        status=ExtractionJob.Status.PENDING
+    ).values_list('pk', 'worker')
+    orphaned = [pk for pk, worker in pending if is_orphaned(worker)]
+    return ExtractionJob.objects.filter(
+        pk__in=orphaned, status=ExtractionJob.Status.PENDING
+    ).update(
+        status=ExtractionJob.Status.FAILED,
+        error=INTERRUPTED_ERROR,
+        updated_at=timezone.now(),
+    )
+
+
+def fail_if_orphaned(job: ExtractionJob) -> ExtractionJob:
+    """Marca a tarefa como falha se ela estiver pendente sem processo."""
+    if job.status == ExtractionJob.Status.PENDING and is_orphaned(job.worker):
+        JobQueue._finish(job, error=INTERRUPTED_ERROR)
+    return job
+
+
+class QueueFullError(Exception):
+    """A fila de tarefas atingiu o limite de pendências"""
+
+    pass
+
+
+class JobQueue:
+    """
+    Fila local de tarefas de extração, com estado persistido em
+    `ExtractionJob`. O número de tarefas pendentes é limitado: ao atingir o
+    limite, `submit` falha imediatamente em vez de acumular uploads na
+    memória. Um pool quebrado é recriado no próximo `submit`.
+    """
+
+    def __init__(self, workers=2, max_pending=32, executor='process'):
+        self.max_pending = max_pending
+        self.worker = worker_id()
+        self._executor = functools.cache(
+            functools.partial(EXECUTORS[executor], max_workers=workers)
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, file_name, file_type, content):
+        """
+        Registra a tarefa e agenda a extração, sem esperar o resultado.
+        Conteúdo já presente no cache é resolvido na hora, sem ocupar vaga.
+        """
+        cache = get_default_cache()
+        key = cache.key_for(content, file_type)
+        cached_result = cache.get(key)
+        if cached_result is not None:
+            return ExtractionJob.objects.create(
+                file_name=file_name,
+                file_type=file_type,
+                status=ExtractionJob.Status.DONE,
+                result=cached_result,
+            )
+
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError('Fila de processamento cheia')
+
+        try:
+            job = ExtractionJob.objects.create(
+                file_name=file_name, file_type=file_type, worker=self.worker
+            )
+            future = submit_rebuilding(
+                self._executor,
+                metrics.call_recorded,
+                extract_nfse_data,
+                content,
+                file_type,
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(functools.partial(self._on_done, job.pk, key))
+        return job
+
+    def _on_done(self, job_id, key, future):
+        try:
+            job = ExtractionJob.objects.get(pk=job_id)
+            try:
+                result = metrics.replay(future.result())
+            except ExtractorError as e:
+                self._finish(job, error=str(e))
+            except Exception as e:
+                self._finish(job, error=f'Erro interno: {e}')
+            else:
+                get_default_cache().set(key, result)
+                self._finish(job, result=result)
+        finally:
+            self._slots.release()
+            close_old_connections()
+
+    @staticmethod
+    def _finish(job, result=None, error=None):
+        job.status = (
+            ExtractionJob.Status.FAILED if error else ExtractionJob.Status.DONE
+        )
+        job.result = result
+        job.error = error or ''
+        job.save(update_fields=['status', 'result', 'error', 'updated_at'])
+
+    def shutdown(self, wait=True):
+        self._executor().shutdown(wait=wait)
+
+
+@functools.cache
+def get_job_queue() -> JobQueue:
+    """
+    Fila da aplicação web, configurada por `settings.NFSE_JOBS`. Ao ser
+    criada, marca como falhas as tarefas órfãs de execuções anteriores.
+    """
+    options = getattr(settings, 'NFSE_JOBS', {})
+    queue = JobQueue(
+        workers=options.get('WORKERS', 2),
+        max_pending=options.get('MAX_PENDING', 32),
+        executor=options.get('EXECUTOR', 'process'),
+    )
+    fail_orphaned_jobs()
+    return queue
@@ -0,0 +1,180 @@
+"""
+Registro de layouts de NFSe.
+
+Cada município tem seus próprios cabeçalhos e rótulos. Um layout descreve
+as âncoras que abrem a seção do prestador, o marcador que a encerra e os
+padrões dos campos. As âncoras literais de todos os layouts são reunidas em
+uma única expressão em forma de trie (prefixos comuns fatorados), de modo
+que identificar o layout custa uma só busca no texto e cresce pouco com o
+número de layouts. Âncoras que precisam de contexto (um cabeçalho sozinho
+na linha, por exemplo) são expressões regulares, buscadas uma a uma, cada
+uma com as suas próprias flags.
+"""
+
+import re
+from functools import cached_property
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+LAYOUT_FLAGS = re.IGNORECASE
+
+Anchor = Union[str, re.Pattern]
+
+
+class LayoutTemplate(NamedTuple):
+    """
+    Um layout: `prestador_start` é uma âncora (ou uma tupla de
+    alternativas). Um texto é literal, comparado sem distinguir maiúsculas
+    e com qualquer espaçamento; uma expressão compilada (`re.compile`) é
+    usada com as suas flags (inclusive as embutidas, como `(?m)`), mais
+    IGNORECASE. Os demais campos são expressões regulares; os marcadores de
+    fim também são comparados sem distinguir maiúsculas.
+    """
+
+    name: str
+    prestador_start: Union[Anchor, Tuple[Anchor, ...]]
+    prestador_end: str
+    razao_social: str
+    cnpj: Optional[str] = None  # padrão: CNPJ_PRESTADOR da configuração
+
+
+# Layouts de outros formatos conhecidos, além do padrão de ExtractorConfig.
+BUILTIN_LAYOUTS = (
+    LayoutTemplate(
+        name='sao_paulo',
+        # Só o cabeçalho sozinho na linha: "Prestador de Serviços" aparece
+        # em rótulos de outros layouts (ex.: "Código do Prestador de Serviços")
+        prestador_start=re.compile(
+            r'^[^\S\n]*PRESTADOR DE SERVI[ÇC]OS[^\S\n]*$', re.MULTILINE
+        ),
+        prestador_end=r'(?m)^\s*TOMADOR DE SERVI[ÇC]OS\s*$',
+        razao_social=r'Nome\s*/\s*Raz[ãa]o Social:\s*(.+?)(?:\n|$)',
+    ),
+    LayoutTemplate(
+        name='nacional',
+        prestador_start='EMITENTE DA NFS-e',
+        prestador_end=r'(?m)^\s*TOMADOR DO SERVI[ÇC]O',
+        razao_social=r'Nome\s*/\s*Nome Empresarial:?\s*(.+?)(?:\n|$)',
+    ),
+)
+
+
+def _anchor_key(text: str) -> str:
+    """Forma normalizada de uma âncora: minúsculas e espaços simples."""
+    return ' '.join(text.split()).lower()
+
+
+def _trie_pattern(keys: Iterable[str]) -> str:
+    """
+    Expressão que reconhece qualquer uma das chaves, com os prefixos comuns
+    fatorados: em cada posição do texto, no máximo um ramo avança por
+    caractere. Espaços aceitam qualquer sequência de espaços em branco.
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        is_end = '' in node
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if is_end else body
+
+    return build(trie)
+
+
+class Layout:
+    """Layout com os padrões já compilados, usado pelo NFSeExtractor."""
+
+    def __init__(self, template: LayoutTemplate, default_cnpj: str):
+        self.name = template.name
+        anchors = template.prestador_start
+        self.anchors = tuple(anchors) if isinstance(anchors, tuple) else (anchors,)
+        self.prestador_end_pattern = re.compile(
+            template.prestador_end, LAYOUT_FLAGS
+        )
+        self.razao_social_pattern = re.compile(template.razao_social)
+        self.cnpj_pattern = re.compile(template.cnpj or default_cnpj)
+
+
+class LayoutRegistry:
+    """
+    Layouts em ordem de prioridade; o primeiro é o padrão, usado quando
+    nenhuma âncora aparece no texto. Uma âncora repetida pertence ao
+    primeiro layout que a declara.
+    """
+
+    def __init__(self, templates: Iterable[LayoutTemplate], default_cnpj: str):
+        self.layouts = tuple(
+            Layout(template, default_cnpj) for template in templates
+        )
+        names = [layout.name for layout in self.layouts]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Nomes de layout repetidos: {names}')
+        self.default = self.layouts[0]
+
+        self._by_anchor = {}
+        self._regex_anchors = []
+        for layout in self.layouts:
+            for anchor in layout.anchors:
+                if isinstance(anchor, re.Pattern):
+                    pattern = re.compile(
+                        anchor.pattern, anchor.flags | LAYOUT_FLAGS
+                    )
+                    self._regex_anchors.append((pattern, layout))
+                else:
+                    self._by_anchor.setdefault(_anchor_key(anchor), layout)
+        self._priority = {layout.name: i for i, layout in enumerate(self.layouts)}
+
+    @cached_property
+    def start_pattern(self) -> Optional[re.Pattern]:
+        """Trie das âncoras literais de início de todos os layouts."""
+        if not self._by_anchor:
+            return None
+        return re.compile(_trie_pattern(self._by_anchor), LAYOUT_FLAGS)
+
+    def match_start(
+        self, text: str, pos: int = 0
+    ) -> Optional[Tuple[Layout, re.Match]]:
+        """
+        Primeira âncora de início no texto, com o layout a que pertence. As
+        âncoras literais são buscadas de uma vez, na trie, e as expressões
+        regulares, uma a uma. Se duas âncoras começam na mesma posição, vale
+        a mais longa; com o mesmo tamanho, a do layout de maior prioridade.
+        """
+        candidates = []
+        if self.start_pattern is not None:
+            match = self.start_pattern.search(text, pos)
+            if match:
+                layout = self._by_anchor[_anchor_key(match.group(0))]
+                candidates.append((layout, match))
+        for pattern, layout in self._regex_anchors:
+            match = pattern.search(text, pos)
+            if match:
+                candidates.append((layout, match))
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda candidate: (
+                candidate[1].start(),
+                -candidate[1].end(),
+                self._priority[candidate[0].name],
+            ),
+        )
+
+    def get(self, name: str) -> Layout:
+        for layout in self.layouts:
+            if layout.name == name:
+                return layout
+        raise KeyError(name)
@@ -0,0 +1,34 @@
+"""
+Importação preguiçosa das dependências pesadas (pdfplumber, pypdfium2,
+pytesseract e Pillow).
+
+Importar esses pacotes custa dezenas de milissegundos, e uma execução da
+CLI costuma usar só um dos leitores (ou nenhum, como em `--help`). Com
+`lazy_import`, o módulo é registrado na hora, mas só é executado no
+primeiro acesso a um atributo (`importlib.util.LazyLoader`).
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Módulo `name`, carregado no primeiro uso. Se já estiver importado, é
+    devolvido diretamente. Levanta ModuleNotFoundError, como `import`, se o
+    pacote não estiver instalado (o pacote pai de um submódulo é importado
+    na hora).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
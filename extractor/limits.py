@@ -0,0 +1,81 @@
+"""
+Orçamentos de tempo da extração de um documento.
+
+O prazo (tempo de relógio) vale para a extração inteira: é verificado entre
+as páginas e repassado ao Tesseract, que encerra o processo `tesseract` ao
+esgotá-lo. O orçamento de CPU usa um temporizador do sistema (SIGPROF) e
+interrompe a extração mesmo no meio de uma página, mas só pode ser armado
+na thread principal: na CLI e nos workers de processo (lote, pasta
+monitorada); nas threads do servidor, vale apenas o prazo.
+"""
+
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Define o prazo da extração dentro do bloco. Um prazo já em vigor mais
+    curto prevalece; com `seconds` None, nada muda.
+    """
+    if seconds is None:
+        yield
+        return
+    limit = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(limit if current is None else min(limit, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos até o fim do prazo (negativo se vencido), ou None sem prazo."""
+    limit = _deadline.get()
+    return None if limit is None else limit - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def _can_use_cpu_timer() -> bool:
+    return hasattr(signal, 'setitimer') and (
+        threading.current_thread() is threading.main_thread()
+    )
+
+
+@contextmanager
+def cpu_budget(
+    seconds: Optional[float], exceeded: Callable[[], Exception]
+) -> Iterator[None]:
+    """
+    Levanta a exceção criada por `exceeded` se o processo consumir mais
+    que `seconds` de CPU dentro do bloco. Fora da thread principal (ou sem
+    `setitimer`), não faz nada.
+    """
+    if seconds is None or not _can_use_cpu_timer():
+        yield
+        return
+
+    def on_timer(signum, frame):
+        raise exceeded()
+
+    previous_handler = signal.signal(signal.SIGPROF, on_timer)
+    previous_timer = signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous_handler)
+        if previous_timer[0]:
+            signal.setitimer(signal.ITIMER_PROF, *previous_timer)
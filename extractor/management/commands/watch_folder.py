@@ -0,0 +1,149 @@
+import functools
+import os
+import signal
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from extractor.batch import PENDING_PER_WORKER
+from extractor.executors import EXECUTORS
+from extractor.storage import parse_competencia
+from extractor.watch import (
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_SETTLE,
+    FolderIngestor,
+    build_watcher,
+    warm_worker,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Monitora pastas e extrai as NFSe que chegam, gravando os resultados '
+        'no banco. Arquivos já processados (mesmo caminho, mtime e tamanho) '
+        'não são extraídos de novo após um reinício.'
+    )
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        parser.add_argument('directories', nargs='+', help='Pastas monitoradas')
+        parser.add_argument(
+            '--competencia',
+            help='Mês de competência (AAAA-MM ou MM/AAAA); padrão: mês corrente',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processos de extração (padrão: número de núcleos)',
+        )
+        parser.add_argument(
+            '--executor',
+            choices=sorted(EXECUTORS),
+            default='process',
+            help='Executor da extração (padrão: process)',
+        )
+        parser.add_argument(
+            '--settle',
+            type=float,
+            default=DEFAULT_SETTLE,
+            help=(
+                'Segundos sem mudanças antes de ler um arquivo '
+                f'(padrão: {DEFAULT_SETTLE:g})'
+            ),
+        )
+        parser.add_argument(
+            '--polling',
+            action='store_true',
+            help='Varre as pastas periodicamente em vez de usar o inotify',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=DEFAULT_POLL_INTERVAL,
+            help=(
+                'Intervalo entre varreduras, em segundos '
+                f'(padrão: {DEFAULT_POLL_INTERVAL:g})'
+            ),
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Processa o conteúdo atual das pastas e termina',
+        )
+
+    def handle(self, *args, **options):
+        directories = [Path(directory) for directory in options['directories']]
+        for directory in directories:
+            if not directory.is_dir():
+                raise CommandError(f'Pasta não encontrada: {directory}')
+
+        competencia = None
+        if options['competencia']:
+            try:
+                competencia = parse_competencia(options['competencia'])
+            except ValueError as e:
+                raise CommandError(e)
+
+        workers = options['workers'] or os.cpu_count() or 1
+        # Recriado (com o OCR aquecido) se um worker morrer
+        get_executor = functools.cache(
+            functools.partial(
+                EXECUTORS[options['executor']],
+                max_workers=workers,
+                initializer=warm_worker,
+            )
+        )
+        try:
+            ingestor = FolderIngestor(
+                directories,
+                get_executor,
+                competencia=competencia,
+                settle=options['settle'],
+                max_pending=workers * PENDING_PER_WORKER,
+            )
+            if options['once']:
+                self._report(ingestor.run_once())
+            else:
+                self._watch(ingestor, options)
+        finally:
+            if get_executor.cache_info().currsize:
+                get_executor().shutdown()
+
+        self.stdout.write(
+            f'{ingestor.processed} arquivo(s) processado(s), '
+            f'{ingestor.saved} registro(s) gravado(s)'
+        )
+
+    def _watch(self, ingestor, options):
+        watcher = build_watcher(
+            ingestor.directories, options['polling'], options['poll_interval']
+        )
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        previous = signal.signal(signal.SIGTERM, stop)
+        self.stdout.write(
+            f'Monitorando {len(ingestor.directories)} pasta(s) com '
+            f'{type(watcher).__name__}. Ctrl+C para encerrar.'
+        )
+        try:
+            ingestor.scan()
+            while not stopping:
+                self._report(ingestor.step(watcher))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            watcher.close()
+            self._report(ingestor.drain())
+
+    def _report(self, done):
+        for path, _, _, records in done:
+            errors = [record['error'] for record in records if 'error' in record]
+            if errors:
+                self.stderr.write(f'{path}: {"; ".join(errors)}')
+            else:
+                self.stdout.write(f'{path}: {len(records)} registro(s)')
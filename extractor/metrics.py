@@ -0,0 +1,295 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)  # fmt: skip
+BYTES_BUCKETS = (10**4, 10**5, 5 * 10**5, 10**6, 5 * 10**6, 10**7, 10**8)
+PAGES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+PIXELS_BUCKETS = (10**5, 10**6, 4 * 10**6, 10**7, 3 * 10**7, 10**8)
+
+_enabled = False
+_collector: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    'nfse_timings', default=None
+)
+# (métrica, valor, rótulos) observados em um worker, para repasse
+Observation = Tuple[str, float, Tuple[str, ...]]
+_recorder: ContextVar[Optional[List[Observation]]] = ContextVar(
+    'nfse_observations', default=None
+)
+
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus, seguro entre threads."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = {
+                    'buckets': [0] * len(self.buckets),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            series_items = sorted(self._series.items())
+        for labelvalues, series in series_items:
+            labels = list(zip(self.labelnames, labelvalues))
+            for bound, bucket_count in zip(self.buckets, series['buckets']):
+                bucket_labels = _format_labels([*labels, ('le', bound)])
+                yield f'{self.name}_bucket{bucket_labels} {bucket_count}'
+            inf_labels = _format_labels([*labels, ('le', '+Inf')])
+            yield f'{self.name}_bucket{inf_labels} {series["count"]}'
+            yield f'{self.name}_sum{_format_labels(labels)} {series["sum"]}'
+            yield f'{self.name}_count{_format_labels(labels)} {series["count"]}'
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """Contador monotônico no formato do Prometheus, seguro entre threads."""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            labels = _format_labels(list(zip(self.labelnames, labelvalues)))
+            yield f'{self.name}{labels} {value}'
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in labels)
+    return f'{{{pairs}}}'
+
+
+STAGE_DURATION = Histogram(
+    'nfse_stage_duration_seconds',
+    'Duração de cada etapa da extração.',
+    DURATION_BUCKETS,
+    labelnames=('stage',),
+)
+DOCUMENT_BYTES = Histogram(
+    'nfse_document_bytes',
+    'Tamanho dos documentos processados.',
+    BYTES_BUCKETS,
+)
+PDF_PAGES = Histogram(
+    'nfse_pdf_pages',
+    'Páginas de PDF efetivamente analisadas por documento.',
+    PAGES_BUCKETS,
+)
+OCR_PIXELS = Histogram(
+    'nfse_ocr_pixels',
+    'Pixels enviados ao OCR por imagem.',
+    PIXELS_BUCKETS,
+)
+EXTRACTION_ERRORS = Counter(
+    'nfse_extraction_errors_total',
+    'Falhas de extração por tipo de erro.',
+    labelnames=('error',),
+)
+
+METRICS = (STAGE_DURATION, DOCUMENT_BYTES, PDF_PAGES, OCR_PIXELS)
+COUNTERS = (EXTRACTION_ERRORS,)
+_BY_NAME = {metric.name: metric for metric in (*METRICS, *COUNTERS)}
+
+
+def configure(enabled: bool) -> None:
+    """Liga ou desliga a coleta de métricas do processo."""
+    global _enabled  # noqa: PLW0603
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Indica se as métricas são coletadas, ou gravadas para repasse."""
+    return _enabled or _recorder.get() is not None
+
+
+def _record(metric, value: float, labelvalues: Tuple[str, ...]) -> None:
+    if isinstance(metric, Counter):
+        metric.inc(*labelvalues, amount=value)
+    else:
+        metric.observe(value, *labelvalues)
+
+
+def _observe(metric, value: float, *labelvalues: str) -> None:
+    """Registra a observação, ou a grava se houver uma gravação ativa."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.append((metric.name, value, labelvalues))
+    elif _enabled:
+        _record(metric, value, labelvalues)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    def __init__(self, stage: str, collector: Optional[Dict[str, float]]):
+        self.stage = stage
+        self.collector = collector
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        _observe(STAGE_DURATION, elapsed, self.stage)
+        if self.collector is not None:
+            self.collector[self.stage] = (
+                self.collector.get(self.stage, 0.0) + elapsed
+            )
+        return False
+
+
+def timed(stage: str):
+    """
+    Mede a duração de uma etapa. Com as métricas desligadas e nenhuma
+    coleta ativa, devolve um context manager vazio compartilhado.
+    """
+    collector = _collector.get()
+    if collector is None and not is_enabled():
+        return _NULL_TIMER
+    return _StageTimer(stage, collector)
+
+
+def observe_bytes(size: Optional[int]) -> None:
+    if size is not None:
+        _observe(DOCUMENT_BYTES, size)
+
+
+def observe_pages(pages: int) -> None:
+    _observe(PDF_PAGES, pages)
+
+
+def observe_pixels(pixels: int) -> None:
+    _observe(OCR_PIXELS, pixels)
+
+
+def count_error(error: Exception) -> None:
+    _observe(EXTRACTION_ERRORS, 1, type(error).__name__)
+
+
+Recorded = Tuple[Any, List[Observation], Optional[Exception]]
+
+
+def call_recorded(function: Callable, *args) -> Recorded:
+    """
+    Executa `function` gravando as métricas em vez de registrá-las, e
+    devolve (resultado, observações, erro). Usada nos executores: as
+    métricas de um worker de processo ficariam na memória dele, fora do
+    /metrics do servidor; o processo que recebe o resultado as registra
+    com `replay`.
+    """
+    observations = []
+    token = _recorder.set(observations)
+    try:
+        return function(*args), observations, None
+    except Exception as e:
+        return None, observations, e
+    finally:
+        _recorder.reset(token)
+
+
+def replay(recorded: Recorded) -> Any:
+    """
+    Registra as métricas gravadas por `call_recorded` e devolve o
+    resultado, ou levanta o erro da função.
+    """
+    result, observations, error = recorded
+    if _enabled:
+        for name, value, labelvalues in observations:
+            _record(_BY_NAME[name], value, labelvalues)
+    if error is not None:
+        raise error
+    return result
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """
+    Acumula, em um dicionário, a duração de cada etapa executada dentro
+    do bloco, independentemente de as métricas globais estarem ligadas.
+    """
+    timings = {}
+    token = _collector.set(timings)
+    try:
+        yield timings
+    finally:
+        _collector.reset(token)
+
+
+def as_milliseconds(timings: Dict[str, float]) -> Dict[str, float]:
+    """Converte as durações coletadas para milissegundos arredondados."""
+    return {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+
+
+def render() -> str:
+    """Todas as métricas no formato de exposição em texto do Prometheus."""
+    lines = []
+    for metric in (*METRICS, *COUNTERS):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def reset() -> None:
+    for metric in (*METRICS, *COUNTERS):
+        metric.clear()
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NFSeRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cnpj_prestador', models.CharField(blank=True, max_length=18)),
+                ('nome_prestador', models.CharField(blank=True, max_length=255)),
+                ('competencia', models.DateField()),
+                ('file_name', models.CharField(max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['cnpj_prestador', 'competencia'], name='nfse_cnpj_competencia_idx'), models.Index(fields=['competencia'], name='nfse_competencia_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0002_nfserecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024, unique=True)),
+                ('mtime_ns', models.BigIntegerField()),
+                ('size', models.BigIntegerField()),
+                ('processed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
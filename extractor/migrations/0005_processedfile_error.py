@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0004_extractionjob_worker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedfile',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+    ]
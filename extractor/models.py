@@ -0,0 +1,102 @@
+import uuid
+
+from django.db import models
+
+
+class ExtractionJob(models.Model):
+    """Tarefa de extração assíncrona submetida via API"""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        DONE = 'done', 'Concluída'
+        FAILED = 'failed', 'Falhou'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file_name = models.CharField(max_length=255)
+    file_type = models.CharField(max_length=10)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # Processo que executa a tarefa (máquina:pid:instância, ver jobs.py)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.file_name} ({self.get_status_display()})'
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'file_name': self.file_name,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error or None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+        }
+
+
+class NFSeRecord(models.Model):
+    """
+    Dados extraídos de uma NFSe, associados ao fornecedor (CNPJ do
+    prestador) e ao mês de competência (RF06)
+    """
+
+    # Vazio quando o campo não foi encontrado no documento
+    cnpj_prestador = models.CharField(max_length=18, blank=True)
+    nome_prestador = models.CharField(max_length=255, blank=True)
+    # Primeiro dia do mês de competência
+    competencia = models.DateField()
+    file_name = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # "Notas do CNPJ X no mês Y" e "notas do CNPJ X", em ordem de id
+            models.Index(
+                fields=['cnpj_prestador', 'competencia'],
+                name='nfse_cnpj_competencia_idx',
+            ),
+            models.Index(fields=['competencia'], name='nfse_competencia_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.cnpj_prestador} ({self.competencia:%m/%Y})'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cnpj_prestador': self.cnpj_prestador or None,
+            'nome_prestador': self.nome_prestador or None,
+            'competencia': f'{self.competencia:%Y-%m}',
+            'file': self.file_name,
+            'created_at': self.created_at.isoformat(),
+        }
+
+
+class ProcessedFile(models.Model):
+    """
+    Arquivo de uma pasta monitorada já processado (checkpoint do comando
+    watch_folder): volta a ser processado se o mtime ou o tamanho mudarem.
+    Se a extração falhou, `error` guarda o motivo e o arquivo é processado
+    de novo no próximo início do comando
+    """
+
+    path = models.CharField(max_length=1024, unique=True)
+    mtime_ns = models.BigIntegerField()
+    size = models.BigIntegerField()
+    error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path
@@ -0,0 +1,222 @@
+"""
+Motores de OCR usados pelo ImageReader.
+
+O `pytesseract` executa o binário `tesseract` a cada chamada: cria um
+processo, grava a imagem em um arquivo temporário e recarrega os dados de
+treino do idioma. Quando o binding `tesserocr` (API C do Tesseract) está
+instalado, um pool de instâncias já inicializadas é reaproveitado entre as
+chamadas; sem ele, o `pytesseract` continua sendo usado.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from . import limits
+from .lazy import lazy_import
+
+pytesseract = lazy_import('pytesseract')
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+try:
+    tesserocr = lazy_import('tesserocr')
+except ImportError:  # pragma: no cover - depende do ambiente
+    tesserocr = None
+
+Line = Tuple[int, int, str]
+
+ENGINE_AUTO = 'auto'
+ENGINE_PYTESSERACT = 'pytesseract'
+ENGINE_TESSEROCR = 'tesserocr'
+
+
+def _tesseract_timeout() -> float:
+    """Prazo restante da extração para o processo `tesseract` (0: sem prazo)."""
+    left = limits.remaining()
+    return 0 if left is None else max(left, 0.01)
+
+
+def _layout_lines(data: Dict[str, List]) -> List[Line]:
+    """Agrupa as palavras do `image_to_data` em linhas (topo, base, texto)."""
+    lines = {}
+    for index, word in enumerate(data['text']):
+        if not word or not word.strip():
+            continue
+        key = (
+            data['block_num'][index],
+            data['par_num'][index],
+            data['line_num'][index],
+        )
+        top = data['top'][index]
+        bottom = top + data['height'][index]
+        if key in lines:
+            line_top, line_bottom, words = lines[key]
+            lines[key] = (min(line_top, top), max(line_bottom, bottom), words)
+            words.append(word)
+        else:
+            lines[key] = (top, bottom, [word])
+    return sorted(
+        (top, bottom, ' '.join(words)) for top, bottom, words in lines.values()
+    )
+
+
+class PytesseractEngine:
+    """OCR pelo binário `tesseract`, um processo por chamada."""
+
+    name = ENGINE_PYTESSERACT
+
+    def __init__(self, lang: str):
+        self.lang = lang
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(
+            image, lang=self.lang, timeout=_tesseract_timeout()
+        )
+
+    def layout_lines(self, image: Image.Image) -> List[Line]:
+        data = pytesseract.image_to_data(
+            image,
+            lang=self.lang,
+            output_type=pytesseract.Output.DICT,
+            timeout=_tesseract_timeout(),
+        )
+        return _layout_lines(data)
+
+
+class _Worker:
+    def __init__(self, api):
+        self.api = api
+        self.jobs = 0
+
+
+class TesserocrPool:
+    """
+    Pool de instâncias `PyTessBaseAPI` com os dados do idioma carregados.
+    Cada instância atende uma chamada por vez (o Tesseract libera o GIL
+    durante o reconhecimento) e é recriada após `max_jobs` usos, para
+    conter o crescimento de memória. Após um fork, o processo filho cria
+    as próprias instâncias.
+    """
+
+    def __init__(self, lang: str, size: int, max_jobs: int):
+        self.lang = lang
+        self.size = size
+        self.max_jobs = max_jobs
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_worker(self) -> _Worker:
+        return _Worker(tesserocr.PyTessBaseAPI(lang=self.lang))
+
+    def _checkout(self) -> _Worker:
+        if os.getpid() != self._pid:
+            self._reset()
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    return self._new_worker()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            worker = self._idle.get()
+
+        if worker is not None:
+            return worker
+        # Vaga liberada por uma instância reciclada: cria a substituta.
+        try:
+            return self._new_worker()
+        except Exception:
+            self._idle.put(None)
+            raise
+
+    def _checkin(self, worker: _Worker) -> None:
+        worker.jobs += 1
+        if worker.jobs < self.max_jobs:
+            self._idle.put(worker)
+            return
+        worker.api.End()
+        self._idle.put(None)
+
+    @contextmanager
+    def acquire(self) -> Iterator:
+        worker = self._checkout()
+        try:
+            yield worker.api
+        finally:
+            self._checkin(worker)
+
+
+class TesserocrEngine:
+    """OCR pela API C do Tesseract, com instâncias reaproveitadas."""
+
+    name = ENGINE_TESSEROCR
+
+    def __init__(self, lang: str, size: int, max_jobs: int):
+        self.lang = lang
+        self.pool = TesserocrPool(lang, size, max_jobs)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        with self.pool.acquire() as api:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+
+    def layout_lines(self, image: Image.Image) -> List[Line]:
+        level = tesserocr.RIL.TEXTLINE
+        lines = []
+        with self.pool.acquire() as api:
+            api.SetImage(image)
+            api.Recognize()
+            for result in tesserocr.iterate_level(api.GetIterator(), level):
+                text = result.GetUTF8Text(level)
+                box = result.BoundingBox(level)
+                if text and text.strip() and box:
+                    lines.append((box[1], box[3], ' '.join(text.split())))
+        return sorted(lines)
+
+
+@functools.cache
+def _build_engine(engine: str, lang: str, workers: Optional[int], max_jobs: int):
+    if engine == ENGINE_AUTO:
+        engine = ENGINE_PYTESSERACT if tesserocr is None else ENGINE_TESSEROCR
+
+    if engine == ENGINE_PYTESSERACT:
+        return PytesseractEngine(lang)
+    if engine == ENGINE_TESSEROCR:
+        if tesserocr is None:
+            raise ValueError('Motor de OCR tesserocr não está instalado')
+        return TesserocrEngine(lang, workers or os.cpu_count() or 1, max_jobs)
+    raise ValueError(f'Motor de OCR desconhecido: {engine!r}')
+
+
+def get_ocr_engine(config):
+    """
+    Motor de OCR do processo para a configuração: `OCR_ENGINE` escolhe entre
+    'auto' (tesserocr se instalado, senão pytesseract), 'tesserocr' e
+    'pytesseract'. O pool tem `OCR_ENGINE_WORKERS` instâncias (padrão:
+    núcleos da CPU), recicladas a cada `OCR_ENGINE_MAX_JOBS` chamadas.
+    """
+    return _build_engine(
+        config.OCR_ENGINE,
+        config.OCR_LANG,
+        config.OCR_ENGINE_WORKERS,
+        config.OCR_ENGINE_MAX_JOBS,
+    )
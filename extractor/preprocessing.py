@@ -0,0 +1,210 @@
+"""
+Pré-processamento de imagens antes do OCR.
+
+O tempo do Tesseract cresce com a quantidade de pixels e piora com fundo
+colorido e texto inclinado. As etapas abaixo (orientação, tons de cinza,
+redução para a resolução alvo, correção de inclinação e binarização) usam
+apenas operações do Pillow, executadas em C sobre a imagem inteira; em
+Python só são percorridos o histograma (256 posições) e os perfis de linha
+de uma amostra reduzida.
+"""
+
+from __future__ import annotations
+
+from array import array
+
+from .lazy import lazy_import
+
+pytesseract = lazy_import('pytesseract')
+ExifTags = lazy_import('PIL.ExifTags')
+Image = lazy_import('PIL.Image')
+ImageOps = lazy_import('PIL.ImageOps')
+
+SKEW_SAMPLE_SIDE = 1000
+WHITE = 255
+
+# Rotação detectada pelo OSD -> membro de Image.Transpose que a desfaz
+_EXIF_ROTATIONS = {
+    90: 'ROTATE_270',
+    180: 'ROTATE_180',
+    270: 'ROTATE_90',
+}
+
+
+def preprocess_image(image: Image.Image, config) -> Image.Image:
+    """
+    Prepara a imagem para o OCR conforme as opções `OCR_*` da configuração.
+    Com `OCR_PREPROCESS` desligado, a imagem é devolvida sem alterações.
+    """
+    if not config.OCR_PREPROCESS:
+        return image
+
+    image = apply_exif_orientation(image)
+    if config.OCR_DETECT_ORIENTATION:
+        image = correct_orientation(image)
+    if config.OCR_GRAYSCALE:
+        image = to_grayscale(image)
+    image = normalize_resolution(image, config.OCR_TARGET_DPI, config.OCR_MAX_SIDE)
+    if config.OCR_DESKEW:
+        angle = estimate_skew(
+            image, config.OCR_MAX_SKEW_ANGLE, config.OCR_SKEW_STEP
+        )
+        image = rotate(image, angle)
+    if config.OCR_BINARIZE:
+        image = binarize(image)
+    return image
+
+
+def apply_exif_orientation(image: Image.Image) -> Image.Image:
+    """Aplica a orientação gravada no EXIF (comum em fotos de celular)."""
+    orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+    if orientation == 1:
+        return image
+    return ImageOps.exif_transpose(image)
+
+
+def correct_orientation(image: Image.Image) -> Image.Image:
+    """
+    Gira a imagem em múltiplos de 90° conforme a detecção de orientação do
+    Tesseract (OSD). Exige os dados `osd` instalados e custa uma passada
+    extra do Tesseract; em caso de falha, a imagem é mantida.
+    """
+    try:
+        osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+    except pytesseract.TesseractError:
+        return image
+
+    transpose = _EXIF_ROTATIONS.get(osd.get('rotate', 0))
+    if transpose is None:
+        return image
+    return image.transpose(Image.Transpose[transpose])
+
+
+def to_grayscale(image: Image.Image) -> Image.Image:
+    """Converte para tons de cinza, compondo transparências sobre branco."""
+    if image.mode == 'L':
+        return image
+    if image.mode in {'RGBA', 'LA', 'PA'} or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, 'white')
+        image = Image.alpha_composite(background, image)
+    return image.convert('L')
+
+
+def normalize_resolution(
+    image: Image.Image, target_dpi: int, max_side: int
+) -> Image.Image:
+    """
+    Reduz a imagem para a resolução alvo (pelo DPI informado no arquivo) e
+    limita o maior lado. Imagens menores nunca são ampliadas.
+    """
+    scale = 1.0
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0] > target_dpi:
+        scale = target_dpi / dpi[0]
+
+    longest_side = max(image.size)
+    if longest_side * scale > max_side:
+        scale = max_side / longest_side
+
+    if scale >= 1.0:
+        return image
+
+    width, height = image.size
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def otsu_threshold(image: Image.Image) -> int:
+    """
+    Limiar de Otsu calculado sobre o histograma de uma imagem em tons de
+    cinza. Devolve -1 para imagens de uma única cor.
+    """
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+
+    background_count = 0
+    background_sum = 0
+    best_threshold = -1
+    best_variance = 0.0
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = (
+            background_count
+            * foreground_count
+            * (background_mean - foreground_mean) ** 2
+        )
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = level
+    return best_threshold
+
+
+def binarize(image: Image.Image) -> Image.Image:
+    """Binariza a imagem (preto e branco) pelo limiar de Otsu."""
+    image = to_grayscale(image)
+    threshold = otsu_threshold(image)
+    if threshold < 0:
+        return image
+    return image.point([
+        0 if level <= threshold else WHITE for level in range(256)
+    ])
+
+
+def _profile_score(ink: Image.Image) -> float:
+    """
+    Nitidez do perfil horizontal: com as linhas de texto alinhadas, a tinta
+    por linha alterna bruscamente entre texto e entrelinha.
+    """
+    profile = ink.convert('F').resize((1, ink.height), Image.Resampling.BOX)
+    rows = array('f', profile.tobytes())
+    return sum((after - before) ** 2 for before, after in zip(rows, rows[1:]))
+
+
+def estimate_skew(image: Image.Image, max_angle: float, step: float) -> float:
+    """
+    Estima, em graus, a rotação que alinha as linhas de texto, testando
+    ângulos em `[-max_angle, max_angle]` sobre uma amostra reduzida.
+    """
+    if max_angle <= 0 or step <= 0:
+        return 0.0
+
+    sample = to_grayscale(image)
+    if max(sample.size) > SKEW_SAMPLE_SIDE:
+        sample = sample.copy()
+        sample.thumbnail((SKEW_SAMPLE_SIDE, SKEW_SAMPLE_SIDE))
+    ink = ImageOps.invert(binarize(sample))
+
+    best_angle = 0.0
+    best_score = _profile_score(ink)
+    steps = int(max_angle / step)
+    for index in range(-steps, steps + 1):
+        angle = index * step
+        if not angle:
+            continue
+        # A amostra já é binária: o vizinho mais próximo basta e é bem mais
+        # rápido que a interpolação.
+        rotated = ink.rotate(angle, resample=Image.Resampling.NEAREST)
+        score = _profile_score(rotated)
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def rotate(image: Image.Image, angle: float) -> Image.Image:
+    """Gira a imagem no sentido anti-horário, preenchendo as bordas de branco."""
+    if not angle:
+        return image
+    fill = WHITE if image.mode in {'L', '1'} else 'white'
+    return image.rotate(
+        angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=fill
+    )
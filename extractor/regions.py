@@ -0,0 +1,82 @@
+"""
+OCR por região de interesse (ROI).
+
+O extrator só usa a seção do prestador, entre os marcadores do layout. Em vez
+de rodar o OCR completo na página inteira, uma passada rápida de layout
+(linhas do texto com suas posições) sobre uma cópia reduzida localiza os
+dois cabeçalhos, e o OCR em qualidade total roda apenas na faixa recortada
+entre eles.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from . import metrics
+from .lazy import lazy_import
+from .ocr import get_ocr_engine
+
+pytesseract = lazy_import('pytesseract')
+Image = lazy_import('PIL.Image')
+
+Box = Tuple[int, int, int, int]
+
+
+def locate_prestador_region(image: Image.Image, config) -> Optional[Box]:
+    """
+    Localiza a faixa da página entre o cabeçalho do prestador e o do
+    tomador, em coordenadas da imagem original. Sem o cabeçalho do tomador,
+    a faixa vai até o fim da página; sem o do prestador, devolve None.
+    """
+    scale = config.OCR_ROI_SCALE
+    width, height = image.size
+    sample = image
+    if scale < 1.0:
+        sample = image.resize(
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            Image.Resampling.BOX,
+        )
+
+    try:
+        lines = get_ocr_engine(config).layout_lines(sample)
+    except pytesseract.TesseractError:
+        return None
+
+    layout = None
+    start_top = start_bottom = end_top = None
+    for top, bottom, text in lines:
+        if layout is None:
+            detected = config.layouts.match_start(text)
+            if detected:
+                layout = detected[0]
+                start_top, start_bottom = top, bottom
+        elif top >= start_bottom and layout.prestador_end_pattern.search(text):
+            end_top = top
+            break
+
+    if start_top is None:
+        return None
+
+    margin = round(height * config.OCR_ROI_MARGIN)
+    region_top = max(0, round(start_top / scale) - margin)
+    region_bottom = height if end_top is None else round(end_top / scale)
+    region_bottom = min(height, region_bottom)
+    if region_bottom <= region_top:
+        return None
+    return (0, region_top, width, region_bottom)
+
+
+def ocr_image(image: Image.Image, config) -> str:
+    """
+    Executa o OCR da imagem, restrito à região do prestador quando
+    `OCR_ROI` está ligado e a imagem é grande o bastante para compensar a
+    passada de localização. Se a região não for encontrada, a página
+    inteira é lida.
+    """
+    if config.OCR_ROI and image.width * image.height >= config.OCR_ROI_MIN_PIXELS:
+        with metrics.timed('ocr_locate'):
+            region = locate_prestador_region(image, config)
+        if region is not None:
+            image = image.crop(region)
+
+    return get_ocr_engine(config).image_to_string(image)
@@ -0,0 +1,195 @@
+"""
+Persistência dos dados extraídos (RF06).
+
+Os registros de um lote são acumulados e gravados com `bulk_create`, em
+transações de até `TRANSACTION_SIZE` registros, em vez de um INSERT (e um
+commit) por nota. No SQLite, o banco usa o modo WAL (ver settings), em que
+as consultas não esperam pelas gravações em andamento.
+"""
+
+import re
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import NFSeRecord, ProcessedFile
+
+BULK_BATCH_SIZE = 1000
+TRANSACTION_SIZE = 20_000
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+_CNPJ_DIGITS = re.compile(r'\d{14}')
+
+Record = Dict[str, Optional[str]]
+# Caminho, mtime (ns) e tamanho de um arquivo monitorado e os seus registros.
+IngestedFile = Tuple[str, int, int, List[Record]]
+
+
+def parse_competencia(value: str) -> date:
+    """
+    Converte o mês de competência ('AAAA-MM' ou 'MM/AAAA') no primeiro dia
+    do mês. Levanta ValueError para outros formatos.
+    """
+    for pattern in ('%Y-%m', '%m/%Y'):
+        try:
+            return datetime.strptime(value.strip(), pattern).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Competência inválida: '{value}' (use AAAA-MM ou MM/AAAA)")
+
+
+def normalize_cnpj(value: str) -> str:
+    """Formata um CNPJ informado só com dígitos como XX.XXX.XXX/XXXX-XX."""
+    value = value.strip()
+    if not _CNPJ_DIGITS.fullmatch(value):
+        return value
+    return f'{value[:2]}.{value[2:5]}.{value[5:8]}/{value[8:12]}-{value[12:]}'
+
+
+def _nfse_record(record: Record, competencia: date) -> NFSeRecord:
+    return NFSeRecord(
+        cnpj_prestador=record.get('cnpj_prestador') or '',
+        nome_prestador=(record.get('nome_prestador') or '')[:255],
+        competencia=competencia,
+        file_name=record.get('file', ''),
+    )
+
+
+class RecordWriter:
+    """
+    Acumula registros do processamento em lote e os grava em blocos. Os
+    registros com erro são ignorados. Use como gerenciador de contexto para
+    gravar o que restar ao final.
+    """
+
+    def __init__(
+        self, competencia: date, transaction_size: int = TRANSACTION_SIZE
+    ):
+        self.competencia = competencia
+        self.transaction_size = transaction_size
+        self.saved = 0
+        self._pending: List[NFSeRecord] = []
+
+    def add(self, record: Record) -> None:
+        if 'error' in record:
+            return
+        self._pending.append(_nfse_record(record, self.competencia))
+        if len(self._pending) >= self.transaction_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Grava os registros pendentes em uma única transação."""
+        if not self._pending:
+            return 0
+        with transaction.atomic():
+            NFSeRecord.objects.bulk_create(
+                self._pending, batch_size=BULK_BATCH_SIZE
+            )
+        count = len(self._pending)
+        self.saved += count
+        self._pending = []
+        return count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.flush()
+
+
+def save_records(records: Iterable[Record], competencia: date) -> int:
+    """Grava os registros (sem erro) de um lote; devolve quantos gravou."""
+    with RecordWriter(competencia) as writer:
+        for record in records:
+            writer.add(record)
+    return writer.saved
+
+
+def _file_error(records: List[Record]) -> str:
+    return '\n'.join(record['error'] for record in records if 'error' in record)
+
+
+def _previous_records(paths: List[str]) -> Q:
+    """Registros gravados antes para os arquivos (e membros) em `paths`."""
+    query = Q(pk__in=[])
+    for path in paths:
+        query |= Q(file_name=path) | Q(file_name__startswith=f'{path}/')
+    return query
+
+
+def save_ingested(files: Iterable[IngestedFile], competencia: date) -> int:
+    """
+    Grava os registros (sem erro) dos arquivos de uma pasta monitorada e o
+    checkpoint desses arquivos na mesma transação: após uma queda, cada
+    arquivo ou foi gravado e marcado, ou será processado de novo. Arquivos
+    com falha ficam marcados com o erro; ao serem processados de novo, os
+    registros da tentativa anterior são substituídos. Devolve quantos
+    registros gravou.
+    """
+    records = []
+    processed = []
+    for path, mtime_ns, size, file_records in files:
+        processed.append(
+            ProcessedFile(
+                path=path,
+                mtime_ns=mtime_ns,
+                size=size,
+                error=_file_error(file_records),
+            )
+        )
+        records.extend(
+            _nfse_record(record, competencia)
+            for record in file_records
+            if 'error' not in record
+        )
+    with transaction.atomic():
+        retried = list(
+            ProcessedFile.objects
+            .filter(path__in=[file.path for file in processed])
+            .exclude(error='')
+            .values_list('path', flat=True)
+        )
+        if retried:
+            NFSeRecord.objects.filter(_previous_records(retried)).delete()
+        NFSeRecord.objects.bulk_create(records, batch_size=BULK_BATCH_SIZE)
+        ProcessedFile.objects.bulk_create(
+            processed,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['path'],
+            update_fields=['mtime_ns', 'size', 'error', 'processed_at'],
+        )
+    return len(records)
+
+
+def load_checkpoint() -> Dict[str, Tuple[int, int]]:
+    """
+    Caminho -> (mtime em ns, tamanho) dos arquivos já processados com
+    sucesso; os que falharam ficam de fora para serem tentados de novo.
+    """
+    rows = ProcessedFile.objects.filter(error='').values_list(
+        'path', 'mtime_ns', 'size'
+    )
+    return {path: (mtime_ns, size) for path, mtime_ns, size in rows.iterator()}
+
+
+def find_records(
+    cnpj: Optional[str] = None,
+    competencia: Optional[date] = None,
+    after: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> List[NFSeRecord]:
+    """
+    Registros do CNPJ e/ou da competência, em ordem de id, a partir do id
+    `after` (paginação por chave: o custo não cresce com a página, ao
+    contrário de OFFSET). Os filtros usam os índices de NFSeRecord.
+    """
+    queryset = NFSeRecord.objects.filter(id__gt=after)
+    if cnpj:
+        queryset = queryset.filter(cnpj_prestador=normalize_cnpj(cnpj))
+    if competencia:
+        queryset = queryset.filter(competencia=competencia)
+    return list(queryset.order_by('id')[: min(limit, MAX_PAGE_SIZE)])
@@ -0,0 +1,205 @@
+"""
+Extração em lote de uploads (/api/extract/batch/).
+
+Uma única requisição traz vários arquivos no campo "files" (multipart)
+e/ou arquivos compactados, dos quais são lidos os membros com extensão
+suportada (ver extractor/archives). A extração roda em um executor
+compartilhado pelo processo, com um número limitado de arquivos em
+andamento por requisição, e cada resultado é entregue assim que fica
+pronto.
+
+O `UploadLimitHandler` (em FILE_UPLOAD_HANDLERS) vale para todas as APIs:
+a leitura do corpo é interrompida assim que um arquivo passa de
+`MAX_FILE_BYTES`, sem guardar o restante em memória nem em disco.
+"""
+
+import functools
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from . import metrics
+from .archives import is_archive, iter_members
+from .batch import PENDING_PER_WORKER
+from .cache import ExtractionCache
+from .data_extractor import (
+    DEFAULT_CONFIG,
+    ExtractorError,
+    FileTooLargeError,
+    Source,
+    UnsupportedFileTypeError,
+    detect_file_type,
+    extract_nfse_data,
+)
+from .executors import EXECUTORS, submit_rebuilding
+
+UPLOAD_FIELDS = ('files', 'file')
+
+# Um item é o nome do arquivo e o seu conteúdo, ou o erro que impediu lê-lo.
+Item = Tuple[str, Union[Source, ExtractorError]]
+
+
+class UploadLimitHandler(FileUploadHandler):
+    """
+    Conta os bytes de cada arquivo enquanto o upload é recebido e o
+    interrompe ao passar de `MAX_FILE_BYTES`. O erro fica em `error`, para
+    a view responder (ver `upload_limit_error`).
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = DEFAULT_CONFIG.MAX_FILE_BYTES
+        self.received = 0
+        self.error = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.max_bytes is not None and self.received > self.max_bytes:
+            self.error = FileTooLargeError(
+                f'Arquivo {self.file_name} excede o limite de '
+                f'{self.max_bytes} bytes'
+            )
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):  # noqa: PLR6301
+        return None
+
+
+def upload_limit_error(request) -> Optional[FileTooLargeError]:
+    """
+    Erro do upload interrompido por tamanho, se houver. Deve ser consultado
+    depois de `request.FILES`, que é quando o corpo é lido.
+    """
+    for handler in request.upload_handlers:
+        if isinstance(handler, UploadLimitHandler) and handler.error:
+            return handler.error
+    return None
+
+
+def _options():
+    options = getattr(settings, 'NFSE_BATCH', {})
+    workers = options.get('WORKERS') or os.cpu_count() or 1
+    return {
+        'executor': options.get('EXECUTOR', 'process'),
+        'workers': workers,
+        'max_pending': options.get('MAX_PENDING') or workers * PENDING_PER_WORKER,
+    }
+
+
+@functools.cache
+def get_batch_executor():
+    """
+    Executor de tamanho fixo, compartilhado pelas requisições em lote;
+    recriado por `submit_rebuilding` se o pool quebrar.
+    """
+    options = _options()
+    return EXECUTORS[options['executor']](max_workers=options['workers'])
+
+
+def has_uploads(files) -> bool:
+    return any(files.getlist(field) for field in UPLOAD_FIELDS)
+
+
+def _upload_content(uploaded_file) -> Source:
+    """
+    Conteúdo que pode ser enviado a outro processo: o caminho do arquivo
+    temporário, quando o Django já fez o spool do upload, ou os bytes.
+    """
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return uploaded_file.temporary_file_path()
+    return uploaded_file.read()
+
+
+def _iter_archive(uploaded_file) -> Iterator[Item]:
+    """Membros suportados de um arquivo compactado, lidos um por vez."""
+    try:
+        yield from iter_members(uploaded_file, uploaded_file.name)
+    except ExtractorError as e:
+        yield uploaded_file.name, e
+
+
+def iter_uploads(files) -> Iterator[Item]:
+    """
+    Arquivos enviados nos campos "files" e "file", com os arquivos
+    compactados (.zip, .tar.gz) expandidos.
+    """
+    for field in UPLOAD_FIELDS:
+        for uploaded_file in files.getlist(field):
+            if is_archive(uploaded_file.name):
+                yield from _iter_archive(uploaded_file)
+            else:
+                yield uploaded_file.name, _upload_content(uploaded_file)
+
+
+def extract_uploads(
+    items: Iterable[Item], cache: Optional[ExtractionCache] = None
+) -> Iterator[Dict[str, Optional[str]]]:
+    """
+    Extrai os arquivos no executor em lote e entrega os registros (com a
+    chave 'file' e os campos extraídos, ou 'error') na ordem em que
+    terminam. Resultados em cache e erros de validação são entregues na
+    hora, sem ocupar o executor. Se o consumidor parar (cliente
+    desconectado), as extrações ainda não iniciadas são canceladas.
+    """
+    options = _options()
+    pending = {}
+    try:
+        for name, source in items:
+            if isinstance(source, ExtractorError):
+                yield {'file': name, 'error': str(source)}
+                continue
+            try:
+                file_type = detect_file_type(name)
+            except UnsupportedFileTypeError as e:
+                yield {'file': name, 'error': str(e)}
+                continue
+
+            key = cache.key_for(source, file_type) if cache else None
+            result = cache.get(key) if cache else None
+            if result is not None:
+                yield {'file': name, **result}
+                continue
+
+            future = submit_rebuilding(
+                get_batch_executor,
+                metrics.call_recorded,
+                extract_nfse_data,
+                source,
+                file_type,
+            )
+            pending[future] = (name, key)
+            if len(pending) >= options['max_pending']:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _collect(future, *pending.pop(future), cache)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _collect(future, *pending.pop(future), cache)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _collect(
+    future, name: str, key: Optional[str], cache: Optional[ExtractionCache]
+) -> Dict[str, Optional[str]]:
+    try:
+        result = metrics.replay(future.result())
+    except ExtractorError as e:
+        return {'file': name, 'error': str(e)}
+    except Exception as e:
+        return {'file': name, 'error': f'Erro interno: {e}'}
+
+    if cache:
+        cache.set(key, result)
+    return {'file': name, **result}
@@ -8,4 +8,22 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('api/hello/', views.hello_api, name='hello_api'),
     path('api/extract/', views.extract_api, name='extract_api'),
+    path(
+        'api/extract/async/',
+        views.extract_async_api,
+        name='extract_async_api',
+    ),
+    path(
+        'api/extract/batch/',
+        views.extract_batch_api,
+        name='extract_batch_api',
+    ),
+    path('api/records/', views.records_api, name='records_api'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('api/jobs/', views.jobs_api, name='jobs_api'),
+    path(
+        'api/jobs/<uuid:job_id>/',
+        views.job_detail_api,
+        name='job_detail_api',
+    ),
 ]
@@ -1,13 +1,51 @@
-import os
-import tempfile
+import json
 from http import HTTPStatus
 from pathlib import Path
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 
-from .data_extractor import ExtractorError, extract_nfse_data
+from . import metrics
+from .async_extraction import extract_async
+from .cache import get_default_cache
+from .data_extractor import (
+    ExtractionTimeoutError,
+    ExtractorError,
+    FileTooLargeError,
+    ImageTooLargeError,
+    TooManyPagesError,
+    UnsupportedFileTypeError,
+    detect_file_type,
+    extract_nfse_data,
+)
+from .jobs import QueueFullError, fail_if_orphaned, get_job_queue
+from .models import ExtractionJob
+from .storage import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    find_records,
+    parse_competencia,
+)
+from .uploads import (
+    extract_uploads,
+    has_uploads,
+    iter_uploads,
+    upload_limit_error,
+)
+
+JOB_RETRY_AFTER_SECONDS = 5
+
+# Status HTTP dos limites de processamento; os demais erros do extrator são
+# 400.
+LIMIT_STATUS = {
+    FileTooLargeError: HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+    ImageTooLargeError: HTTPStatus.UNPROCESSABLE_ENTITY,
+    TooManyPagesError: HTTPStatus.UNPROCESSABLE_ENTITY,
+    ExtractionTimeoutError: HTTPStatus.GATEWAY_TIMEOUT,
+}
 
 
 def index(request):
@@ -23,71 +61,245 @@ def hello_api(request):
     })
 
 
-@csrf_exempt
-def extract_api(request):
-    """API para extrair dados de NFSe"""
+def _upload_source(uploaded_file):
+    """
+    Origem entregue aos leitores, sem cópia para arquivo temporário: o
+    arquivo em disco quando o Django já fez o spool do upload, ou o próprio
+    upload em memória nos demais casos.
+    """
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return uploaded_file.temporary_file_path()
+    return uploaded_file
+
+
+def _error_response(error: ExtractorError) -> JsonResponse:
+    """Resposta de um erro do extrator, com o status do limite excedido."""
+    status = next(
+        (
+            status
+            for error_type, status in LIMIT_STATUS.items()
+            if isinstance(error, error_type)
+        ),
+        HTTPStatus.BAD_REQUEST,
+    )
+    return JsonResponse({'error': str(error)}, status=status)
+
+
+def _upload_error(request):
+    """
+    Valida método, presença do arquivo e extensão de um upload.
+    Retorna a resposta de erro correspondente, ou None se o upload é válido.
+    """
     if request.method != 'POST':
         return JsonResponse(
             {'error': 'Método não permitido'},
             status=HTTPStatus.METHOD_NOT_ALLOWED,
         )
 
-    if 'file' not in request.FILES:
+    files = request.FILES
+    limit_error = upload_limit_error(request)
+    if limit_error:
+        return _error_response(limit_error)
+
+    if 'file' not in files:
         return JsonResponse(
             {'error': 'Nenhum arquivo. Envie um arquivo no campo "file".'},
             status=HTTPStatus.BAD_REQUEST,
         )
 
-    temp_file_path = None
+    file_name = files['file'].name
+    try:
+        detect_file_type(file_name)
+    except UnsupportedFileTypeError:
+        file_extension = Path(file_name).suffix.lower()
+        return JsonResponse(
+            {'error': f'Tipo de arquivo não suportado: {file_extension}'},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+
+    return None
+
+
+@csrf_exempt
+def extract_api(request):
+    """API para extrair dados de NFSe"""
+    with metrics.timed('upload'):
+        error_response = _upload_error(request)
+    if error_response:
+        return error_response
+
+    uploaded_file = request.FILES['file']
+    file_type = detect_file_type(uploaded_file.name)
 
     try:
-        uploaded_file = request.FILES['file']
-
-        file_extension = Path(uploaded_file.name).suffix.lower()
-        if file_extension == '.pdf':
-            file_type = 'pdf'
-        elif file_extension in {
-            '.png',
-            '.jpg',
-            '.jpeg',
-            '.bmp',
-            '.tiff',
-            '.gif',
-        }:
-            file_type = 'image'
-        else:
-            return JsonResponse(
-                {'error': f'Tipo de arquivo não suportado: {file_extension}'},
-                status=400,
-            )
-
-        temp_dir = Path('temp')
-        temp_dir.mkdir(exist_ok=True)
-
-        with tempfile.NamedTemporaryFile(
-            dir=temp_dir,
-            suffix=file_extension,
-            prefix=f'{Path(uploaded_file.name).stem}_',
-            delete=False,
-        ) as temp_file:
-            for chunk in uploaded_file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-
-        result = extract_nfse_data(temp_file_path, file_type)
+        result = get_default_cache().get_or_extract(
+            _upload_source(uploaded_file), file_type, extract_nfse_data
+        )
 
         return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
 
     except ExtractorError as e:
-        return JsonResponse({'error': str(e)}, status=HTTPStatus.BAD_REQUEST)
+        return _error_response(e)
     except Exception as e:
         return JsonResponse(
             {'error': f'Erro interno: {str(e)}'},
             status=HTTPStatus.INTERNAL_SERVER_ERROR,
         )
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except OSError:
-                pass
+
+
+@csrf_exempt
+async def extract_async_api(request):
+    """
+    Versão assíncrona (ASGI) da API de extração: o upload é lido fora do
+    event loop e a extração roda em um executor com concorrência limitada.
+    """
+    error_response = await sync_to_async(_upload_error)(request)
+    if error_response:
+        return error_response
+
+    uploaded_file = request.FILES['file']
+    file_type = detect_file_type(uploaded_file.name)
+
+    try:
+        result = await extract_async(_upload_source(uploaded_file), file_type)
+
+        return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
+
+    except ExtractorError as e:
+        return _error_response(e)
+    except Exception as e:
+        return JsonResponse(
+            {'error': f'Erro interno: {str(e)}'},
+            status=HTTPStatus.INTERNAL_SERVER_ERROR,
+        )
+
+
+@csrf_exempt
+def extract_batch_api(request):
+    """
+    API para extrair vários arquivos (ou os membros de um .zip) em uma só
+    requisição. Os resultados são enviados em NDJSON, uma linha por arquivo,
+    à medida que cada extração termina.
+    """
+    if request.method != 'POST':
+        return JsonResponse(
+            {'error': 'Método não permitido'},
+            status=HTTPStatus.METHOD_NOT_ALLOWED,
+        )
+
+    files = request.FILES
+    limit_error = upload_limit_error(request)
+    if limit_error:
+        return _error_response(limit_error)
+
+    if not has_uploads(files):
+        return JsonResponse(
+            {'error': 'Nenhum arquivo. Envie os arquivos no campo "files".'},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+
+    records = extract_uploads(iter_uploads(files), get_default_cache())
+    return StreamingHttpResponse(
+        (json.dumps(record, ensure_ascii=False) + '\n' for record in records),
+        content_type='application/x-ndjson',
+    )
+
+
+@csrf_exempt
+def jobs_api(request):
+    """API para submeter uma extração assíncrona de NFSe"""
+    error_response = _upload_error(request)
+    if error_response:
+        return error_response
+
+    uploaded_file = request.FILES['file']
+    file_type = detect_file_type(uploaded_file.name)
+
+    try:
+        job = get_job_queue().submit(
+            uploaded_file.name, file_type, uploaded_file.read()
+        )
+    except QueueFullError:
+        response = JsonResponse(
+            {'error': 'Fila de processamento cheia. Tente novamente.'},
+            status=HTTPStatus.TOO_MANY_REQUESTS,
+        )
+        response['Retry-After'] = str(JOB_RETRY_AFTER_SECONDS)
+        return response
+
+    job_url = reverse('extractor:job_detail_api', args=[job.pk])
+    response = JsonResponse(
+        {'id': str(job.pk), 'status': job.status, 'url': job_url},
+        status=HTTPStatus.ACCEPTED,
+    )
+    response['Location'] = job_url
+    return response
+
+
+def job_detail_api(request, job_id):
+    """API para consultar o status e o resultado de uma extração assíncrona"""
+    if request.method != 'GET':
+        return JsonResponse(
+            {'error': 'Método não permitido'},
+            status=HTTPStatus.METHOD_NOT_ALLOWED,
+        )
+
+    try:
+        job = ExtractionJob.objects.get(pk=job_id)
+    except ExtractionJob.DoesNotExist:
+        return JsonResponse(
+            {'error': 'Tarefa não encontrada'}, status=HTTPStatus.NOT_FOUND
+        )
+
+    fail_if_orphaned(job)
+    return JsonResponse(job.to_dict(), json_dumps_params={'ensure_ascii': False})
+
+
+def records_api(request):
+    """
+    API para consultar os dados persistidos, por CNPJ do prestador e/ou mês
+    de competência, em páginas de `limit` registros (no máximo
+    MAX_PAGE_SIZE). A próxima página é indicada em 'next' (paginação pelo
+    último id).
+    """
+    if request.method != 'GET':
+        return JsonResponse(
+            {'error': 'Método não permitido'},
+            status=HTTPStatus.METHOD_NOT_ALLOWED,
+        )
+
+    try:
+        competencia = request.GET.get('competencia')
+        competencia = parse_competencia(competencia) if competencia else None
+        after = int(request.GET.get('after', 0))
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=HTTPStatus.BAD_REQUEST)
+    if limit < 1:
+        return JsonResponse(
+            {'error': 'O parâmetro limit deve ser positivo'},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    records = find_records(request.GET.get('cnpj'), competencia, after, limit)
+    next_url = None
+    if len(records) == limit:
+        query = request.GET.copy()
+        query['after'] = records[-1].id
+        next_url = f'{request.path}?{query.urlencode()}'
+
+    return JsonResponse(
+        {'results': [record.to_dict() for record in records], 'next': next_url},
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def metrics_view(request):
+    """Métricas de extração no formato de texto do Prometheus"""
+    if not metrics.is_enabled():
+        return JsonResponse(
+            {'error': 'Métricas desabilitadas'}, status=HTTPStatus.NOT_FOUND
+        )
+
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4')
@@ -0,0 +1,394 @@
+"""
+Ingestão contínua de pastas monitoradas (comando `watch_folder`).
+
+Os arquivos novos ou alterados são detectados pelo inotify (Linux) ou, na
+falta dele, por varreduras periódicas. Um arquivo só é processado depois
+de ficar `settle` segundos sem mudar de tamanho nem de mtime, para não ler
+uma cópia ainda em andamento. A extração roda em um pool de processos que
+vive enquanto o comando roda, com o motor de OCR já carregado, e os
+resultados são gravados no banco (RF06) junto com o checkpoint de cada
+arquivo: após um reinício, os arquivos já processados são reconhecidos
+pelo stat, sem nova extração.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, Future, wait
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .batch import _is_supported, collect_files, extract_file, iter_entries
+from .data_extractor import DEFAULT_CONFIG, ExtractorError
+from .executors import submit_rebuilding
+from .ocr import get_ocr_engine
+from .storage import IngestedFile, Record, load_checkpoint, save_ingested
+
+DEFAULT_SETTLE = 2.0
+DEFAULT_POLL_INTERVAL = 5.0
+# Espera máxima do laço principal: limita a demora para notar o fim de uma
+# extração ou um pedido de parada.
+MAX_WAIT = 0.5
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# (mtime em ns, tamanho)
+Signature = Tuple[int, int]
+
+
+def _signature(path: str) -> Optional[Signature]:
+    try:
+        result = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(result.st_mode):
+        return None
+    return result.st_mtime_ns, result.st_size
+
+
+def warm_worker() -> None:
+    """Inicializa o motor de OCR do worker antes do primeiro arquivo."""
+    get_ocr_engine(DEFAULT_CONFIG)
+
+
+def extract_path(file_path_str: str) -> List[Record]:
+    """
+    Registros de um arquivo da pasta: um para PDFs e imagens, um por
+    membro para arquivos compactados.
+    """
+    records = []
+    for name, content in iter_entries([Path(file_path_str)]):
+        if isinstance(content, ExtractorError):
+            records.append({'file': name, 'error': str(content)})
+        else:
+            records.append(extract_file(name, content=content))
+    return records
+
+
+class PollingWatcher:
+    """Detecta mudanças varrendo as pastas a cada `interval` segundos."""
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+        self._next_scan = time.monotonic() + interval
+
+    def wait(self, timeout: float) -> Optional[List[Path]]:
+        """
+        Espera até `timeout` segundos. Devolve None quando é hora de varrer
+        as pastas de novo.
+        """
+        remaining = self._next_scan - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(remaining, 0))
+        self._next_scan = time.monotonic() + self.interval
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """
+    Recebe do kernel (inotify) os arquivos criados, alterados ou movidos
+    para as pastas, inclusive subpastas criadas depois.
+    """
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directories: Iterable[Path]):
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError('inotify não está disponível nesta plataforma')
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'Falha ao iniciar o inotify')
+        self._directories: Dict[int, Path] = {}
+        try:
+            for directory in directories:
+                self._add_tree(Path(directory))
+        except OSError:
+            self.close()
+            raise
+
+    def _add(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), self.MASK
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(
+                errno, f'Falha ao monitorar {directory}: {os.strerror(errno)}'
+            )
+        self._directories[wd] = directory
+
+    def _add_tree(self, directory: Path) -> None:
+        for root, _, _ in os.walk(directory):
+            self._add(Path(root))
+
+    def _new_directory(self, directory: Path) -> List[Path]:
+        """Monitora uma subpasta nova e entrega os arquivos já presentes."""
+        try:
+            self._add_tree(directory)
+        except OSError:
+            return []
+        return [
+            Path(root) / name
+            for root, _, names in os.walk(directory)
+            for name in names
+        ]
+
+    def wait(self, timeout: float) -> Optional[List[Path]]:
+        """
+        Espera eventos por até `timeout` segundos e devolve os arquivos
+        afetados, ou None se a fila do kernel transbordou (é preciso varrer
+        as pastas de novo).
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.extend(self._new_directory(directory / name))
+                continue
+            changed.append(directory / name)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def build_watcher(
+    directories: Iterable[Path],
+    polling: bool = False,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+):
+    """Watcher por inotify, ou por varredura se pedido ou indisponível."""
+    if not polling:
+        try:
+            return InotifyWatcher(directories)
+        except OSError:
+            pass
+    return PollingWatcher(poll_interval)
+
+
+def _records(future: Future, path_str: str) -> List[Record]:
+    """Registros de uma extração, ou o erro do worker que a executou."""
+    try:
+        return future.result()
+    except Exception as e:
+        return [{'file': path_str, 'error': f'Falha no worker: {e}'}]
+
+
+class FolderIngestor:
+    """
+    Processa incrementalmente os arquivos das pastas: cada arquivo novo ou
+    alterado (em relação ao checkpoint) é extraído uma vez, depois de
+    estável, e gravado com o seu checkpoint.
+    `get_executor` devolve o pool das extrações (uma função com
+    functools.cache): se um worker morrer, o pool é recriado e só o arquivo
+    que o derrubou é gravado como falha.
+    Sem `competencia`, os registros ficam no mês corrente.
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[str],
+        get_executor: Callable,
+        competencia: Optional[date] = None,
+        settle: float = DEFAULT_SETTLE,
+        max_pending: int = 8,
+    ):
+        self.directories = [Path(directory).resolve() for directory in directories]
+        self.get_executor = get_executor
+        self.competencia = competencia
+        self.settle = settle
+        self.max_pending = max_pending
+        self.processed = 0
+        self.saved = 0
+        self._checkpoint = load_checkpoint()
+        # Candidatos: assinatura observada e desde quando ela não muda.
+        self._candidates: Dict[str, Tuple[Signature, float]] = {}
+        self._in_flight: Dict[str, Signature] = {}
+        self._pending = {}
+        self._done: List[IngestedFile] = []
+
+    def scan(self) -> None:
+        """Varre as pastas (no início e quando os eventos não bastam)."""
+        self.offer(collect_files(map(str, self.directories)))
+
+    def offer(self, paths: Iterable[Path]) -> None:
+        """Registra arquivos possivelmente novos ou alterados."""
+        now = time.monotonic()
+        for path in map(Path, paths):
+            if not _is_supported(path):
+                continue
+            path_str = str(path)
+            signature = _signature(path_str)
+            if signature is None or signature in {
+                self._checkpoint.get(path_str),
+                self._in_flight.get(path_str),
+            }:
+                self._candidates.pop(path_str, None)
+                continue
+            previous = self._candidates.get(path_str)
+            if previous is None or previous[0] != signature:
+                self._candidates[path_str] = (signature, now)
+
+    def ready(self) -> List[Tuple[str, Signature]]:
+        """Candidatos sem mudanças há `settle` segundos."""
+        now = time.monotonic()
+        ready = []
+        for path_str, (signature, since) in list(self._candidates.items()):
+            if now - since < self.settle:
+                continue
+            current = _signature(path_str)
+            if current is None:
+                del self._candidates[path_str]
+            elif current != signature:
+                self._candidates[path_str] = (current, now)
+            else:
+                del self._candidates[path_str]
+                ready.append((path_str, signature))
+        return ready
+
+    def timeout(self) -> float:
+        """Tempo até o próximo candidato ficar estável (no máximo MAX_WAIT)."""
+        if not self._candidates:
+            return MAX_WAIT
+        first = min(since for _, since in self._candidates.values())
+        return min(max(first + self.settle - time.monotonic(), 0), MAX_WAIT)
+
+    def submit(self, ready: Iterable[Tuple[str, Signature]]) -> None:
+        for path_str, signature in ready:
+            if len(self._pending) >= self.max_pending:
+                self.collect(timeout=None)
+            future = submit_rebuilding(self.get_executor, extract_path, path_str)
+            self._pending[future] = (path_str, signature)
+            self._in_flight[path_str] = signature
+
+    def collect(self, timeout: Optional[float] = 0) -> None:
+        """
+        Recolhe as extrações concluídas (esperando até `timeout`). Quando um
+        worker morre, todas as extrações do pool quebrado falham: elas são
+        refeitas, uma de cada vez, e só a que derrubar o pool outra vez fica
+        registrada como falha.
+        """
+        if not self._pending:
+            return
+        done, _ = wait(self._pending, timeout, return_when=FIRST_COMPLETED)
+        broken = []
+        while done:
+            for future in done:
+                path_str, signature = self._pending.pop(future)
+                del self._in_flight[path_str]
+                if isinstance(future.exception(), BrokenExecutor):
+                    broken.append((path_str, signature))
+                else:
+                    self._done.append((
+                        path_str,
+                        *signature,
+                        _records(future, path_str),
+                    ))
+            done = wait(self._pending)[0] if broken and self._pending else ()
+        for path_str, signature in broken:
+            future = submit_rebuilding(self.get_executor, extract_path, path_str)
+            self._done.append((path_str, *signature, _records(future, path_str)))
+
+    def flush(self) -> List[IngestedFile]:
+        """Grava os arquivos concluídos e avança o checkpoint."""
+        done, self._done = self._done, []
+        if not done:
+            return done
+        competencia = self.competencia or date.today().replace(day=1)
+        self.saved += save_ingested(done, competencia)
+        # Os que falharam também entram no checkpoint em memória, para não
+        # serem extraídos de novo a cada varredura; no banco ficam com o
+        # erro e voltam a ser tentados no próximo início.
+        for path_str, mtime_ns, size, _ in done:
+            self._checkpoint[path_str] = (mtime_ns, size)
+        self.processed += len(done)
+        return done
+
+    def step(self, watcher) -> List[IngestedFile]:
+        """Uma volta do laço: eventos, arquivos estáveis e resultados."""
+        changed = watcher.wait(self.timeout())
+        if changed is None:
+            self.scan()
+        else:
+            self.offer(changed)
+        self.submit(self.ready())
+        self.collect()
+        return self.flush()
+
+    def run_once(self) -> List[IngestedFile]:
+        """Processa o conteúdo atual das pastas, sem esperar estabilização."""
+        self.scan()
+        now = time.monotonic()
+        self._candidates = {
+            path_str: (signature, now - self.settle)
+            for path_str, (signature, _) in self._candidates.items()
+        }
+        self.submit(self.ready())
+        while self._pending:
+            self.collect(timeout=None)
+        return self.flush()
+
+    def drain(self) -> List[IngestedFile]:
+        """Espera as extrações em andamento e grava os resultados."""
+        while self._pending:
+            self.collect(timeout=None)
+        return self.flush()
@@ -77,6 +77,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WAL: leituras não esperam pelas gravações em lote (NFSeRecord), e
+        # as transações de escrita reservam o banco já no início.
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -100,6 +108,61 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache de resultados de extração (memória + SQLite), por hash do arquivo
+
+NFSE_CACHE = {
+    'PATH': BASE_DIR / '.cache' / 'extraction.sqlite3',
+    'MAX_ENTRIES': 1024,
+    'DISK_MAX_ENTRIES': 100_000,
+    'TTL': 7 * 24 * 60 * 60,
+}
+
+
+# Fila local de extrações assíncronas (/api/jobs/)
+
+NFSE_JOBS = {
+    'WORKERS': 2,
+    'MAX_PENDING': 32,
+    'EXECUTOR': 'process',
+}
+
+
+# Extração assíncrona (/api/extract/async/): executor dedicado e limite de
+# extrações simultâneas por processo ASGI. None usa o número de núcleos.
+
+NFSE_ASYNC = {
+    'EXECUTOR': 'process',
+    'WORKERS': None,
+    'MAX_CONCURRENT': None,
+}
+
+
+# Extração em lote (/api/extract/batch/): executor compartilhado e arquivos
+# em andamento por requisição. None usa o número de núcleos (e 4 arquivos por
+# worker).
+
+NFSE_BATCH = {
+    'EXECUTOR': 'process',
+    'WORKERS': None,
+    'MAX_PENDING': None,
+}
+
+
+# Uploads: o primeiro handler interrompe a leitura de arquivos acima de
+# ExtractorConfig.MAX_FILE_BYTES; os demais são os padrões do Django.
+
+FILE_UPLOAD_HANDLERS = [
+    'extractor.uploads.UploadLimitHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+
+# Métricas por etapa da extração, expostas em /metrics (Prometheus)
+
+NFSE_METRICS_ENABLED = True
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -6,9 +6,31 @@ import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
 from PIL import Image
 
+from extractor import metrics
+from extractor.cache import get_default_cache
 from extractor.data_extractor import ExtractorConfig, NFSeExtractor
 
 
+@pytest.fixture(autouse=True)
+def extraction_cache(settings):
+    """Isola o cache da aplicação web em memória, limpo a cada teste."""
+    settings.NFSE_CACHE = {'PATH': None}
+    get_default_cache.cache_clear()
+    yield get_default_cache()
+    get_default_cache.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def extraction_metrics():
+    """Desliga as métricas por padrão; os testes que as usam as religam."""
+    enabled = metrics.is_enabled()
+    metrics.configure(False)
+    metrics.reset()
+    yield
+    metrics.configure(enabled)
+    metrics.reset()
+
+
 @pytest.fixture
 def extractor_config():
     """Fixture com configuração padrão do extrator."""
@@ -89,6 +111,38 @@ def uploaded_image_file():
     )
 
 
+@pytest.fixture
+def ocr_layout():
+    """
+    Fábrica de respostas do `pytesseract.image_to_data`: recebe pares
+    (topo, texto da linha) e devolve o dicionário palavra a palavra.
+    """
+
+    def build(lines, line_height=10):
+        data = {
+            key: []
+            for key in (
+                'text',
+                'block_num',
+                'par_num',
+                'line_num',
+                'top',
+                'height',
+            )
+        }
+        for line_num, (top, text) in enumerate(lines, start=1):
+            for word in text.split():
+                data['text'].append(word)
+                data['block_num'].append(1)
+                data['par_num'].append(1)
+                data['line_num'].append(line_num)
+                data['top'].append(top)
+                data['height'].append(line_height)
+        return data
+
+    return build
+
+
 @pytest.fixture
 def mock_successful_extraction():
     """Fixture com resultado esperado de extração."""
@@ -1,17 +1,29 @@
+import io
 import json
 import tempfile
+import zipfile
+from datetime import date
 from http import HTTPStatus
 from unittest.mock import patch
 
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client
 from django.urls import reverse
 
+from extractor import metrics
 from extractor.data_extractor import (
+    ExtractionTimeoutError,
+    ExtractorConfig,
     FileNotFoundError,
+    ImageTooLargeError,
     ProcessingError,
+    TooManyPagesError,
     UnsupportedFileTypeError,
 )
+from extractor.jobs import QueueFullError, get_job_queue
+from extractor.storage import save_records
+from extractor.uploads import get_batch_executor
 
 
 @pytest.mark.django_db
@@ -99,6 +111,53 @@ class TestExtractorViews:
         args, _ = mock_extract.call_args
         assert args[1] == 'image'
 
+    @patch('extractor.views.extract_nfse_data')
+    def test_extract_api_reuses_cached_result(
+        self, mock_extract, uploaded_pdf_file, mock_successful_extraction
+    ):
+        """Reenvios do mesmo arquivo não repetem a extração."""
+        mock_extract.return_value = mock_successful_extraction
+        for _ in range(2):
+            uploaded_pdf_file.seek(0)
+            response = self.client.post(
+                reverse('extractor:extract_api'), {'file': uploaded_pdf_file}
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert json.loads(response.content) == mock_successful_extraction
+        mock_extract.assert_called_once()
+
+    @patch('extractor.views.extract_async')
+    def test_extract_async_api_successful_upload(
+        self, mock_extract_async, uploaded_pdf_file, mock_successful_extraction
+    ):
+        """A versão assíncrona da API tem o mesmo contrato da síncrona."""
+        mock_extract_async.return_value = mock_successful_extraction
+        response = self.client.post(
+            reverse('extractor:extract_async_api'), {'file': uploaded_pdf_file}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert json.loads(response.content) == mock_successful_extraction
+        args, _ = mock_extract_async.call_args
+        assert args[1] == 'pdf'
+
+    @patch(
+        'extractor.views.extract_async',
+        side_effect=ProcessingError('Erro de processamento simulado'),
+    )
+    def test_extract_async_api_handles_extractor_errors(
+        self, mock_extract_async, uploaded_pdf_file
+    ):
+        """Erros do extrator viram 400 também na versão assíncrona."""
+        response = self.client.post(
+            reverse('extractor:extract_async_api'), {'file': uploaded_pdf_file}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_extract_async_api_rejects_get(self):
+        """A versão assíncrona também só aceita POST."""
+        response = self.client.get(reverse('extractor:extract_async_api'))
+        assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+
     @patch('extractor.views.extract_nfse_data')
     def test_extract_api_handles_custom_extractor_errors(
         self, mock_extract, uploaded_pdf_file
@@ -118,6 +177,38 @@ class TestExtractorViews:
             data = json.loads(response.content)
             assert str(error) in data['error']
 
+    @patch('extractor.views.extract_nfse_data')
+    def test_extract_api_maps_limits_to_status(
+        self, mock_extract, uploaded_pdf_file
+    ):
+        """Cada limite excedido tem o seu status HTTP."""
+        error_cases = [
+            (ImageTooLargeError('pixels'), HTTPStatus.UNPROCESSABLE_ENTITY),
+            (TooManyPagesError('páginas'), HTTPStatus.UNPROCESSABLE_ENTITY),
+            (ExtractionTimeoutError('tempo'), HTTPStatus.GATEWAY_TIMEOUT),
+        ]
+        for error, status in error_cases:
+            mock_extract.side_effect = error
+            uploaded_pdf_file.seek(0)
+            response = self.client.post(
+                reverse('extractor:extract_api'), {'file': uploaded_pdf_file}
+            )
+            assert response.status_code == status
+            assert json.loads(response.content)['error'] == str(error)
+
+    @patch('extractor.views.extract_nfse_data')
+    def test_extract_api_stops_oversized_upload(self, mock_extract):
+        """A leitura do upload para ao passar de MAX_FILE_BYTES: 413."""
+        upload = SimpleUploadedFile('nota.pdf', b'%PDF' + b'0' * 200_000)
+        with patch.object(ExtractorConfig, 'MAX_FILE_BYTES', 100_000):
+            response = self.client.post(
+                reverse('extractor:extract_api'), {'file': upload}
+            )
+
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        assert 'nota.pdf' in json.loads(response.content)['error']
+        mock_extract.assert_not_called()
+
     @patch(
         'extractor.views.extract_nfse_data',
         side_effect=Exception('Erro interno simulado'),
@@ -135,20 +226,340 @@ class TestExtractorViews:
         assert 'Erro interno simulado' in data['error']
 
     @patch('extractor.views.extract_nfse_data')
-    @patch('os.unlink', side_effect=OSError('Não foi possível apagar o ficheiro'))
-    @patch('os.path.exists', return_value=True)
-    def test_extract_api_cleanup_fails_gracefully(
-        self, mock_exists, mock_unlink, mock_extract, uploaded_pdf_file
+    def test_extract_api_reads_upload_without_temp_file(
+        self, mock_extract, uploaded_pdf_file, temp_dir, monkeypatch
     ):
         """
-        Assegura que a API não quebra e retorna sucesso para o utilizador,
-        mesmo que a limpeza do ficheiro temporário falhe em segundo plano.
+        Garante que uploads em memória são entregues diretamente ao extrator,
+        sem criação de arquivo temporário.
         """
-        mock_extract.return_value = {'status': 'ok'}
+        monkeypatch.chdir(temp_dir)
+        received = []
+
+        def extract(source, file_type):
+            received.append(source.read())
+            return {'status': 'ok'}
+
+        mock_extract.side_effect = extract
 
         response = self.client.post(
             reverse('extractor:extract_api'), {'file': uploaded_pdf_file}
         )
 
         assert response.status_code == HTTPStatus.OK
-        mock_unlink.assert_called_once()
+        assert received[0].startswith(b'\n    Dados do Prestador')
+        assert not list(temp_dir.iterdir())
+
+
+@pytest.fixture
+def thread_job_queue(settings):
+    """Fila de tarefas em threads, recriada para cada teste."""
+    settings.NFSE_JOBS = {'WORKERS': 1, 'MAX_PENDING': 1, 'EXECUTOR': 'thread'}
+    get_job_queue.cache_clear()
+    yield get_job_queue()
+    get_job_queue().shutdown()
+    get_job_queue.cache_clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestJobViews:
+    """Testa os endpoints de submissão e consulta de tarefas assíncronas."""
+
+    def setup_method(self):
+        """Prepara o cliente de testes do Django antes de cada teste."""
+        self.client = Client()
+
+    @patch('extractor.jobs.extract_nfse_data')
+    def test_submit_and_poll_job(
+        self,
+        mock_extract,
+        thread_job_queue,
+        uploaded_pdf_file,
+        mock_successful_extraction,
+    ):
+        """A submissão responde 202 e o resultado fica disponível na consulta."""
+        mock_extract.return_value = mock_successful_extraction
+
+        response = self.client.post(
+            reverse('extractor:jobs_api'), {'file': uploaded_pdf_file}
+        )
+        assert response.status_code == HTTPStatus.ACCEPTED
+        data = json.loads(response.content)
+        assert response['Location'] == data['url']
+
+        thread_job_queue.shutdown()
+        response = self.client.get(data['url'])
+
+        assert response.status_code == HTTPStatus.OK
+        job = json.loads(response.content)
+        assert job['status'] == 'done'
+        assert job['result'] == mock_successful_extraction
+
+    @patch('extractor.views.get_job_queue')
+    def test_submit_returns_429_when_queue_is_full(
+        self, mock_get_job_queue, uploaded_pdf_file
+    ):
+        """Com a fila cheia, a API aplica backpressure com HTTP 429."""
+        mock_get_job_queue.return_value.submit.side_effect = QueueFullError
+        response = self.client.post(
+            reverse('extractor:jobs_api'), {'file': uploaded_pdf_file}
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert 'Retry-After' in response
+
+    def test_submit_rejects_unsupported_file_type(self):
+        """As mesmas validações de upload da extração síncrona se aplicam."""
+        with tempfile.NamedTemporaryFile(suffix='.txt') as tmp_file:
+            response = self.client.post(
+                reverse('extractor:jobs_api'), {'file': tmp_file}
+            )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_poll_unknown_job_returns_404(self):
+        """Consultar uma tarefa inexistente retorna 404."""
+        response = self.client.get(
+            reverse(
+                'extractor:job_detail_api',
+                args=['00000000-0000-0000-0000-000000000000'],
+            )
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestMetricsView:
+    """Valida a exposição das métricas de extração."""
+
+    def setup_method(self):
+        """Prepara o cliente de testes do Django antes de cada teste."""
+        self.client = Client()
+
+    def test_metrics_exposes_prometheus_text(
+        self, uploaded_pdf_file, mock_successful_extraction
+    ):
+        """Após uma extração, /metrics expõe a etapa de upload."""
+        metrics.configure(True)
+        try:
+            with patch(
+                'extractor.views.extract_nfse_data',
+                return_value=mock_successful_extraction,
+            ):
+                self.client.post(
+                    reverse('extractor:extract_api'),
+                    {'file': uploaded_pdf_file},
+                )
+            response = self.client.get(reverse('extractor:metrics'))
+        finally:
+            metrics.configure(False)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        assert 'nfse_stage_duration_seconds_count{stage="upload"} 1' in (
+            response.content.decode()
+        )
+
+    def test_metrics_returns_404_when_disabled(self):
+        """Com as métricas desligadas, o endpoint não é exposto."""
+        response = self.client.get(reverse('extractor:metrics'))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.fixture
+def thread_batch_executor(settings):
+    """Executor do lote em threads, recriado para cada teste."""
+    settings.NFSE_BATCH = {'EXECUTOR': 'thread', 'WORKERS': 2, 'MAX_PENDING': 2}
+    get_batch_executor.cache_clear()
+    yield get_batch_executor()
+    get_batch_executor().shutdown()
+    get_batch_executor.cache_clear()
+
+
+def _ndjson(response):
+    content = b''.join(response.streaming_content).decode('utf-8')
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def _zip_upload(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return SimpleUploadedFile(
+        'notas.zip', buffer.getvalue(), content_type='application/zip'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('thread_batch_executor')
+class TestBatchView:
+    """Valida a extração de vários arquivos com resultados em NDJSON."""
+
+    def setup_method(self):
+        """Prepara o cliente de testes do Django antes de cada teste."""
+        self.client = Client()
+
+    @patch('extractor.uploads.extract_nfse_data')
+    def test_streams_one_line_per_file(
+        self, mock_extract, uploaded_pdf_file, mock_successful_extraction
+    ):
+        """Cada arquivo do campo "files" vira uma linha de NDJSON."""
+        mock_extract.return_value = mock_successful_extraction
+        second_file = SimpleUploadedFile('outra.pdf', b'outro conteudo')
+
+        response = self.client.post(
+            reverse('extractor:extract_batch_api'),
+            {'files': [uploaded_pdf_file, second_file]},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        records = _ndjson(response)
+        assert sorted(record['file'] for record in records) == [
+            'outra.pdf',
+            'test.pdf',
+        ]
+        assert all(
+            record['cnpj_prestador'] == '12.345.678/0001-90' for record in records
+        )
+
+    @patch('extractor.uploads.extract_nfse_data')
+    def test_zip_members_are_extracted(
+        self, mock_extract, mock_successful_extraction
+    ):
+        """Membros suportados de um .zip são extraídos; os demais, ignorados."""
+        mock_extract.return_value = mock_successful_extraction
+        upload = _zip_upload({
+            'janeiro/a.pdf': b'pdf a',
+            'janeiro/b.png': b'png b',
+            'leia-me.txt': b'texto',
+        })
+
+        response = self.client.post(
+            reverse('extractor:extract_batch_api'), {'files': upload}
+        )
+
+        files = sorted(record['file'] for record in _ndjson(response))
+        assert files == ['notas.zip/janeiro/a.pdf', 'notas.zip/janeiro/b.png']
+        assert {call.args[0] for call in mock_extract.call_args_list} == {
+            b'pdf a',
+            b'png b',
+        }
+
+    @patch('extractor.uploads.extract_nfse_data')
+    def test_failures_become_error_records(self, mock_extract, uploaded_pdf_file):
+        """Falhas de um arquivo não interrompem os demais."""
+        mock_extract.side_effect = ProcessingError('PDF corrompido')
+        unsupported = SimpleUploadedFile('notas.txt', b'texto')
+        invalid_zip = SimpleUploadedFile('lote.zip', b'nao e zip')
+
+        response = self.client.post(
+            reverse('extractor:extract_batch_api'),
+            {'files': [uploaded_pdf_file, unsupported, invalid_zip]},
+        )
+
+        errors = {record['file']: record['error'] for record in _ndjson(response)}
+        assert errors['test.pdf'] == 'PDF corrompido'
+        assert errors['notas.txt'] == "Extensão de arquivo não suportada: 'txt'"
+        assert errors['lote.zip'].startswith('Arquivo compactado inválido')
+
+    @patch('extractor.uploads.extract_nfse_data')
+    def test_cached_files_skip_the_executor(
+        self,
+        mock_extract,
+        extraction_cache,
+        uploaded_pdf_file,
+        mock_successful_extraction,
+    ):
+        """Arquivos já extraídos são respondidos pelo cache."""
+        content = uploaded_pdf_file.read()
+        uploaded_pdf_file.seek(0)
+        extraction_cache.set(
+            extraction_cache.key_for(content, 'pdf'), mock_successful_extraction
+        )
+
+        response = self.client.post(
+            reverse('extractor:extract_batch_api'), {'files': uploaded_pdf_file}
+        )
+
+        assert _ndjson(response) == [
+            {'file': 'test.pdf', **mock_successful_extraction}
+        ]
+        mock_extract.assert_not_called()
+
+    @patch('extractor.uploads.extract_nfse_data')
+    def test_oversized_file_rejects_batch(self, mock_extract, uploaded_pdf_file):
+        """Um arquivo acima de MAX_FILE_BYTES rejeita o lote com 413."""
+        big_file = SimpleUploadedFile('grande.pdf', b'0' * 200_000)
+        with patch.object(ExtractorConfig, 'MAX_FILE_BYTES', 100_000):
+            response = self.client.post(
+                reverse('extractor:extract_batch_api'),
+                {'files': [uploaded_pdf_file, big_file]},
+            )
+
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        mock_extract.assert_not_called()
+
+    def test_requires_files(self):
+        """Sem arquivos, a requisição é rejeitada antes do streaming."""
+        response = self.client.post(reverse('extractor:extract_batch_api'))
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_rejects_get(self):
+        """Apenas POST é aceito."""
+        response = self.client.get(reverse('extractor:extract_batch_api'))
+        assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+
+
+@pytest.mark.django_db
+class TestRecordsView:
+    """Valida a consulta das notas persistidas."""
+
+    def setup_method(self):
+        """Prepara o cliente e grava notas de dois meses."""
+        self.client = Client()
+        record = {
+            'file': 'nota.pdf',
+            'cnpj_prestador': '12.345.678/0001-90',
+            'nome_prestador': 'EMPRESA FICTÍCIA LTDA',
+        }
+        save_records([record] * 3, date(2025, 1, 1))
+        save_records([record], date(2025, 2, 1))
+
+    def test_lists_invoices_of_cnpj_in_month(self):
+        """Filtra por CNPJ e competência e indica a próxima página."""
+        response = self.client.get(
+            reverse('extractor:records_api'),
+            {'cnpj': '12345678000190', 'competencia': '01/2025', 'limit': 2},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        data = json.loads(response.content)
+        assert [record['competencia'] for record in data['results']] == [
+            '2025-01',
+            '2025-01',
+        ]
+
+        data = json.loads(self.client.get(data['next']).content)
+        assert len(data['results']) == 1
+        assert data['next'] is None
+
+    @patch('extractor.storage.MAX_PAGE_SIZE', 2)
+    @patch('extractor.views.MAX_PAGE_SIZE', 2)
+    def test_limit_above_maximum_keeps_next_page(self):
+        """Um limit acima do máximo é reduzido sem perder a próxima página."""
+        response = self.client.get(
+            reverse('extractor:records_api'), {'limit': 5000}
+        )
+
+        data = json.loads(response.content)
+        assert len(data['results']) == 2  # noqa: PLR2004
+        data = json.loads(self.client.get(data['next']).content)
+        assert len(data['results']) == 2  # noqa: PLR2004
+        assert data['next'] is not None
+
+    def test_rejects_invalid_competencia(self):
+        """Competência em formato desconhecido responde 400."""
+        response = self.client.get(
+            reverse('extractor:records_api'), {'competencia': '2025'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
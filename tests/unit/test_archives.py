@@ -0,0 +1,87 @@
+import io
+import tarfile
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from extractor.archives import is_archive, iter_members
+from extractor.data_extractor import (
+    ExtractorConfig,
+    FileTooLargeError,
+    ProcessingError,
+)
+
+
+def _tar_gz(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class TestArchives:
+    """Valida a leitura de arquivos compactados em memória."""
+
+    def test_recognizes_archive_names(self):
+        """.zip, .tar, .tar.gz e .tgz são arquivos compactados."""
+        assert all(
+            is_archive(name) for name in ('a.zip', 'a.TAR', 'a.tar.gz', 'a.tgz')
+        )
+        assert not is_archive('nota.pdf')
+
+    def test_reads_zip_members_from_file_object(self):
+        """Membros suportados são lidos; os demais, ignorados."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('a.pdf', b'pdf')
+            archive.writestr('pasta/', b'')
+            archive.writestr('notas.txt', b'texto')
+        buffer.seek(0)
+
+        assert list(iter_members(buffer, 'lote.zip')) == [
+            ('lote.zip/a.pdf', b'pdf')
+        ]
+
+    def test_streams_tar_gz_members_from_path(self, temp_dir):
+        """Arquivos .tar.gz são percorridos em ordem, em modo de fluxo."""
+        archive_path = temp_dir / 'lote.tar.gz'
+        archive_path.write_bytes(
+            _tar_gz({'b.png': b'png', 'a.pdf': b'pdf', 'c.doc': b'doc'})
+        )
+
+        members = list(iter_members(archive_path, 'lote.tar.gz'))
+
+        assert members == [
+            ('lote.tar.gz/b.png', b'png'),
+            ('lote.tar.gz/a.pdf', b'pdf'),
+        ]
+
+    @pytest.mark.parametrize('name', ['lote.zip', 'lote.tar.gz'])
+    def test_invalid_archive_raises_processing_error(self, name):
+        """Conteúdo inválido vira ProcessingError."""
+        with pytest.raises(ProcessingError, match='compactado inválido'):
+            list(iter_members(b'conteudo qualquer', name))
+
+    @pytest.mark.parametrize('name', ['lote.zip', 'lote.tar.gz'])
+    def test_oversized_member_becomes_error(self, name):
+        """Um membro acima de MAX_FILE_BYTES vira erro; os demais seguem."""
+        members = {'grande.pdf': b'0' * 2_000_000, 'a.pdf': b'pdf'}
+        if name.endswith('.zip'):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for member_name, content in members.items():
+                    archive.writestr(member_name, content)
+            content = buffer.getvalue()
+        else:
+            content = _tar_gz(members)
+
+        with patch.object(ExtractorConfig, 'MAX_FILE_BYTES', 1_000_000):
+            (big_name, error), small = iter_members(content, name)
+
+        assert big_name == f'{name}/grande.pdf'
+        assert isinstance(error, FileTooLargeError)
+        assert small == (f'{name}/a.pdf', b'pdf')
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from extractor.async_extraction import extract_async, get_extraction_executor
+
+MAX_CONCURRENT = 2
+
+
+@pytest.fixture
+def thread_executor(settings):
+    """Executor em threads, para que os mocks valham nas extrações."""
+    settings.NFSE_ASYNC = {
+        'EXECUTOR': 'thread',
+        'WORKERS': 4,
+        'MAX_CONCURRENT': MAX_CONCURRENT,
+    }
+    get_extraction_executor.cache_clear()
+    yield get_extraction_executor()
+    get_extraction_executor().shutdown()
+    get_extraction_executor.cache_clear()
+
+
+class TestExtractAsync:
+    """Testa a extração assíncrona com concorrência limitada."""
+
+    @patch('extractor.async_extraction.extract_nfse_data')
+    def test_limits_concurrent_extractions(self, mock_extract, thread_executor):
+        """Nunca há mais extrações simultâneas do que o limite configurado."""
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def extract(source, file_type):
+            with lock:
+                running.append(source)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(source)
+            return {'source': source.decode()}
+
+        mock_extract.side_effect = extract
+
+        async def extract_many():
+            return await asyncio.gather(
+                *(
+                    extract_async(f'nota {index}'.encode(), 'pdf')
+                    for index in range(6)
+                )
+            )
+
+        results = asyncio.run(extract_many())
+
+        assert [result['source'] for result in results] == [
+            f'nota {index}' for index in range(6)
+        ]
+        assert max(peak) == MAX_CONCURRENT
+
+    @patch('extractor.async_extraction.extract_nfse_data')
+    def test_reuses_cached_result(
+        self, mock_extract, thread_executor, mock_successful_extraction
+    ):
+        """Conteúdo já extraído não volta ao executor."""
+        mock_extract.return_value = mock_successful_extraction
+
+        for _ in range(2):
+            result = asyncio.run(extract_async(b'conteudo', 'pdf'))
+            assert result == mock_successful_extraction
+
+        mock_extract.assert_called_once()
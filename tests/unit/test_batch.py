@@ -0,0 +1,166 @@
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from extractor.batch import collect_files, extract_file, run_batch
+
+SAMPLE_PDF = Path('test_files/NFSe_ficticia_layout_completo.pdf')
+
+
+def _crash_on_bomb(source, file_type):
+    """Extração que derruba o processo worker em 'bomba.pdf'."""
+    if str(source).endswith('bomba.pdf'):
+        os._exit(1)
+    return {'cnpj_prestador': None, 'nome_prestador': None}
+
+
+class TestCollectFiles:
+    """Valida a expansão de diretórios, globs e manifestos em arquivos."""
+
+    def test_collect_files_from_directory(self, temp_dir):
+        """Diretórios são percorridos e filtrados pelas extensões suportadas."""
+        (temp_dir / 'sub').mkdir()
+        (temp_dir / 'a.pdf').touch()
+        (temp_dir / 'sub' / 'b.png').touch()
+        (temp_dir / 'notas.txt').touch()
+
+        files = list(collect_files([str(temp_dir)]))
+
+        assert files == [temp_dir / 'a.pdf', temp_dir / 'sub' / 'b.png']
+
+    def test_collect_files_from_glob_and_manifest(self, temp_dir):
+        """Globs e manifesto são combinados sem repetir arquivos."""
+        (temp_dir / 'a.pdf').touch()
+        (temp_dir / 'b.pdf').touch()
+        manifest = temp_dir / 'manifesto.txt'
+        manifest.write_text(
+            f'# comentário\n\n{temp_dir / "a.pdf"}\n{temp_dir / "c.jpg"}\n',
+            encoding='utf-8',
+        )
+
+        files = list(
+            collect_files([str(temp_dir / '*.pdf')], manifest=str(manifest))
+        )
+
+        assert files == [
+            temp_dir / 'a.pdf',
+            temp_dir / 'b.pdf',
+            temp_dir / 'c.jpg',
+        ]
+
+    def test_collect_files_streams_manifest(self, temp_dir):
+        """O manifesto é lido sob demanda, linha a linha."""
+        (temp_dir / 'a.pdf').touch()
+        manifest = temp_dir / 'manifesto.txt'
+        manifest.write_text(f'{temp_dir / "b.pdf"}\n', encoding='utf-8')
+
+        files = collect_files([str(temp_dir / 'a.pdf')], manifest=str(manifest))
+        assert next(files) == temp_dir / 'a.pdf'
+        manifest.write_text(f'{temp_dir / "c.pdf"}\n', encoding='utf-8')
+        assert list(files) == [temp_dir / 'c.pdf']
+
+    def test_collect_files_keeps_explicit_unsupported_file(self, temp_dir):
+        """Caminhos explícitos são mantidos para que a falha seja reportada."""
+        files = list(collect_files([str(temp_dir / 'nota.docx')]))
+        assert files == [temp_dir / 'nota.docx']
+
+
+class TestExtractFile:
+    """Testa o processamento de um arquivo isolado dentro do lote."""
+
+    @patch('extractor.batch.extract_nfse_data')
+    def test_extract_file_successful(
+        self, mock_extract, mock_successful_extraction
+    ):
+        """O resultado da extração é acompanhado do caminho do arquivo."""
+        mock_extract.return_value = mock_successful_extraction
+        record = extract_file('nota.pdf')
+        assert record == {'file': 'nota.pdf', **mock_successful_extraction}
+        mock_extract.assert_called_once_with('nota.pdf', 'pdf')
+
+    def test_extract_file_reports_error(self):
+        """Erros viram registros com a chave 'error', sem exceção."""
+        record = extract_file('nota.docx')
+        assert record['file'] == 'nota.docx'
+        assert 'Extensão de arquivo não suportada' in record['error']
+
+
+class TestRunBatch:
+    """Testa a execução do lote em um pool de processos."""
+
+    def test_run_batch_isolates_failures(self, mock_successful_extraction):
+        """Um arquivo com erro não interrompe o processamento dos demais."""
+        records = list(run_batch([SAMPLE_PDF, Path('inexistente.pdf')], workers=2))
+
+        by_file = {record['file']: record for record in records}
+        assert by_file[str(SAMPLE_PDF)] == {
+            'file': str(SAMPLE_PDF),
+            **mock_successful_extraction,
+        }
+        assert 'Arquivo não encontrado' in by_file['inexistente.pdf']['error']
+
+    @patch('extractor.batch.extract_nfse_data', _crash_on_bomb)
+    def test_run_batch_survives_worker_crash(self):
+        """Um worker que morre só gera erro para o arquivo que o derrubou."""
+        files = [Path(f'nota{index}.pdf') for index in range(23)]
+        files.insert(5, Path('bomba.pdf'))
+
+        records = list(run_batch(files, workers=2))
+
+        errors = [record for record in records if 'error' in record]
+        assert [record['file'] for record in errors] == ['bomba.pdf']
+        assert 'Falha no worker' in errors[0]['error']
+        assert sorted(record['file'] for record in records) == sorted(
+            map(str, files)
+        )
+
+    def test_run_batch_expands_archives(
+        self, temp_dir, mock_successful_extraction
+    ):
+        """Cada membro de um .zip vira um registro, lido em memória."""
+        archive_path = temp_dir / 'notas.zip'
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            archive.write(SAMPLE_PDF, 'janeiro/nota.pdf')
+            archive.writestr('leia-me.txt', 'texto')
+
+        records = list(run_batch([archive_path], workers=1))
+
+        assert records == [
+            {
+                'file': f'{archive_path}/janeiro/nota.pdf',
+                **mock_successful_extraction,
+            }
+        ]
+
+    def test_run_batch_reports_invalid_archive(self, temp_dir):
+        """Um arquivo compactado ilegível gera um registro de erro."""
+        archive_path = temp_dir / 'notas.tar.gz'
+        archive_path.write_bytes(b'nao e um tar')
+
+        records = list(run_batch([archive_path], workers=1))
+
+        assert records[0]['file'] == str(archive_path)
+        assert 'Arquivo compactado inválido' in records[0]['error']
+
+    def test_run_batch_skips_indexed_files(
+        self, temp_dir, mock_successful_extraction
+    ):
+        """Com cache em disco, arquivos inalterados não vão aos workers."""
+        file_path = temp_dir / 'nota.pdf'
+        shutil.copy(SAMPLE_PDF, file_path)
+        os.utime(file_path, (1_000_000, 1_000_000))
+        cache_path = str(temp_dir / 'cache.sqlite3')
+        first = list(run_batch([file_path], workers=1, cache_path=cache_path))
+
+        with patch.object(ProcessPoolExecutor, 'submit') as mock_submit:
+            second = list(run_batch([file_path], workers=1, cache_path=cache_path))
+
+        mock_submit.assert_not_called()
+        assert first == second
+        assert (
+            second[0]['cnpj_prestador']
+            == (mock_successful_extraction['cnpj_prestador'])
+        )
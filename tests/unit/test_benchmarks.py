@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.preprocessing import field_accuracy
+from benchmarks.preprocessing import run_benchmarks as run_preprocessing_benchmarks
+from benchmarks.run import compare, percentile, summarize
+from benchmarks.startup import (
+    SCENARIOS,
+    heavy_modules,
+    parse_importtime,
+    run_scenario,
+)
+from extractor.data_extractor import extract_nfse_data
+
+
+class TestSyntheticCorpus:
+    """Valida o corpus sintético usado pelos benchmarks."""
+
+    def test_generated_pdfs_match_expected_results(self, temp_dir):
+        """Os PDFs gerados são extraídos com os dados esperados."""
+        manifest = generate_corpus(temp_dir)
+
+        pdfs = [entry for entry in manifest if entry['file_type'] == 'pdf']
+        assert pdfs
+        for entry in pdfs:
+            result = extract_nfse_data(str(entry['path']), 'pdf')
+            assert result == entry['expected'], entry['variant']
+
+    def test_corpus_is_reproducible(self, temp_dir):
+        """A mesma semente gera os mesmos documentos."""
+        first = generate_corpus(temp_dir / 'a', seed=7)
+        second = generate_corpus(temp_dir / 'b', seed=7)
+        assert [entry['expected'] for entry in first] == [
+            entry['expected'] for entry in second
+        ]
+
+
+class TestBenchmarkStatistics:
+    """Testa o resumo estatístico e a comparação com a baseline."""
+
+    def test_percentile_interpolates(self):
+        """Percentis entre amostras são interpolados linearmente."""
+        assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5  # noqa: PLR2004
+
+    def test_summarize_reports_milliseconds(self):
+        """Latências em segundos viram percentis em milissegundos."""
+        summary = summarize([0.001, 0.002, 0.003])
+        assert summary['p50_ms'] == 2.0  # noqa: PLR2004
+        assert summary['samples'] == 3  # noqa: PLR2004
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        """Só pioras acima da tolerância são acusadas."""
+        baseline = {'results': {'pdf_reader': {'p50_ms': 10.0, 'p95_ms': 20.0}}}
+        current = {'results': {'pdf_reader': {'p50_ms': 11.0, 'p95_ms': 30.0}}}
+
+        regressions = compare(current, baseline, tolerance=0.25)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith('pdf_reader.p95_ms')
+
+
+class TestPreprocessingBenchmark:
+    """Testa o benchmark de pré-processamento das imagens."""
+
+    def test_field_accuracy_counts_exact_matches(self):
+        """A acurácia é a fração de campos extraídos exatamente."""
+        expected = {'cnpj_prestador': '1', 'nome_prestador': 'A'}
+        result = {'cnpj_prestador': '1', 'nome_prestador': 'B'}
+        assert field_accuracy(result, expected) == 0.5  # noqa: PLR2004
+
+    def test_presets_report_latency_and_accuracy(
+        self, sample_nfse_text, ocr_layout
+    ):
+        """Cada preset mede pré-processamento, OCR e acurácia."""
+        layout = ocr_layout([
+            (200, 'Dados do Prestador de Serviços'),
+            (350, 'Dados do Tomador de Serviços'),
+        ])
+        with (
+            patch('pytesseract.image_to_string', return_value=sample_nfse_text),
+            patch('pytesseract.image_to_data', return_value=layout),
+        ):
+            report = run_preprocessing_benchmarks(repeat=1)
+
+        assert report['samples']
+        for result in report['results'].values():
+            assert result['preprocess']['samples'] == len(report['samples'])
+            assert 'p50_ms' in result['ocr']
+            assert 0 <= result['field_accuracy'] <= 1
+
+
+class TestStartupBenchmark:
+    """Valida o benchmark de inicialização da CLI."""
+
+    def test_parse_importtime(self):
+        """A saída de `-X importtime` vira o tempo cumulativo por módulo."""
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   pdfminer.utils\n'
+            'import time:       300 |        420 | pdfminer\n'
+        )
+        modules = parse_importtime(output)
+        assert modules == {'pdfminer.utils': 120, 'pdfminer': 420}
+        assert heavy_modules(modules) == ['pdfminer', 'pdfminer.utils']
+
+    def test_help_does_not_load_readers(self):
+        """`extract_cli.py --help` não carrega pdfplumber, OCR nem Pillow."""
+        result = run_scenario(['--help'], repeat=1)
+        assert result['heavy_modules'] == []
+
+    def test_single_file_does_not_load_other_modes(self):
+        """`--help` e um PDF não carregam os módulos dos outros modos."""
+        for name in ('help', 'single_pdf'):
+            result = run_scenario(SCENARIOS[name][0], repeat=1)
+            assert result['mode_modules'] == [], name
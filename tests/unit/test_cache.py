@@ -0,0 +1,180 @@
+import io
+import os
+from unittest.mock import MagicMock, patch
+
+from extractor.cache import (
+    ExtractionCache,
+    MemoryCache,
+    SQLiteCache,
+    build_cache,
+    file_digest,
+    make_key,
+)
+from extractor.data_extractor import ExtractorConfig
+
+RESULT = {'cnpj_prestador': '12.345.678/0001-90', 'nome_prestador': 'EMPRESA'}
+
+
+class TestCacheKey:
+    """Valida a chave endereçada por conteúdo e configuração."""
+
+    def test_same_content_produces_same_key(self, temp_dir):
+        """Arquivos com o mesmo conteúdo compartilham a chave."""
+        first = temp_dir / 'a.pdf'
+        second = temp_dir / 'b.pdf'
+        first.write_bytes(b'conteudo')
+        second.write_bytes(b'conteudo')
+        assert file_digest(str(first)) == file_digest(str(second))
+
+    def test_digest_of_file_object_restores_position(self):
+        """O hash de um upload não consome o conteúdo a ser extraído."""
+        upload = io.BytesIO(b'conteudo')
+        assert file_digest(upload) == file_digest(b'conteudo')
+        assert upload.read() == b'conteudo'
+
+    def test_config_change_produces_new_key(self):
+        """Alterar um padrão do extrator invalida as chaves antigas."""
+
+        class CustomConfig(ExtractorConfig):
+            PRESTADOR_END = r'Dados do Destinatário'
+
+        assert make_key('abc', 'pdf') != make_key('abc', 'pdf', CustomConfig())
+
+
+class TestMemoryCache:
+    """Testa a camada em memória."""
+
+    def test_evicts_least_recently_used(self):
+        """Ao exceder o limite, a entrada menos usada é descartada."""
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', RESULT)
+        cache.set('b', RESULT)
+        cache.get('a')
+        cache.set('c', RESULT)
+        assert cache.get('b') is None
+        assert cache.get('a') == RESULT
+
+    @patch('extractor.cache.time.monotonic')
+    def test_expires_entries_after_ttl(self, mock_monotonic):
+        """Entradas mais antigas que o TTL não são retornadas."""
+        cache = MemoryCache(ttl=10)
+        mock_monotonic.return_value = 100
+        cache.set('a', RESULT)
+        mock_monotonic.return_value = 111
+        assert cache.get('a') is None
+
+
+class TestSQLiteCache:
+    """Testa a camada em disco."""
+
+    def test_persists_between_instances(self, temp_dir):
+        """Um novo processo enxerga os resultados já gravados."""
+        SQLiteCache(temp_dir / 'cache.sqlite3').set('a', RESULT)
+        assert SQLiteCache(temp_dir / 'cache.sqlite3').get('a') == RESULT
+
+    def test_evicts_beyond_max_entries(self, temp_dir):
+        """O tamanho do cache em disco é limitado."""
+        cache = SQLiteCache(temp_dir / 'cache.sqlite3', max_entries=1)
+        cache.set('a', RESULT)
+        cache.set('b', RESULT)
+        assert len(cache) == 1
+        assert cache.get('b') == RESULT
+
+    @patch('extractor.cache.time.time')
+    def test_expires_entries_after_ttl(self, mock_time, temp_dir):
+        """Entradas expiradas são removidas na leitura."""
+        cache = SQLiteCache(temp_dir / 'cache.sqlite3', ttl=10)
+        mock_time.return_value = 100
+        cache.set('a', RESULT)
+        mock_time.return_value = 111
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_file_index_requires_same_mtime_and_size(self, temp_dir):
+        """O digest indexado só vale enquanto mtime e tamanho não mudam."""
+        cache = SQLiteCache(temp_dir / 'cache.sqlite3')
+        cache.set_file_digest('/notas/a.pdf', 100, 10, 'abc')
+
+        assert cache.get_file_digest('/notas/a.pdf', 100, 10) == 'abc'
+        assert cache.get_file_digest('/notas/a.pdf', 101, 10) is None
+        assert cache.get_file_digest('/notas/a.pdf', 100, 11) is None
+
+
+class TestExtractionCache:
+    """Testa o cache em camadas e seus contadores."""
+
+    def test_get_or_extract_counts_hits_and_misses(self, temp_dir):
+        """A extração só roda no primeiro acesso ao mesmo conteúdo."""
+        file_path = temp_dir / 'nota.pdf'
+        file_path.write_bytes(b'conteudo')
+        extract = MagicMock(return_value=RESULT)
+        cache = build_cache()
+
+        first = cache.get_or_extract(str(file_path), 'pdf', extract)
+        second = cache.get_or_extract(str(file_path), 'pdf', extract)
+
+        assert first == second == RESULT
+        extract.assert_called_once_with(str(file_path), 'pdf')
+        assert cache.stats == {'hits': 1, 'misses': 1}
+
+    def test_disk_hit_is_promoted_to_memory(self, temp_dir):
+        """Um acerto na camada em disco popula a camada em memória."""
+        memory = MemoryCache()
+        disk = SQLiteCache(temp_dir / 'cache.sqlite3')
+        disk.set('a', RESULT)
+        cache = ExtractionCache(memory, disk)
+
+        assert cache.get('a') == RESULT
+        assert memory.get('a') == RESULT
+
+
+class TestFileIndex:
+    """Testa o índice de arquivos já processados."""
+
+    def _old_file(self, temp_dir, content=b'conteudo'):
+        file_path = temp_dir / 'nota.pdf'
+        file_path.write_bytes(content)
+        os.utime(file_path, (1_000_000, 1_000_000))
+        return str(file_path)
+
+    def test_unchanged_file_is_not_read_again(self, temp_dir):
+        """Em uma nova execução, o arquivo inalterado não é relido."""
+        file_path = self._old_file(temp_dir)
+        extract = MagicMock(return_value=RESULT)
+        build_cache(path=temp_dir / 'cache.sqlite3').get_or_extract(
+            file_path, 'pdf', extract
+        )
+
+        cache = build_cache(path=temp_dir / 'cache.sqlite3')
+        with patch('extractor.cache.file_digest') as mock_digest:
+            assert cache.lookup_file(file_path, 'pdf') == RESULT
+            assert cache.get_or_extract(file_path, 'pdf', extract) == RESULT
+
+        mock_digest.assert_not_called()
+        extract.assert_called_once()
+
+    def test_modified_file_is_extracted_again(self, temp_dir):
+        """Mudanças de tamanho ou mtime invalidam a entrada do índice."""
+        file_path = self._old_file(temp_dir)
+        cache = build_cache(path=temp_dir / 'cache.sqlite3')
+        cache.get_or_extract(file_path, 'pdf', MagicMock(return_value=RESULT))
+
+        self._old_file(temp_dir, b'outro conteudo')
+
+        assert cache.lookup_file(file_path, 'pdf') is None
+
+    def test_recently_modified_file_is_not_indexed(self, temp_dir):
+        """Um arquivo recém-gravado ainda pode mudar sem alterar o mtime."""
+        file_path = temp_dir / 'nota.pdf'
+        file_path.write_bytes(b'conteudo')
+        cache = build_cache(path=temp_dir / 'cache.sqlite3')
+        cache.get_or_extract(str(file_path), 'pdf', MagicMock(return_value=RESULT))
+
+        assert cache.lookup_file(str(file_path), 'pdf') is None
+
+    def test_lookup_requires_disk_tier(self, temp_dir):
+        """Sem a camada em disco não há índice."""
+        file_path = self._old_file(temp_dir)
+        cache = build_cache()
+        cache.get_or_extract(file_path, 'pdf', MagicMock(return_value=RESULT))
+        assert cache.lookup_file(file_path, 'pdf') is None
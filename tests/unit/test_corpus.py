@@ -0,0 +1,73 @@
+import gzip
+import json
+
+import pytest
+
+from extractor.corpus import extract_corpus, iter_corpus
+from extractor.data_extractor import ProcessingError
+
+
+@pytest.fixture
+def corpus_file(temp_dir, sample_nfse_text):
+    """Corpus JSON Lines com objetos, uma string solta e uma linha vazia."""
+    corpus_path = temp_dir / 'corpus.jsonl'
+    lines = [
+        json.dumps({'id': 'nota-1', 'text': sample_nfse_text}),
+        '',
+        json.dumps('Texto sem dados'),
+        json.dumps({'id': 'nota-3', 'text': sample_nfse_text}),
+    ]
+    corpus_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return corpus_path
+
+
+class TestIterCorpus:
+    """Valida a leitura de corpora de textos brutos."""
+
+    def test_iter_corpus_reads_objects_and_strings(self, corpus_file):
+        """Objetos usam o 'id' informado; strings, o número da linha."""
+        ids = [record_id for record_id, _ in iter_corpus(str(corpus_file))]
+        assert ids == ['nota-1', '3', 'nota-3']
+
+    def test_iter_corpus_reads_gzip(self, temp_dir):
+        """Corpora compactados com gzip são lidos sem descompactar no disco."""
+        corpus_path = temp_dir / 'corpus.jsonl.gz'
+        with gzip.open(corpus_path, 'wt', encoding='utf-8') as corpus:
+            corpus.write(json.dumps({'id': 'a', 'text': 'texto'}) + '\n')
+        assert list(iter_corpus(str(corpus_path))) == [('a', 'texto')]
+
+    def test_iter_corpus_rejects_invalid_line(self, temp_dir):
+        """Linhas inválidas são reportadas com o número da linha."""
+        corpus_path = temp_dir / 'corpus.jsonl'
+        corpus_path.write_text('{"id": "a"}\n', encoding='utf-8')
+        with pytest.raises(ProcessingError, match='Linha 1 do corpus inválida'):
+            list(iter_corpus(str(corpus_path)))
+
+
+class TestExtractCorpus:
+    """Testa a reextração em lotes colunares."""
+
+    def test_extract_corpus_yields_columnar_batches(
+        self, corpus_file, mock_successful_extraction
+    ):
+        """Cada lote traz uma lista por coluna, alinhadas pelo 'id'."""
+        batches = list(extract_corpus(str(corpus_file), batch_size=2))
+
+        assert batches == [
+            {
+                'id': ['nota-1', '3'],
+                'cnpj_prestador': [
+                    mock_successful_extraction['cnpj_prestador'],
+                    None,
+                ],
+                'nome_prestador': [
+                    mock_successful_extraction['nome_prestador'],
+                    None,
+                ],
+            },
+            {
+                'id': ['nota-3'],
+                'cnpj_prestador': [mock_successful_extraction['cnpj_prestador']],
+                'nome_prestador': [mock_successful_extraction['nome_prestador']],
+            },
+        ]
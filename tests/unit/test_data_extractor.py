@@ -1,22 +1,33 @@
+import io
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import pdfplumber
 import pytesseract
 import pytest
 from pdfminer.pdfparser import PDFSyntaxError
+from PIL import Image
 
+from benchmarks.corpus import write_pdf
 from extractor.data_extractor import (
+    ExtractionTimeoutError,
     ExtractorConfig,
     FileNotFoundError,
+    FileTooLargeError,
     ImageReader,
+    ImageTooLargeError,
     NFSeExtractor,
     PDFReader,
     ProcessingError,
     Reader,
+    TooManyPagesError,
     UnsupportedFileTypeError,
     extract_nfse_data,
     get_reader,
 )
 
+SAMPLE_PDF = Path('test_files/NFSe_ficticia_layout_completo.pdf')
+
 
 class TestReaderBaseClass:
     """Testa o contrato da classe base 'Reader'."""
@@ -73,9 +84,10 @@ class TestPDFReader:
 
     @patch('pdfplumber.open')
     def test_pdf_reader_no_extractable_text(self, mock_pdfplumber_open, temp_dir):
-        """Testa PDF existente, mas sem texto extraível."""
+        """Testa PDF existente, mas sem texto extraível nem imagens."""
         mock_page = MagicMock()
         mock_page.extract_text.return_value = '   '
+        mock_page.images = []
         mock_pdf = MagicMock()
         mock_pdf.pages = [mock_page]
         mock_pdfplumber_open.return_value.__enter__.return_value = mock_pdf
@@ -89,6 +101,37 @@ class TestPDFReader:
         ):
             reader.read(str(pdf_path))
 
+    @patch('pdfplumber.open')
+    def test_iter_pages_extracts_text_once_per_page(
+        self, mock_pdfplumber_open, temp_dir
+    ):
+        """Garante uma única análise de layout por página, entregue sob demanda."""
+        mock_pages = [MagicMock(), MagicMock(), MagicMock()]
+        for number, mock_page in enumerate(mock_pages, start=1):
+            mock_page.extract_text.return_value = f'Página {number}'
+        mock_pdf = MagicMock()
+        mock_pdf.pages = mock_pages
+        mock_pdfplumber_open.return_value.__enter__.return_value = mock_pdf
+
+        pdf_path = temp_dir / 'multi.pdf'
+        pdf_path.touch()
+
+        pages = PDFReader.iter_pages(str(pdf_path))
+        assert next(pages) == 'Página 1'
+        pages.close()
+
+        assert mock_pages[0].extract_text.call_count == 1
+        mock_pages[1].extract_text.assert_not_called()
+        mock_pages[2].extract_text.assert_not_called()
+
+    def test_pdf_reader_accepts_in_memory_sources(self):
+        """Bytes, memoryviews e objetos de arquivo são lidos sem tocar o disco."""
+        content = SAMPLE_PDF.read_bytes()
+        expected = PDFReader.read(str(SAMPLE_PDF))
+
+        for source in (content, memoryview(content), io.BytesIO(content)):
+            assert PDFReader.read(source) == expected
+
     @patch('pdfplumber.open', side_effect=PDFSyntaxError('Ficheiro corrompido'))
     def test_pdf_reader_syntax_error(self, mock_pdfplumber_open, temp_dir):
         """Valida o tratamento de erro para arquivos PDF corrompidos."""
@@ -120,6 +163,128 @@ class TestPDFReader:
             reader.read('caminho/qualquer.pdf')
 
 
+@pytest.fixture
+def unmarked_pdf(temp_dir):
+    """PDF com camada de texto, mas sem o cabeçalho do prestador."""
+    pdf_path = temp_dir / 'sem_marcador.pdf'
+    write_pdf([['Documento sem dados do emitente', 'Linha dois']], pdf_path)
+    return pdf_path
+
+
+class TestPDFFastPath:
+    """Valida a leitura direta da camada de texto e o retorno ao pdfplumber."""
+
+    def test_marked_pdf_skips_pdfplumber(self):
+        """Com o marcador do prestador, o pdfplumber não é aberto."""
+        with patch('pdfplumber.open', wraps=pdfplumber.open) as mock_open:
+            result = extract_nfse_data(str(SAMPLE_PDF), 'pdf')
+
+        mock_open.assert_not_called()
+        assert result == {
+            'cnpj_prestador': '12.345.678/0001-90',
+            'nome_prestador': 'EMPRESA FICTÍCIA LTDA',
+        }
+
+    def test_fast_text_uses_unix_line_breaks(self):
+        """As quebras de linha do pdfium são normalizadas."""
+        assert '\r' not in PDFReader.read(str(SAMPLE_PDF))
+
+    def test_unmarked_pdf_falls_back_to_pdfplumber(self, unmarked_pdf):
+        """Sem o marcador, o texto vem do pdfplumber."""
+        with patch('pdfplumber.open', wraps=pdfplumber.open) as mock_open:
+            text = PDFReader.read(str(unmarked_pdf))
+
+        mock_open.assert_called_once()
+        assert 'Documento sem dados do emitente' in text
+
+    def test_fallback_rewinds_file_objects(self, unmarked_pdf):
+        """Um upload lido pelo pdfium é relido do início pelo pdfplumber."""
+        upload = io.BytesIO(unmarked_pdf.read_bytes())
+        assert 'Linha dois' in PDFReader.read(upload)
+
+    def test_fast_path_can_be_disabled(self):
+        """Com PDF_FAST_PATH desligado, o pdfplumber é sempre usado."""
+        with (
+            patch.object(ExtractorConfig, 'PDF_FAST_PATH', False),
+            patch('pdfplumber.open', wraps=pdfplumber.open) as mock_open,
+        ):
+            PDFReader.read(str(SAMPLE_PDF))
+        mock_open.assert_called_once()
+
+
+@pytest.fixture
+def scanned_pdf(temp_dir):
+    """PDF digitalizado: uma página A5 a 72 dpi só com imagem, sem texto."""
+    pdf_path = temp_dir / 'digitalizado.pdf'
+    Image.new('RGB', (420, 595), 'white').save(pdf_path, resolution=72)
+    return pdf_path
+
+
+def _text_page(text):
+    page = MagicMock()
+    page.extract_text.return_value = text
+    return page
+
+
+def _scanned_page():
+    page = MagicMock()
+    page.extract_text.return_value = ''
+    page.images = [{'name': 'Im0'}]
+    page.width, page.height = 595, 842  # A4, em pontos
+    page.to_image.return_value.original = Image.new('L', (60, 80), 255)
+    return page
+
+
+class TestHybridPDFReader:
+    """Valida o OCR das páginas de PDF sem camada de texto."""
+
+    @patch('pytesseract.image_to_string', return_value='Texto digitalizado')
+    @patch(
+        'pytesseract.image_to_data',
+        side_effect=pytesseract.TesseractError(1, 'sem layout'),
+    )
+    def test_scanned_pdf_is_read_by_ocr(self, mock_layout, mock_ocr, scanned_pdf):
+        """Uma página só com imagem é rasterizada e lida pelo OCR."""
+        assert PDFReader.read(str(scanned_pdf)) == 'Texto digitalizado'
+
+        image = mock_ocr.call_args.args[0]
+        dpi = ExtractorConfig.PDF_OCR_DPI
+        assert image.height == pytest.approx(595 * dpi / 72, abs=2)
+
+    @patch('pytesseract.image_to_string', return_value='B')
+    @patch('pdfplumber.open')
+    def test_mixed_pdf_only_ocrs_textless_pages(self, mock_open, mock_ocr):
+        """Páginas com texto não passam pelo OCR e a ordem é preservada."""
+        pages = [_text_page('A'), _scanned_page(), _text_page('C')]
+        mock_open.return_value.__enter__.return_value.pages = pages
+
+        assert list(PDFReader.iter_pages(b'%PDF')) == ['A', 'B', 'C']
+        mock_ocr.assert_called_once()
+        pages[0].to_image.assert_not_called()
+        pages[2].to_image.assert_not_called()
+
+    @patch('pytesseract.image_to_string')
+    def test_ocr_can_be_disabled(self, mock_ocr, scanned_pdf):
+        """Com PDF_OCR desligado, PDFs digitalizados continuam sem texto."""
+        with (
+            patch.object(ExtractorConfig, 'PDF_OCR', False),
+            pytest.raises(
+                ProcessingError, match='Não foi possível extrair texto do PDF'
+            ),
+        ):
+            PDFReader.read(str(scanned_pdf))
+        mock_ocr.assert_not_called()
+
+    @patch(
+        'pytesseract.image_to_string',
+        side_effect=pytesseract.TesseractNotFoundError,
+    )
+    def test_scanned_pdf_without_tesseract(self, mock_ocr, scanned_pdf):
+        """Sem o Tesseract, o erro de PDF digitalizado é explícito."""
+        with pytest.raises(ProcessingError, match='Tesseract OCR não instalado'):
+            PDFReader.read(str(scanned_pdf))
+
+
 class TestImageReader:
     """Valida o leitor de imagens (OCR) em diversos cenários."""
 
@@ -132,7 +297,7 @@ class TestImageReader:
         ):
             reader.read(non_existent_file)
 
-    @patch('PIL.Image.open')
+    @patch('PIL.Image.open', return_value=Image.new('RGB', (40, 40), 'white'))
     @patch('pytesseract.image_to_string', return_value='Texto da imagem')
     def test_image_reader_successful(self, mock_ocr, mock_open, temp_dir):
         """Simula uma leitura de imagem com OCR bem-sucedida."""
@@ -142,7 +307,18 @@ class TestImageReader:
         text = reader.read(str(image_path))
         assert text == 'Texto da imagem'
 
-    @patch('PIL.Image.open')
+    @patch('pytesseract.image_to_string', return_value='Texto da imagem')
+    def test_image_reader_opens_in_memory_image_once(
+        self, mock_ocr, uploaded_image_file
+    ):
+        """Imagens em memória são decodificadas uma única vez, sem arquivo."""
+        with patch('PIL.Image.open', wraps=Image.open) as mock_open:
+            text = ImageReader.read(uploaded_image_file.read())
+
+        assert text == 'Texto da imagem'
+        mock_open.assert_called_once()
+
+    @patch('PIL.Image.open', return_value=Image.new('RGB', (40, 40), 'white'))
     @patch('pytesseract.image_to_string', return_value='  ')
     def test_image_reader_no_extractable_text(self, mock_ocr, mock_open, temp_dir):
         """Testa o caso de uma imagem da qual o OCR não consegue extrair texto."""
@@ -155,7 +331,7 @@ class TestImageReader:
             reader.read(str(image_path))
 
     @patch('pathlib.Path.exists', return_value=True)
-    @patch('PIL.Image.open')
+    @patch('PIL.Image.open', return_value=Image.new('RGB', (40, 40), 'white'))
     @patch(
         'pytesseract.image_to_string',
         side_effect=pytesseract.TesseractNotFoundError,
@@ -204,16 +380,115 @@ class TestNFSeExtractor:
         extractor = NFSeExtractor(config=None)
         assert isinstance(extractor.config, ExtractorConfig)
 
+    def test_extract_many_yields_bounded_batches(
+        self, nfse_extractor, sample_nfse_text, invalid_nfse_text
+    ):
+        """O fluxo de textos é consumido em lotes colunares de tamanho fixo."""
+        texts = [sample_nfse_text, invalid_nfse_text, sample_nfse_text]
+
+        batches = list(nfse_extractor.extract_many(texts, batch_size=2))
+
+        assert [len(batch['cnpj_prestador']) for batch in batches] == [2, 1]
+        assert batches[0]['nome_prestador'] == ['EMPRESA FICTÍCIA LTDA', None]
+
+    def test_extract_from_chunks_matches_extract_from_text(
+        self, nfse_extractor, sample_nfse_text, mock_successful_extraction
+    ):
+        """Garante o mesmo resultado ao receber o texto dividido em partes."""
+        chunks = sample_nfse_text.split('\n')
+        result = nfse_extractor.extract_from_chunks(chunks)
+        assert result == mock_successful_extraction
+
+    def test_extract_from_chunks_stops_when_fields_are_found(
+        self, nfse_extractor, mock_successful_extraction
+    ):
+        """Valida que as partes seguintes não são consumidas após o 'done'."""
+        chunks = iter([
+            'Dados do Prestador de Serviços',
+            'Razão Social: EMPRESA FICTÍCIA LTDA',
+            'CNPJ: 12.345.678/0001-90',
+            'Página que não deveria ser lida',
+        ])
+        result = nfse_extractor.extract_from_chunks(chunks)
+        assert result == mock_successful_extraction
+        assert next(chunks) == 'Página que não deveria ser lida'
+
+    def test_extract_from_chunks_searches_each_chunk_once(self, nfse_extractor):
+        """Com a seção aberta e sem Razão Social, o texto não é reprocessado."""
+        chunks = [
+            'Dados do Prestador de Serviços',
+            'CNPJ: 12.345.678/0001-90',
+            *['linha sem os campos'] * 500,
+        ]
+        with patch.object(nfse_extractor, 'extract_from_text') as mock_text:
+            result = nfse_extractor.extract_from_chunks(chunks)
+
+        mock_text.assert_not_called()
+        assert result == {
+            'cnpj_prestador': '12.345.678/0001-90',
+            'nome_prestador': None,
+        }
+
+    def test_extract_from_chunks_finds_fields_across_chunks(
+        self, nfse_extractor, mock_successful_extraction
+    ):
+        """Um campo dividido entre duas partes é encontrado, como no texto."""
+        chunks = [
+            'CNPJ: 11.111.111/0001-11',
+            'Dados do Prestador de Serviços CNPJ: 12.345.678/0001-90',
+            'Razão Social:',
+            'EMPRESA FICTÍCIA LTDA',
+            'Dados do Tomador',
+        ]
+        result = nfse_extractor.extract_from_chunks(chunks)
+        assert result == mock_successful_extraction
+        assert result == nfse_extractor.extract_from_text('\n'.join(chunks))
+
+    def test_extract_from_chunks_without_section_reads_everything(
+        self, nfse_extractor
+    ):
+        """Sem a seção do prestador, todas as partes devem ser consideradas."""
+        chunks = iter(['Cabeçalho', 'CNPJ: 12.345.678/0001-90'])
+        result = nfse_extractor.extract_from_chunks(chunks)
+        assert result['cnpj_prestador'] == '12.345.678/0001-90'
+        assert result['nome_prestador'] is None
+        assert next(chunks, None) is None
+
+    def test_config_compiles_patterns_once(self, extractor_config):
+        """Os padrões são compilados uma única vez por instância de config."""
+        layouts = extractor_config.layouts
+        assert layouts is extractor_config.layouts
+        pattern = layouts.default.cnpj_pattern
+        assert pattern.pattern == ExtractorConfig.CNPJ_PRESTADOR
+
+    def test_find_section_by_position(self, nfse_extractor):
+        """Os limites da seção são posições no texto original."""
+        text = 'Cabeçalho Dados do Prestador de Serviços SEÇÃO Dados do Tomador'
+        _, start, end = nfse_extractor._find_section(text)
+        assert text[start:end] == ' SEÇÃO '
+
+    def test_extract_fields_only_within_section(self, nfse_extractor):
+        """CNPJs fora da seção do prestador são ignorados."""
+        text = (
+            'CNPJ: 11.111.111/0001-11\n'
+            'Dados do Prestador de Serviços\n'
+            'CNPJ: 22.222.222/0001-22\n'
+            'Dados do Tomador\n'
+        )
+        result = nfse_extractor.extract_from_text(text)
+        assert result['cnpj_prestador'] == '22.222.222/0001-22'
+
     def test_isolate_section_without_start_marker(self, nfse_extractor):
         """Testa comportamento com marcador de início da seção não encontrado."""
         text = 'Texto sem a seção do prestador'
-        result = nfse_extractor._isolate_prestador_section(text)
-        assert result == text
+        _, start, end = nfse_extractor._find_section(text)
+        assert text[start:end] == text
 
     def test_isolate_section_with_end_marker(self, nfse_extractor):
         """Valida isolamento quando os marcadores de início e fim existem."""
         text = 'Dados do Prestador de Serviços... SECÇÃO... Dados do Tomador'
-        result = nfse_extractor._isolate_prestador_section(text)
+        _, start, end = nfse_extractor._find_section(text)
+        result = text[start:end]
         assert 'Dados do Tomador' not in result
         assert result.strip() == '... SECÇÃO...'
 
@@ -221,7 +496,8 @@ class TestNFSeExtractor:
         """Valida isolamento de texto quando só o marcador de início existe."""
         text = 'Dados do Prestador de Serviços... e nada mais'
         expected = '... e nada mais'
-        result = nfse_extractor._isolate_prestador_section(text)
+        _, start, end = nfse_extractor._find_section(text)
+        result = text[start:end]
         assert result.strip() == expected.strip()
 
     def test_extract_cnpj_not_found(self, nfse_extractor):
@@ -261,6 +537,11 @@ class TestExtractNFSeData:
         with pytest.raises(FileNotFoundError):
             extract_nfse_data('caminho/inexistente.pdf', 'pdf')
 
+    def test_extract_nfse_data_from_bytes(self, mock_successful_extraction):
+        """Extrai diretamente do conteúdo em memória, sem arquivo no disco."""
+        result = extract_nfse_data(SAMPLE_PDF.read_bytes(), 'pdf')
+        assert result == mock_successful_extraction
+
     @patch('extractor.data_extractor.get_reader')
     @patch('extractor.data_extractor.NFSeExtractor')
     def test_extract_nfse_data_successful_flow(
@@ -272,11 +553,15 @@ class TestExtractNFSeData:
     ):
         """Testa o fluxo de integração completo."""
         mock_reader = MagicMock()
-        mock_reader.read.return_value = 'texto extraído'
+        mock_reader.iter_pages.return_value = (
+            page_text for page_text in ['texto extraído']
+        )
         mock_get_reader.return_value = mock_reader
 
         mock_extractor = MagicMock()
-        mock_extractor.extract_from_text.return_value = mock_successful_extraction
+        mock_extractor.extract_from_chunks.return_value = (
+            mock_successful_extraction
+        )
         mock_extractor_class.return_value = mock_extractor
 
         test_file = temp_dir / 'test.pdf'
@@ -286,3 +571,108 @@ class TestExtractNFSeData:
 
         assert result == mock_successful_extraction
         mock_extractor_class.assert_called_once()
+
+    @patch('extractor.data_extractor.get_reader')
+    def test_extract_nfse_data_stops_after_prestador_section(
+        self, mock_get_reader, temp_dir, mock_successful_extraction
+    ):
+        """Garante que as páginas após a seção do prestador não são lidas."""
+        consumed = []
+
+        def pages(_file_path):
+            for page_text in (
+                'Dados do Prestador de Serviços',
+                'Razão Social: EMPRESA FICTÍCIA LTDA\n'
+                'CNPJ: 12.345.678/0001-90\n'
+                'Dados do Tomador de Serviços',
+                'Anexo que não deveria ser lido',
+            ):
+                consumed.append(page_text)
+                yield page_text
+
+        mock_reader = MagicMock()
+        mock_reader.iter_pages.side_effect = pages
+        mock_get_reader.return_value = mock_reader
+
+        test_file = temp_dir / 'test.pdf'
+        test_file.touch()
+
+        result = extract_nfse_data(str(test_file), 'pdf')
+
+        assert result == mock_successful_extraction
+        assert 'Anexo que não deveria ser lido' not in consumed
+
+
+class TestLimits:
+    """Valida os limites de tamanho, pixels, páginas e tempo por documento."""
+
+    def test_file_larger_than_limit_is_not_read(self):
+        """O tamanho é conferido antes de abrir o arquivo."""
+        with (
+            patch.object(ExtractorConfig, 'MAX_FILE_BYTES', 100),
+            patch('pdfplumber.open') as mock_open,
+            pytest.raises(FileTooLargeError, match='limite de 100 bytes'),
+        ):
+            extract_nfse_data(str(SAMPLE_PDF), 'pdf')
+        mock_open.assert_not_called()
+
+    def test_image_pixels_checked_before_decoding(self, temp_dir):
+        """Os pixels vêm do cabeçalho: a imagem grande não é decodificada."""
+        image_path = temp_dir / 'grande.png'
+        Image.new('L', (200, 100), 255).save(image_path)
+
+        with (
+            patch.object(ExtractorConfig, 'MAX_IMAGE_PIXELS', 10_000),
+            patch.object(Image.Image, 'load') as mock_load,
+            pytest.raises(ImageTooLargeError, match='200x100'),
+        ):
+            ImageReader.read(str(image_path))
+        mock_load.assert_not_called()
+
+    def test_decompression_bomb_is_image_too_large(self, temp_dir):
+        """A proteção do Pillow contra imagens gigantes vira o mesmo erro."""
+        image_path = temp_dir / 'bomba.png'
+        Image.new('L', (200, 100), 255).save(image_path)
+
+        with (
+            patch.object(Image, 'MAX_IMAGE_PIXELS', 1000),
+            pytest.raises(ImageTooLargeError),
+        ):
+            ImageReader.read(str(image_path))
+
+    def test_scanned_page_pixels_checked_before_rasterizing(self, scanned_pdf):
+        """Uma página cuja rasterização passaria do limite não é renderizada."""
+        with (
+            patch.object(ExtractorConfig, 'MAX_IMAGE_PIXELS', 10_000),
+            pytest.raises(ImageTooLargeError),
+        ):
+            PDFReader.read(str(scanned_pdf))
+
+    @pytest.mark.parametrize('fast_path', [True, False])
+    def test_pdf_with_too_many_pages(self, fast_path):
+        """O número de páginas é conferido antes da leitura da primeira."""
+        with (
+            patch.object(ExtractorConfig, 'PDF_FAST_PATH', fast_path),
+            patch.object(ExtractorConfig, 'MAX_PDF_PAGES', 0),
+            pytest.raises(TooManyPagesError, match='limite de 0 páginas'),
+        ):
+            extract_nfse_data(str(SAMPLE_PDF), 'pdf')
+
+    def test_expired_deadline_stops_extraction(self):
+        """Com o prazo esgotado, a próxima página não é lida."""
+        with (
+            patch.object(ExtractorConfig, 'MAX_EXTRACTION_SECONDS', 0),
+            pytest.raises(ExtractionTimeoutError),
+        ):
+            extract_nfse_data(str(SAMPLE_PDF), 'pdf')
+
+    @patch('pytesseract.image_to_string', side_effect=RuntimeError('timeout'))
+    def test_tesseract_timeout_is_extraction_timeout(
+        self, mock_ocr, sample_image_file
+    ):
+        """O Tesseract encerrado pelo prazo vira ExtractionTimeoutError."""
+        with (
+            patch('extractor.limits.expired', return_value=True),
+            pytest.raises(ExtractionTimeoutError),
+        ):
+            ImageReader.read(sample_image_file)
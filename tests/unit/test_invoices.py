@@ -0,0 +1,198 @@
+from unittest.mock import patch
+
+import pdfplumber
+import pytest
+
+from benchmarks.corpus import write_pdf
+from extractor.data_extractor import (
+    ExtractionTimeoutError,
+    ExtractorConfig,
+    FileTooLargeError,
+    PDFReader,
+    ProcessingError,
+)
+from extractor.invoices import extract_invoices, split_invoices
+
+
+def _invoice_lines(cnpj, name):
+    return [
+        'Dados do Prestador de Serviços',
+        f'Razão Social: {name}',
+        f'CNPJ: {cnpj}',
+        'Dados do Tomador de Serviços',
+        'Razão Social: CLIENTE EXEMPLO LTDA',
+    ]
+
+
+@pytest.fixture
+def combined_pdf(temp_dir):
+    """PDF com três notas: a segunda ocupa duas páginas."""
+    pdf_path = temp_dir / 'notas_do_mes.pdf'
+    write_pdf(
+        [
+            _invoice_lines('11.111.111/0001-11', 'PRIMEIRA LTDA'),
+            _invoice_lines('22.222.222/0001-22', 'SEGUNDA LTDA'),
+            ['Anexo - Discriminação complementar dos serviços prestados.'],
+            _invoice_lines('33.333.333/0001-33', 'TERCEIRA LTDA'),
+        ],
+        pdf_path,
+    )
+    return pdf_path
+
+
+EXPECTED_INVOICES = [
+    {
+        'first_page': 1,
+        'last_page': 1,
+        'cnpj_prestador': '11.111.111/0001-11',
+        'nome_prestador': 'PRIMEIRA LTDA',
+    },
+    {
+        'first_page': 2,
+        'last_page': 3,
+        'cnpj_prestador': '22.222.222/0001-22',
+        'nome_prestador': 'SEGUNDA LTDA',
+    },
+    {
+        'first_page': 4,
+        'last_page': 4,
+        'cnpj_prestador': '33.333.333/0001-33',
+        'nome_prestador': 'TERCEIRA LTDA',
+    },
+]
+
+
+class TestSplitInvoices:
+    """Valida a divisão das páginas em notas."""
+
+    def test_split_by_repeated_start_anchor(self):
+        """Cada página com o cabeçalho do prestador começa uma nota."""
+        pages = [
+            (1, 'Capa do lote'),
+            (2, 'Dados do Prestador de Serviços A'),
+            (3, 'continuação'),
+            (4, 'Dados do Prestador de Serviços B'),
+        ]
+        spans = [(first, last) for first, last, _ in split_invoices(pages)]
+        assert spans == [(1, 3), (4, 4)]
+
+    def test_prestador_label_does_not_split(self):
+        """Rótulos que citam o prestador não começam uma nota."""
+        pages = [
+            (1, 'Dados do Prestador de Serviços A'),
+            (2, 'Código do Prestador de Serviços: 123'),
+        ]
+        spans = [(first, last) for first, last, _ in split_invoices(pages)]
+        assert spans == [(1, 2)]
+
+    def test_split_by_page_count(self):
+        """Com `pages_per_invoice`, as notas têm tamanho fixo."""
+        pages = [(number, 'texto') for number in range(1, 6)]
+        invoices = split_invoices(pages, pages_per_invoice=2)
+        spans = [(first, last) for first, last, _ in invoices]
+        assert spans == [(1, 2), (3, 4), (5, 5)]
+
+    def test_invoices_are_streamed(self):
+        """Uma nota é entregue antes de as páginas seguintes serem lidas."""
+
+        def pages():
+            yield 1, 'Dados do Prestador de Serviços A'
+            yield 2, 'Dados do Prestador de Serviços B'
+            pytest.fail('a página 3 não deveria ser lida')
+
+        assert next(split_invoices(pages()))[:2] == (1, 1)
+
+
+class TestExtractInvoices:
+    """Valida a extração de todas as notas de um PDF combinado."""
+
+    def test_extracts_every_invoice_with_page_span(self, combined_pdf):
+        """Cada nota vira um registro com as suas páginas."""
+        with patch('pdfplumber.open', wraps=pdfplumber.open) as mock_open:
+            records = list(extract_invoices(str(combined_pdf)))
+
+        mock_open.assert_not_called()
+        assert records == EXPECTED_INVOICES
+
+    def test_page_ranges_read_in_workers(self, combined_pdf):
+        """Sem camada de texto utilizável, os intervalos vão aos processos."""
+        with (
+            patch.object(ExtractorConfig, 'PDF_FAST_PATH', False),
+            patch('extractor.invoices.PAGES_PER_TASK', 1),
+        ):
+            records = list(extract_invoices(combined_pdf, workers=2))
+
+        assert records == EXPECTED_INVOICES
+
+    def test_only_pages_without_text_are_read_again(self, temp_dir):
+        """Só as páginas sem camada de texto são lidas pelo pdfplumber/OCR."""
+        pdf_path = temp_dir / 'misto.pdf'
+        write_pdf(
+            [_invoice_lines('11.111.111/0001-11', 'PRIMEIRA LTDA'), []],
+            pdf_path,
+        )
+        scanned_text = '\n'.join(
+            _invoice_lines('44.444.444/0001-44', 'DIGITALIZADA LTDA')
+        )
+
+        with patch.object(
+            PDFReader, 'read_pages', return_value=[scanned_text]
+        ) as mock_read:
+            records = list(extract_invoices(pdf_path, workers=1))
+
+        assert mock_read.call_args.args[1] == [2]
+        assert [record['nome_prestador'] for record in records] == [
+            'PRIMEIRA LTDA',
+            'DIGITALIZADA LTDA',
+        ]
+
+    def test_accepts_file_objects(self, combined_pdf):
+        """Uploads são lidos uma vez e enviados aos processos como bytes."""
+        with open(combined_pdf, 'rb') as upload:
+            records = list(extract_invoices(upload))
+        assert len(records) == len(EXPECTED_INVOICES)
+
+    def test_pdf_without_text_raises(self, temp_dir):
+        """Um PDF sem nenhum texto continua sendo um erro de processamento."""
+        pdf_path = temp_dir / 'vazio.pdf'
+        write_pdf([[]], pdf_path)
+        with pytest.raises(ProcessingError, match='extrair texto'):
+            list(extract_invoices(pdf_path))
+
+    def test_file_larger_than_limit_is_not_read(self, combined_pdf):
+        """O tamanho é conferido antes de ler qualquer página."""
+        with (
+            patch.object(ExtractorConfig, 'MAX_FILE_BYTES', 100),
+            patch.object(PDFReader, '_iter_text_layer') as mock_text_layer,
+            pytest.raises(FileTooLargeError),
+        ):
+            list(extract_invoices(combined_pdf))
+        mock_text_layer.assert_not_called()
+
+    @pytest.mark.parametrize('fast_path', [True, False])
+    def test_expired_deadline_stops_extraction(self, combined_pdf, fast_path):
+        """O prazo vale na camada de texto e nos processos de leitura."""
+        with (
+            patch.object(ExtractorConfig, 'PDF_FAST_PATH', fast_path),
+            patch.object(ExtractorConfig, 'MAX_EXTRACTION_SECONDS', 0),
+            patch('extractor.invoices.PAGES_PER_TASK', 1),
+            pytest.raises(ExtractionTimeoutError),
+        ):
+            list(extract_invoices(combined_pdf, workers=2))
+
+    @patch('extractor.invoices.extract_nfse_data')
+    def test_image_is_a_single_invoice(self, mock_extract, sample_image_file):
+        """Uma imagem é uma nota de uma página."""
+        mock_extract.return_value = {
+            'cnpj_prestador': None,
+            'nome_prestador': None,
+        }
+        records = list(extract_invoices(sample_image_file, 'image'))
+        assert records == [
+            {
+                'first_page': 1,
+                'last_page': 1,
+                'cnpj_prestador': None,
+                'nome_prestador': None,
+            }
+        ]
@@ -0,0 +1,152 @@
+import functools
+import os
+import socket
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+from extractor.data_extractor import ProcessingError
+from extractor.executors import submit_rebuilding
+from extractor.jobs import (
+    INTERRUPTED_ERROR,
+    JobQueue,
+    QueueFullError,
+    fail_if_orphaned,
+    fail_orphaned_jobs,
+    worker_id,
+)
+from extractor.models import ExtractionJob
+
+JOB_TIMEOUT_SECONDS = 5
+
+
+def _dead_worker():
+    """Identidade de um processo desta máquina que já terminou."""
+    process = subprocess.Popen(['true'])
+    process.wait()
+    return f'{socket.gethostname()}:{process.pid}:anterior'
+
+
+@pytest.fixture
+def job_queue():
+    """Fila com workers em thread, para que os mocks valham nas tarefas."""
+    queue = JobQueue(workers=1, max_pending=1, executor='thread')
+    yield queue
+    queue.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestJobQueue:
+    """Testa a fila local de extrações assíncronas."""
+
+    @patch('extractor.jobs.extract_nfse_data')
+    def test_submit_persists_result(
+        self, mock_extract, job_queue, mock_successful_extraction
+    ):
+        """A tarefa é concluída em segundo plano e o resultado persistido."""
+        mock_extract.return_value = mock_successful_extraction
+
+        job = job_queue.submit('nota.pdf', 'pdf', b'conteudo')
+        job_queue.shutdown()
+
+        job.refresh_from_db()
+        assert job.status == ExtractionJob.Status.DONE
+        assert job.result == mock_successful_extraction
+        mock_extract.assert_called_once_with(b'conteudo', 'pdf')
+
+    @patch(
+        'extractor.jobs.extract_nfse_data',
+        side_effect=ProcessingError('PDF corrompido'),
+    )
+    def test_submit_records_extraction_error(self, mock_extract, job_queue):
+        """Falhas de extração ficam registradas na tarefa."""
+        job = job_queue.submit('nota.pdf', 'pdf', b'conteudo')
+        job_queue.shutdown()
+
+        job.refresh_from_db()
+        assert job.status == ExtractionJob.Status.FAILED
+        assert job.error == 'PDF corrompido'
+
+    @patch('extractor.jobs.extract_nfse_data')
+    def test_submit_rejects_when_queue_is_full(self, mock_extract, job_queue):
+        """Com o limite de pendências atingido, novas tarefas são recusadas."""
+        release = threading.Event()
+        mock_extract.side_effect = lambda *args: release.wait(JOB_TIMEOUT_SECONDS)
+
+        job_queue.submit('primeira.pdf', 'pdf', b'primeira')
+        with pytest.raises(QueueFullError):
+            job_queue.submit('segunda.pdf', 'pdf', b'segunda')
+
+        release.set()
+
+    @patch('extractor.jobs.extract_nfse_data')
+    def test_submit_reuses_cached_result(
+        self, mock_extract, job_queue, mock_successful_extraction
+    ):
+        """Conteúdo já extraído é resolvido sem ocupar um worker."""
+        mock_extract.return_value = mock_successful_extraction
+        job_queue.submit('nota.pdf', 'pdf', b'conteudo')
+        job_queue.shutdown()
+
+        job = job_queue.submit('copia.pdf', 'pdf', b'conteudo')
+
+        assert job.status == ExtractionJob.Status.DONE
+        mock_extract.assert_called_once()
+
+
+@pytest.mark.django_db
+class TestJobRecovery:
+    """Garante que tarefas e pools perdidos não travam a fila."""
+
+    def test_orphaned_jobs_fail_on_startup(self):
+        """Tarefas de processos encerrados falham; as do atual, não."""
+        orphan = ExtractionJob.objects.create(
+            file_name='a.pdf', file_type='pdf', worker=_dead_worker()
+        )
+        restarted = ExtractionJob.objects.create(
+            file_name='b.pdf',
+            file_type='pdf',
+            worker=f'{socket.gethostname()}:{os.getpid()}:anterior',
+        )
+        running = ExtractionJob.objects.create(
+            file_name='c.pdf', file_type='pdf', worker=worker_id()
+        )
+        remote = ExtractionJob.objects.create(
+            file_name='d.pdf', file_type='pdf', worker='outra-maquina:1:x'
+        )
+
+        assert fail_orphaned_jobs() == 2  # noqa: PLR2004
+
+        for job in (orphan, restarted):
+            job.refresh_from_db()
+            assert job.status == ExtractionJob.Status.FAILED
+            assert job.error == INTERRUPTED_ERROR
+        for job in (running, remote):
+            job.refresh_from_db()
+            assert job.status == ExtractionJob.Status.PENDING
+
+    def test_polling_an_orphaned_job_fails_it(self):
+        """Consultar uma tarefa órfã a encerra, sem esperar um reinício."""
+        job = ExtractionJob.objects.create(
+            file_name='a.pdf', file_type='pdf', worker=_dead_worker()
+        )
+        assert fail_if_orphaned(job).status == ExtractionJob.Status.FAILED
+        job.refresh_from_db()
+        assert job.error == INTERRUPTED_ERROR
+
+    def test_broken_pool_is_rebuilt(self):
+        """Depois que um worker morre, a próxima tarefa usa um pool novo."""
+        get_executor = functools.cache(
+            functools.partial(ProcessPoolExecutor, max_workers=1)
+        )
+        broken = get_executor()
+        with pytest.raises(BrokenProcessPool):
+            submit_rebuilding(get_executor, os._exit, 1).result()
+
+        assert submit_rebuilding(get_executor, abs, -2).result() == 2  # noqa: PLR2004
+        assert get_executor() is not broken
+        get_executor().shutdown()
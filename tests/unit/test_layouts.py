@@ -0,0 +1,190 @@
+import re
+
+import pytest
+
+from extractor.data_extractor import ExtractorConfig, NFSeExtractor
+from extractor.layouts import LayoutRegistry, LayoutTemplate
+
+SAO_PAULO_TEXT = """
+PREFEITURA DO MUNICÍPIO DE SÃO PAULO
+PRESTADOR DE SERVIÇOS
+CPF/CNPJ: 11.222.333/0001-44
+Nome/Razão Social: PRESTADORA PAULISTA LTDA
+TOMADOR DE SERVIÇOS
+CPF/CNPJ: 55.666.777/0001-88
+Nome/Razão Social: TOMADORA S.A.
+"""
+
+PADRAO_WITH_PRESTADOR_LABEL = """
+Código do Prestador de Serviços: 99.999.999/0001-99
+Dados do Prestador de Serviços
+Razão Social: ACME LTDA
+CNPJ: 12.345.678/0001-90
+Dados do Tomador de Serviços
+"""
+
+
+def _synthetic_layouts(count):
+    return tuple(
+        LayoutTemplate(
+            name=f'municipio_{index}',
+            prestador_start=f'Emitente {index:03d}:',
+            prestador_end=rf'Destinatário {index:03d}:',
+            razao_social=r'Empresa:\s*(.+?)(?:\n|$)',
+        )
+        for index in range(count)
+    )
+
+
+class TestLayoutRegistry:
+    """Valida a identificação do layout em uma única busca."""
+
+    def test_default_layout_comes_from_config(self, extractor_config):
+        """O layout padrão usa os marcadores de ExtractorConfig."""
+        default = extractor_config.layouts.default
+        assert default.name == 'padrao'
+        assert [anchor.pattern for anchor in default.anchors] == [
+            ExtractorConfig.PRESTADOR_START
+        ]
+
+    def test_default_start_marker_is_a_regex(self):
+        """Um PRESTADOR_START em expressão regular continua valendo."""
+        config = type(
+            'Config', (ExtractorConfig,), {'PRESTADOR_START': r'Prestador\s*\d+:'}
+        )()
+        layout, match = config.layouts.match_start('x\nPRESTADOR 01: ACME')
+        assert layout.name == 'padrao'
+        assert match.group(0) == 'PRESTADOR 01:'
+
+    def test_detects_layout_by_start_marker(self, extractor_config):
+        """O marcador de início identifica o layout do município."""
+        layout, match = extractor_config.layouts.match_start(SAO_PAULO_TEXT)
+        assert layout.name == 'sao_paulo'
+        assert match.group(0).strip() == 'PRESTADOR DE SERVIÇOS'
+
+    def test_earliest_marker_wins(self, extractor_config, sample_nfse_text):
+        """Com marcadores de vários layouts, vale o que aparece primeiro."""
+        text = sample_nfse_text + SAO_PAULO_TEXT
+        layout, _ = extractor_config.layouts.match_start(text)
+        assert layout.name == 'padrao'
+
+    def test_dispatch_uses_prefix_trie(self):
+        """Com 50 layouts, o prefixo comum das âncoras aparece uma só vez."""
+        registry = LayoutRegistry(_synthetic_layouts(50), r'\d{14}')
+        layout, _ = registry.match_start('cabeçalho\nEmitente 049: X')
+        assert layout.name == 'municipio_49'
+        assert registry.start_pattern.pattern.count('emitente') == 1
+        assert registry.start_pattern.groups == 0
+
+    def test_anchors_are_literal(self):
+        """Âncoras valem como texto, sem caixa nem espaçamento exatos."""
+        registry = LayoutRegistry(
+            [
+                LayoutTemplate('a', 'Início (A)', 'Fim', r'(.+)'),
+                LayoutTemplate('b', ('Início (A) e B', 'Outro'), 'Fim', r'(.+)'),
+            ],
+            r'\d{14}',
+        )
+        assert registry.match_start('INÍCIO  (A)\n')[0].name == 'a'
+        assert registry.match_start('Início (A)')[0].name == 'a'
+        assert registry.match_start('início\n(a) e b')[0].name == 'b'
+        assert registry.match_start('Início A') is None
+
+    def test_regex_anchors_join_the_search(self):
+        """Âncoras compiladas valem como expressão, com as suas flags."""
+        registry = LayoutRegistry(
+            [
+                LayoutTemplate('a', 'Início', 'Fim', r'(.+)'),
+                LayoutTemplate(
+                    'b', re.compile(r'^Cabeçalho B$', re.MULTILINE), 'Fim', r'(.+)'
+                ),
+            ],
+            r'\d{14}',
+        )
+        assert registry.match_start('cabeçalho b\nInício')[0].name == 'b'
+        assert registry.match_start('Cabeçalho B: Início')[0].name == 'a'
+
+    def test_regex_anchors_are_compiled_separately(self):
+        """Flags embutidas e grupos de uma âncora não afetam as demais."""
+        registry = LayoutRegistry(
+            [
+                LayoutTemplate('a', re.compile(r'(?s)início(.)a'), 'Fim', r'(.+)'),
+                LayoutTemplate('b', re.compile(r'(cab)eçalho'), 'Fim', r'(.+)'),
+                LayoutTemplate('c', re.compile(r'cabeçalho c'), 'Fim', r'(.+)'),
+            ],
+            r'\d{14}',
+        )
+        assert registry.match_start('INÍCIO\nA')[0].name == 'a'
+        layout, match = registry.match_start('x cabeçalho c')
+        assert layout.name == 'c'
+        assert match.group(0) == 'cabeçalho c'
+
+    def test_default_start_marker_keeps_its_flags(self):
+        """O PRESTADOR_START aceita flags embutidas e não ganha MULTILINE."""
+        config = type(
+            'Config',
+            (ExtractorConfig,),
+            {'PRESTADOR_START': r'(?i)^dados do prestador'},
+        )()
+        assert config.layouts.match_start('Dados do Prestador')[0].name == 'padrao'
+        assert config.layouts.match_start('x\nDados do Prestador') is None
+
+    def test_sao_paulo_header_must_be_alone_on_line(self, extractor_config):
+        """Um rótulo com "Prestador de Serviços" não é o cabeçalho paulistano."""
+        text = PADRAO_WITH_PRESTADOR_LABEL
+        layout, match = extractor_config.layouts.match_start(text)
+        assert layout.name == 'padrao'
+        assert match.group(0) == 'Dados do Prestador de Serviços'
+
+    def test_duplicate_names_are_rejected(self):
+        """Cada layout precisa de um nome único."""
+        template = LayoutTemplate('dup', 'A', 'B', r'(.+)')
+        with pytest.raises(ValueError, match='repetidos'):
+            LayoutRegistry([template, template], r'\d{14}')
+
+    def test_layouts_change_config_fingerprint(self):
+        """Adicionar um layout invalida os resultados em cache."""
+        config = type('Config', (ExtractorConfig,), {'LAYOUTS': ()})()
+        assert config.fingerprint() != ExtractorConfig().fingerprint()
+
+
+class TestMultiLayoutExtraction:
+    """Valida a extração com os padrões de cada layout."""
+
+    def test_extracts_sao_paulo_layout(self, nfse_extractor):
+        """Os rótulos do layout de São Paulo são reconhecidos."""
+        assert nfse_extractor.extract_from_text(SAO_PAULO_TEXT) == {
+            'cnpj_prestador': '11.222.333/0001-44',
+            'nome_prestador': 'PRESTADORA PAULISTA LTDA',
+        }
+
+    def test_chunks_stop_at_detected_layout_end(self, nfse_extractor):
+        """O fim da seção é o do layout identificado no início."""
+        prestador, tomador = SAO_PAULO_TEXT.split('TOMADOR DE SERVIÇOS')
+
+        def chunks():
+            yield prestador
+            yield 'TOMADOR DE SERVIÇOS' + tomador
+            pytest.fail('páginas além da seção não deveriam ser lidas')
+
+        result = nfse_extractor.extract_from_chunks(chunks())
+        assert result['nome_prestador'] == 'PRESTADORA PAULISTA LTDA'
+
+    def test_prestador_label_before_default_header(self, nfse_extractor):
+        """Uma menção ao prestador acima do cabeçalho não muda o layout."""
+        result = nfse_extractor.extract_from_text(PADRAO_WITH_PRESTADOR_LABEL)
+        assert result == {
+            'cnpj_prestador': '12.345.678/0001-90',
+            'nome_prestador': 'ACME LTDA',
+        }
+
+    def test_custom_layouts_are_used(self):
+        """Layouts adicionados à configuração participam da identificação."""
+        config = type(
+            'Config', (ExtractorConfig,), {'LAYOUTS': _synthetic_layouts(50)}
+        )()
+        text = 'Emitente 031:\nEmpresa: MUNICIPAL LTDA\n12.345.678/0001-90'
+        assert NFSeExtractor(config).extract_from_text(text) == {
+            'cnpj_prestador': '12.345.678/0001-90',
+            'nome_prestador': 'MUNICIPAL LTDA',
+        }
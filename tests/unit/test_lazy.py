@@ -0,0 +1,39 @@
+import builtins
+import sys
+
+import pytest
+
+from extractor.lazy import lazy_import
+
+
+@pytest.fixture
+def fake_module(temp_dir, monkeypatch):
+    """Módulo que registra, em `loaded`, quando é executado."""
+    (temp_dir / 'modulo_pesado.py').write_text(
+        'import builtins\nbuiltins.loaded = True\nVALOR = 42\n', encoding='utf-8'
+    )
+    monkeypatch.syspath_prepend(str(temp_dir))
+    monkeypatch.setattr('builtins.loaded', False, raising=False)
+    yield 'modulo_pesado'
+    sys.modules.pop('modulo_pesado', None)
+
+
+class TestLazyImport:
+    """Valida a importação preguiçosa das dependências pesadas."""
+
+    def test_module_runs_on_first_attribute_access(self, fake_module):
+        """O módulo só é executado quando um atributo é usado."""
+        module = lazy_import(fake_module)
+        assert builtins.loaded is False
+
+        assert module.VALOR == 42  # noqa: PLR2004
+        assert builtins.loaded is True
+
+    def test_already_imported_module_is_returned(self):
+        """Um módulo já importado é devolvido sem nova carga."""
+        assert lazy_import('json') is sys.modules['json']
+
+    def test_missing_module_raises(self):
+        """Um pacote ausente falha como `import`."""
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import('pacote_que_nao_existe')
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from extractor import limits
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def _spin(cpu_seconds):
+    """Consome `cpu_seconds` de CPU."""
+    started = time.process_time()
+    while time.process_time() - started < cpu_seconds:
+        pass
+
+
+class TestDeadline:
+    """Valida o prazo da extração."""
+
+    def test_no_deadline_by_default(self):
+        """Fora de uma extração não há prazo."""
+        assert limits.remaining() is None
+        assert not limits.expired()
+
+    def test_shorter_deadline_wins(self):
+        """Um prazo interno mais longo não estende o externo."""
+        with limits.deadline(1), limits.deadline(60):
+            assert 0 < limits.remaining() <= 1
+        assert limits.remaining() is None
+
+    def test_expired_deadline(self):
+        """Um prazo zerado vence imediatamente."""
+        with limits.deadline(0):
+            assert limits.expired()
+
+
+class TestCPUBudget:
+    """Valida o orçamento de CPU na thread principal."""
+
+    def test_busy_loop_is_interrupted(self):
+        """O laço é interrompido ao consumir o orçamento de CPU."""
+        with (
+            pytest.raises(BudgetExceeded),
+            limits.cpu_budget(0.05, BudgetExceeded),
+        ):
+            _spin(5)
+
+    def test_budget_is_disarmed_after_block(self):
+        """O temporizador é desarmado ao sair do bloco."""
+        with limits.cpu_budget(0.05, BudgetExceeded):
+            pass
+        _spin(0.1)
+
+    def test_ignored_outside_main_thread(self):
+        """Em outras threads, o orçamento de CPU não é armado."""
+        errors = []
+
+        def run():
+            try:
+                with limits.cpu_budget(0.01, BudgetExceeded):
+                    _spin(0.05)
+            except BudgetExceeded as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        assert errors == []
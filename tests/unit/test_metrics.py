@@ -0,0 +1,159 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from extractor import metrics
+from extractor.batch import extract_file
+from extractor.data_extractor import (
+    PDFReader,
+    ProcessingError,
+    extract_nfse_data,
+)
+
+SAMPLE_PDF = Path('test_files/NFSe_ficticia_layout_completo.pdf')
+
+
+@pytest.fixture
+def enabled_metrics():
+    """Liga as métricas do processo durante o teste."""
+    metrics.configure(True)
+    yield
+    metrics.configure(False)
+
+
+class TestHistogram:
+    """Valida o histograma no formato de texto do Prometheus."""
+
+    def test_observation_fills_cumulative_buckets(self):
+        """Uma observação conta em todos os buckets maiores ou iguais."""
+        histogram = metrics.Histogram('teste', 'Ajuda', (1, 5, 10))
+        histogram.observe(3)
+        lines = list(histogram.render())
+        assert 'teste_bucket{le="1"} 0' in lines
+        assert 'teste_bucket{le="5"} 1' in lines
+        assert 'teste_bucket{le="+Inf"} 1' in lines
+        assert 'teste_count 1' in lines
+
+    def test_labels_are_rendered_per_series(self):
+        """Cada valor de rótulo gera uma série separada."""
+        histogram = metrics.Histogram('teste', 'Ajuda', (1,), ('stage',))
+        histogram.observe(0.5, 'ocr')
+        histogram.observe(0.5, 'regex')
+        output = '\n'.join(histogram.render())
+        assert 'teste_count{stage="ocr"} 1' in output
+        assert 'teste_count{stage="regex"} 1' in output
+
+
+class TestStageTimings:
+    """Garante a coleta por etapa sem custo quando desligada."""
+
+    def test_disabled_timer_is_shared_noop(self):
+        """Sem métricas nem coleta ativa, nenhum timer é criado."""
+        assert metrics.timed('ocr') is metrics.timed('regex')
+        with metrics.timed('ocr'):
+            pass
+        assert 'stage="ocr"' not in metrics.render()
+
+    def test_collect_timings_works_with_metrics_disabled(self):
+        """A coleta local (usada pela CLI) independe das métricas globais."""
+        with metrics.collect_timings() as timings:
+            with metrics.timed('ocr'):
+                pass
+            with metrics.timed('ocr'):
+                pass
+        assert set(timings) == {'ocr'}
+        assert timings['ocr'] >= 0
+
+    def test_enabled_timer_records_histogram(self, enabled_metrics):
+        """Com métricas ligadas, a etapa aparece na exposição."""
+        with metrics.timed('regex'):
+            pass
+        assert (
+            'nfse_stage_duration_seconds_count{stage="regex"} 1'
+            in metrics.render()
+        )
+
+    def test_as_milliseconds(self):
+        """Durações são convertidas para milissegundos."""
+        assert metrics.as_milliseconds({'ocr': 0.25}) == {'ocr': 250.0}
+
+
+class TestExtractionInstrumentation:
+    """Valida as métricas emitidas pelo pipeline de extração."""
+
+    def test_pdf_extraction_records_stages_and_sizes(
+        self, enabled_metrics, sample_nfse_text
+    ):
+        """A extração de PDF registra etapas, bytes e páginas."""
+        page = MagicMock()
+        page.extract_text.return_value = sample_nfse_text
+        pdf = MagicMock()
+        pdf.pages = [page, page]
+        with patch('pdfplumber.open') as mock_open:
+            mock_open.return_value.__enter__.return_value = pdf
+            extract_nfse_data(b'%PDF-1.4', 'pdf')
+
+        output = metrics.render()
+        for stage in ('pdf_layout', 'regex', 'total'):
+            assert f'stage="{stage}"' in output
+        assert 'nfse_document_bytes_sum 8' in output
+        assert 'nfse_pdf_pages_count 1' in output
+
+    def test_extraction_errors_are_counted_by_type(self, enabled_metrics):
+        """Falhas de extração incrementam o contador pelo tipo do erro."""
+        with patch.object(
+            PDFReader, 'iter_pages', side_effect=ProcessingError('falha')
+        ):
+            with pytest.raises(ProcessingError):
+                extract_nfse_data(b'%PDF-1.4', 'pdf')
+
+        assert (
+            'nfse_extraction_errors_total{error="ProcessingError"} 1'
+            in metrics.render()
+        )
+
+    def test_extract_file_reports_timings(self, sample_image_file):
+        """No modo lote, o registro traz as etapas em milissegundos."""
+        with patch('pytesseract.image_to_string', return_value='Texto sem dados'):
+            record = extract_file(str(sample_image_file), timings=True)
+
+        assert {'image_load', 'ocr', 'regex', 'total'} <= set(record['timings'])
+
+
+class TestWorkerMetrics:
+    """Garante que as métricas dos workers de processo chegam ao servidor."""
+
+    def test_process_worker_metrics_are_replayed(self, enabled_metrics):
+        """Etapas e bytes medidos no worker são registrados no processo pai."""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            recorded = executor.submit(
+                metrics.call_recorded, extract_nfse_data, str(SAMPLE_PDF), 'pdf'
+            ).result()
+
+        assert 'stage="total"' not in metrics.render()
+        assert metrics.replay(recorded)['cnpj_prestador']
+        output = metrics.render()
+        assert 'nfse_stage_duration_seconds_count{stage="total"} 1' in output
+        assert 'nfse_document_bytes_count 1' in output
+
+    def test_worker_errors_are_counted_and_raised(self, enabled_metrics):
+        """O erro do worker é contado e levantado no processo pai."""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            recorded = executor.submit(
+                metrics.call_recorded, extract_nfse_data, b'invalido', 'pdf'
+            ).result()
+
+        with pytest.raises(ProcessingError):
+            metrics.replay(recorded)
+        assert (
+            'nfse_extraction_errors_total{error="ProcessingError"} 1'
+            in metrics.render()
+        )
+
+    def test_replay_is_ignored_with_metrics_disabled(self):
+        """Com as métricas desligadas, a gravação não é registrada."""
+        recorded = metrics.call_recorded(extract_nfse_data, str(SAMPLE_PDF), 'pdf')
+        metrics.replay(recorded)
+        assert 'stage="total"' not in metrics.render()
@@ -0,0 +1,146 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from extractor import limits, ocr
+from extractor.data_extractor import ExtractorConfig
+
+
+@pytest.fixture
+def fake_tesserocr():
+    """Substitui o binding tesserocr por um dublê, uma API por instância."""
+    module = SimpleNamespace(PyTessBaseAPI=MagicMock(side_effect=_fake_api))
+    with patch.object(ocr, 'tesserocr', module):
+        ocr._build_engine.cache_clear()
+        yield module
+    ocr._build_engine.cache_clear()
+
+
+def _fake_api(lang):
+    api = MagicMock()
+    api.GetUTF8Text.return_value = f'texto {lang}'
+    return api
+
+
+def _config(**overrides):
+    return type('Config', (ExtractorConfig,), overrides)()
+
+
+class TestEngineSelection:
+    """Valida a escolha do motor de OCR pela configuração."""
+
+    def test_auto_falls_back_to_pytesseract(self):
+        """Sem o tesserocr instalado, o motor automático usa o pytesseract."""
+        with patch.object(ocr, 'tesserocr', None):
+            ocr._build_engine.cache_clear()
+            engine = ocr.get_ocr_engine(_config(OCR_ENGINE='auto'))
+        ocr._build_engine.cache_clear()
+        assert engine.name == 'pytesseract'
+
+    def test_auto_prefers_tesserocr(self, fake_tesserocr):
+        """Com o tesserocr disponível, o motor automático o utiliza."""
+        engine = ocr.get_ocr_engine(_config(OCR_ENGINE='auto'))
+        assert engine.name == 'tesserocr'
+
+    def test_engine_is_shared_per_configuration(self, fake_tesserocr):
+        """O mesmo motor (e pool) atende todas as chamadas do processo."""
+        config = _config()
+        assert ocr.get_ocr_engine(config) is ocr.get_ocr_engine(config)
+
+    def test_unknown_engine_is_rejected(self):
+        """Um nome de motor inválido é um erro de configuração."""
+        with pytest.raises(ValueError, match='desconhecido'):
+            ocr.get_ocr_engine(_config(OCR_ENGINE='outro'))
+
+    @patch('pytesseract.image_to_string', return_value='texto')
+    def test_pytesseract_engine_passes_language(self, mock_ocr):
+        """O fallback repassa o idioma configurado."""
+        engine = ocr.PytesseractEngine('por')
+        assert engine.image_to_string(Image.new('L', (5, 5))) == 'texto'
+        assert mock_ocr.call_args.kwargs['lang'] == 'por'
+
+    @patch('pytesseract.image_to_string', return_value='texto')
+    def test_pytesseract_engine_respects_deadline(self, mock_ocr):
+        """O processo `tesseract` recebe o prazo restante da extração."""
+        engine = ocr.PytesseractEngine('por')
+        engine.image_to_string(Image.new('L', (5, 5)))
+        assert mock_ocr.call_args.kwargs['timeout'] == 0
+
+        with limits.deadline(5):
+            engine.image_to_string(Image.new('L', (5, 5)))
+        assert 0 < mock_ocr.call_args.kwargs['timeout'] <= 5  # noqa: PLR2004
+
+
+class TestTesserocrPool:
+    """Valida o reaproveitamento e a reciclagem das instâncias."""
+
+    def test_instances_are_reused(self, fake_tesserocr):
+        """Chamadas sequenciais usam a mesma instância já inicializada."""
+        engine = ocr.TesserocrEngine('por', size=2, max_jobs=100)
+        image = Image.new('L', (5, 5))
+        for _ in range(5):
+            assert engine.image_to_string(image) == 'texto por'
+        assert fake_tesserocr.PyTessBaseAPI.call_count == 1
+
+    def test_instances_are_recycled_after_max_jobs(self, fake_tesserocr):
+        """Após `max_jobs` chamadas, a instância é encerrada e recriada."""
+        apis = []
+        fake_tesserocr.PyTessBaseAPI.side_effect = lambda lang: (
+            apis.append(_fake_api(lang)) or apis[-1]
+        )
+        engine = ocr.TesserocrEngine('por', size=1, max_jobs=2)
+        image = Image.new('L', (5, 5))
+        for _ in range(5):
+            engine.image_to_string(image)
+
+        assert len(apis) == 3  # noqa: PLR2004
+        apis[0].End.assert_called_once()
+        apis[1].End.assert_called_once()
+        apis[2].End.assert_not_called()
+
+    def test_pool_never_exceeds_its_size(self, fake_tesserocr):
+        """Com mais threads que instâncias, as chamadas esperam a vez."""
+        pool = ocr.TesserocrPool('por', size=2, max_jobs=100)
+        release = threading.Event()
+        holding = threading.Barrier(3)
+
+        def hold():
+            with pool.acquire():
+                holding.wait()
+                release.wait()
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        holding.wait()
+
+        def wait_turn():
+            with pool.acquire():
+                pass
+
+        waiter = threading.Thread(target=wait_turn)
+        waiter.start()
+        waiter.join(timeout=0.1)
+        assert waiter.is_alive()
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        waiter.join(timeout=1)
+        assert not waiter.is_alive()
+        assert fake_tesserocr.PyTessBaseAPI.call_count == 2  # noqa: PLR2004
+
+    def test_failed_creation_frees_the_slot(self, fake_tesserocr):
+        """Uma falha ao iniciar o Tesseract não consome vaga do pool."""
+        fake_tesserocr.PyTessBaseAPI.side_effect = [
+            RuntimeError('sem por'),
+            _fake_api('por'),
+        ]
+        pool = ocr.TesserocrPool('por', size=1, max_jobs=100)
+        with pytest.raises(RuntimeError), pool.acquire():
+            pass
+        with pool.acquire() as api:
+            assert api.GetUTF8Text() == 'texto por'
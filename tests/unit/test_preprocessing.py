@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from extractor.data_extractor import ExtractorConfig, ImageReader
+from extractor.preprocessing import (
+    binarize,
+    estimate_skew,
+    normalize_resolution,
+    otsu_threshold,
+    preprocess_image,
+    to_grayscale,
+)
+
+
+@pytest.fixture
+def lined_page():
+    """Página branca com faixas escuras simulando linhas de texto."""
+    image = Image.new('L', (600, 800), 255)
+    draw = ImageDraw.Draw(image)
+    for top in range(60, 740, 40):
+        draw.rectangle((60, top, 540, top + 12), fill=20)
+    return image
+
+
+class TestImageOperations:
+    """Valida cada etapa do pré-processamento isoladamente."""
+
+    def test_grayscale_composites_transparency_on_white(self):
+        """Pixels transparentes viram branco, não preto."""
+        image = Image.new('RGBA', (4, 4), (0, 0, 0, 0))
+        assert to_grayscale(image).getpixel((0, 0)) == 255  # noqa: PLR2004
+
+    def test_otsu_separates_ink_from_background(self, lined_page):
+        """O limiar fica entre a tinta e o fundo."""
+        assert 20 <= otsu_threshold(lined_page) < 255  # noqa: PLR2004
+
+    def test_binarize_keeps_only_black_and_white(self, lined_page):
+        """A imagem binarizada tem apenas dois tons."""
+        colors = binarize(lined_page).getcolors()
+        assert {color for _, color in colors} == {0, 255}
+
+    def test_binarize_keeps_uniform_image(self):
+        """Imagens de uma única cor não têm limiar e ficam inalteradas."""
+        image = Image.new('L', (10, 10), 128)
+        assert binarize(image) is image
+
+    def test_downscales_to_target_dpi(self):
+        """Uma digitalização em 600 dpi é reduzida à metade para 300 dpi."""
+        image = Image.new('L', (1000, 1400), 255)
+        image.info['dpi'] = (600, 600)
+        assert normalize_resolution(image, 300, 5000).size == (500, 700)
+
+    def test_limits_longest_side_without_upscaling(self):
+        """O maior lado é limitado; imagens pequenas não são ampliadas."""
+        large = Image.new('L', (4000, 2000), 255)
+        small = Image.new('L', (400, 200), 255)
+        assert normalize_resolution(large, 300, 1000).size == (1000, 500)
+        assert normalize_resolution(small, 300, 1000) is small
+
+    @pytest.mark.parametrize('angle', [-3.0, 0.0, 2.0])
+    def test_estimates_skew_of_rotated_page(self, lined_page, angle):
+        """A inclinação estimada desfaz a rotação aplicada."""
+        rotated = lined_page.rotate(angle, expand=True, fillcolor=255)
+        assert estimate_skew(rotated, 5.0, 0.5) == -angle
+
+
+class TestPreprocessPipeline:
+    """Valida o pipeline configurado por ExtractorConfig."""
+
+    def test_disabled_returns_same_image(self, lined_page):
+        """Com OCR_PREPROCESS desligado, nada é alterado."""
+        config = type('Config', (ExtractorConfig,), {'OCR_PREPROCESS': False})
+        assert preprocess_image(lined_page, config) is lined_page
+
+    def test_default_pipeline_outputs_binary_grayscale(self):
+        """O pipeline padrão entrega uma imagem binária em tons de cinza."""
+        image = Image.new('RGB', (200, 100), (230, 220, 200))
+        ImageDraw.Draw(image).rectangle((20, 40, 180, 50), fill='black')
+        result = preprocess_image(image, ExtractorConfig)
+        assert result.mode == 'L'
+        assert {color for _, color in result.getcolors()} == {0, 255}
+
+    @patch('pytesseract.image_to_string', return_value='Texto da imagem')
+    def test_image_reader_sends_preprocessed_image_to_ocr(
+        self, mock_ocr, sample_image_file
+    ):
+        """O OCR recebe a imagem já convertida para tons de cinza."""
+        ImageReader.read(str(sample_image_file))
+        ocr_image = mock_ocr.call_args.args[0]
+        assert ocr_image.mode == 'L'
@@ -0,0 +1,109 @@
+from unittest.mock import patch
+
+import pytesseract
+import pytest
+from PIL import Image
+
+from extractor.data_extractor import ExtractorConfig
+from extractor.regions import locate_prestador_region, ocr_image
+
+HEADERS = [
+    (40, 'PREFEITURA MUNICIPAL'),
+    (200, 'Dados do Prestador de Serviços'),
+    (220, 'Razão Social: EMPRESA FICTÍCIA LTDA'),
+    (350, 'Dados do Tomador de Serviços'),
+]
+
+
+@pytest.fixture
+def page():
+    """Página A4 a 150 dpi, grande o bastante para ativar o recorte."""
+    return Image.new('L', (1240, 1754), 255)
+
+
+class TestLocatePrestadorRegion:
+    """Valida a localização da faixa do prestador na passada reduzida."""
+
+    def test_region_spans_prestador_to_tomador(
+        self, page, extractor_config, ocr_layout
+    ):
+        """A faixa vai do cabeçalho do prestador (com margem) ao do tomador."""
+        with patch('pytesseract.image_to_data', return_value=ocr_layout(HEADERS)):
+            region = locate_prestador_region(page, extractor_config)
+
+        margin = round(page.height * extractor_config.OCR_ROI_MARGIN)
+        assert region == (0, 400 - margin, page.width, 700)
+
+    def test_region_reaches_bottom_without_tomador(
+        self, page, extractor_config, ocr_layout
+    ):
+        """Sem o cabeçalho do tomador, a faixa vai até o fim da página."""
+        layout = ocr_layout(HEADERS[:3])
+        with patch('pytesseract.image_to_data', return_value=layout):
+            region = locate_prestador_region(page, extractor_config)
+
+        assert region[3] == page.height
+
+    def test_returns_none_without_prestador_header(
+        self, page, extractor_config, ocr_layout
+    ):
+        """Sem o cabeçalho do prestador, não há região."""
+        layout = ocr_layout([(40, 'PREFEITURA MUNICIPAL')])
+        with patch('pytesseract.image_to_data', return_value=layout):
+            assert locate_prestador_region(page, extractor_config) is None
+
+    def test_layout_pass_uses_reduced_image(
+        self, page, extractor_config, ocr_layout
+    ):
+        """A passada de localização recebe a imagem reduzida."""
+        with patch(
+            'pytesseract.image_to_data', return_value=ocr_layout(HEADERS)
+        ) as mock_data:
+            locate_prestador_region(page, extractor_config)
+
+        assert mock_data.call_args.args[0].size == (620, 877)
+
+
+class TestOcrImage:
+    """Valida o OCR restrito à região do prestador."""
+
+    @patch('pytesseract.image_to_string', return_value='texto')
+    def test_ocr_runs_on_cropped_region(
+        self, mock_ocr, page, extractor_config, ocr_layout
+    ):
+        """O OCR completo recebe apenas a faixa localizada."""
+        with patch('pytesseract.image_to_data', return_value=ocr_layout(HEADERS)):
+            assert ocr_image(page, extractor_config) == 'texto'
+
+        cropped = mock_ocr.call_args.args[0]
+        assert cropped.width == page.width
+        assert cropped.height < page.height / 4
+
+    @patch('pytesseract.image_to_string', return_value='texto')
+    @patch(
+        'pytesseract.image_to_data', side_effect=pytesseract.TesseractError(1, '')
+    )
+    def test_falls_back_to_full_page(
+        self, mock_data, mock_ocr, page, extractor_config
+    ):
+        """Se a localização falhar, a página inteira é lida."""
+        ocr_image(page, extractor_config)
+        assert mock_ocr.call_args.args[0].size == page.size
+
+    @patch('pytesseract.image_to_string', return_value='texto')
+    @patch('pytesseract.image_to_data')
+    def test_small_images_skip_layout_pass(
+        self, mock_data, mock_ocr, extractor_config
+    ):
+        """Imagens pequenas vão direto ao OCR, sem a passada extra."""
+        ocr_image(Image.new('L', (200, 200), 255), extractor_config)
+        mock_data.assert_not_called()
+
+    @patch('pytesseract.image_to_string', return_value='texto')
+    @patch('pytesseract.image_to_data')
+    def test_disabled_roi_reads_full_page(self, mock_data, mock_ocr, page):
+        """Com OCR_ROI desligado, a página inteira é lida."""
+        config = type('Config', (ExtractorConfig,), {'OCR_ROI': False})()
+        ocr_image(page, config)
+        mock_data.assert_not_called()
+        assert mock_ocr.call_args.args[0].size == page.size
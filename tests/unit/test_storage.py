@@ -0,0 +1,110 @@
+from datetime import date
+
+import pytest
+from django.db import connection
+
+from extractor.models import NFSeRecord
+from extractor.storage import (
+    RecordWriter,
+    find_records,
+    normalize_cnpj,
+    parse_competencia,
+    save_records,
+)
+
+JANEIRO = date(2025, 1, 1)
+FEVEREIRO = date(2025, 2, 1)
+
+
+def _record(cnpj, file_name='nota.pdf'):
+    return {
+        'file': file_name,
+        'cnpj_prestador': cnpj,
+        'nome_prestador': 'EMPRESA FICTÍCIA LTDA',
+    }
+
+
+class TestParsing:
+    """Valida a leitura da competência e do CNPJ informados."""
+
+    @pytest.mark.parametrize('value', ['2025-01', '01/2025', ' 2025-01 '])
+    def test_parse_competencia(self, value):
+        """Os dois formatos usuais viram o primeiro dia do mês."""
+        assert parse_competencia(value) == JANEIRO
+
+    def test_parse_competencia_rejects_other_formats(self):
+        """Datas completas ou texto livre são rejeitados."""
+        with pytest.raises(ValueError, match='Competência inválida'):
+            parse_competencia('janeiro')
+
+    def test_normalize_cnpj(self):
+        """CNPJ só com dígitos é formatado como o extrator o entrega."""
+        assert normalize_cnpj('12345678000190') == '12.345.678/0001-90'
+        assert normalize_cnpj('12.345.678/0001-90') == '12.345.678/0001-90'
+
+
+@pytest.mark.django_db
+class TestRecordWriter:
+    """Valida a gravação em bloco dos resultados do lote."""
+
+    def test_writes_in_transaction_sized_blocks(self, django_assert_num_queries):
+        """Cada bloco é um único INSERT, sem esperar o fim do lote."""
+        writer = RecordWriter(JANEIRO, transaction_size=2)
+        writer.add(_record('11.111.111/0001-11'))
+        assert NFSeRecord.objects.count() == 0
+
+        with django_assert_num_queries(3):  # SAVEPOINT, INSERT, RELEASE
+            writer.add(_record('22.222.222/0001-22'))
+
+        assert NFSeRecord.objects.count() == 2  # noqa: PLR2004
+
+    def test_skips_errors_and_flushes_remainder(self):
+        """Registros com erro não são gravados; o resto é gravado ao final."""
+        saved = save_records(
+            [
+                _record('11.111.111/0001-11'),
+                {'file': 'ruim.pdf', 'error': 'PDF corrompido'},
+                _record(None, 'sem_cnpj.pdf'),
+            ],
+            JANEIRO,
+        )
+
+        assert saved == 2  # noqa: PLR2004
+        empty = NFSeRecord.objects.get(file_name='sem_cnpj.pdf')
+        assert empty.to_dict()['cnpj_prestador'] is None
+
+
+@pytest.mark.django_db
+class TestFindRecords:
+    """Valida a consulta por fornecedor e mês."""
+
+    def test_filters_by_cnpj_and_month_with_keyset_pages(self):
+        """A consulta filtra por CNPJ e mês e pagina pelo último id."""
+        save_records([_record('11.111.111/0001-11')] * 3, JANEIRO)
+        save_records([_record('11.111.111/0001-11')], FEVEREIRO)
+        save_records([_record('22.222.222/0001-22')], JANEIRO)
+
+        first_page = find_records('11111111000111', JANEIRO, limit=2)
+        second_page = find_records(
+            '11.111.111/0001-11', JANEIRO, after=first_page[-1].id, limit=2
+        )
+
+        assert len(first_page) == 2  # noqa: PLR2004
+        assert len(second_page) == 1
+        assert {record.competencia for record in first_page + second_page} == {
+            JANEIRO
+        }
+
+    def test_lookup_uses_index(self):
+        """A busca por CNPJ e mês usa o índice composto, sem varrer a tabela."""
+        queryset = NFSeRecord.objects.filter(
+            cnpj_prestador='11.111.111/0001-11', competencia=JANEIRO
+        ).order_by('id')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+        assert 'SEARCH' in plan
+        assert 'nfse_cnpj_competencia_idx' in plan
+        assert 'TEMP B-TREE' not in plan  # a ordem por id vem do índice
@@ -0,0 +1,201 @@
+import functools
+import io
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from extractor.models import NFSeRecord, ProcessedFile
+from extractor.watch import FolderIngestor, InotifyWatcher, PollingWatcher
+
+SAMPLE_PDF = Path('test_files/NFSe_ficticia_layout_completo.pdf')
+JANEIRO = date(2025, 1, 1)
+
+
+def _crash_on_bomb(name, content=None):
+    """Extração que derruba o processo worker em 'bomba.pdf'."""
+    if name.endswith('bomba.pdf'):
+        os._exit(1)
+    time.sleep(0.1)  # ainda em andamento quando o pool quebra
+    return {'file': name, 'cnpj_prestador': None, 'nome_prestador': None}
+
+
+@pytest.fixture
+def get_executor():
+    get_executor = functools.cache(
+        functools.partial(ThreadPoolExecutor, max_workers=2)
+    )
+    yield get_executor
+    get_executor().shutdown()
+
+
+@pytest.fixture
+def inbox(temp_dir):
+    """Pasta monitorada com uma nota."""
+    shutil.copy(SAMPLE_PDF, temp_dir / 'nota.pdf')
+    (temp_dir / 'leia-me.txt').write_text('ignorado', encoding='utf-8')
+    return temp_dir
+
+
+@pytest.mark.django_db
+class TestFolderIngestor:
+    """Valida o processamento incremental das pastas monitoradas."""
+
+    def test_run_once_saves_records_and_checkpoint(self, inbox, get_executor):
+        """Cada arquivo suportado vira registro e entra no checkpoint."""
+        ingestor = FolderIngestor([inbox], get_executor, competencia=JANEIRO)
+        done = ingestor.run_once()
+
+        path = str((inbox / 'nota.pdf').resolve())
+        assert [entry[0] for entry in done] == [path]
+        record = NFSeRecord.objects.get()
+        assert record.competencia == JANEIRO
+        assert record.cnpj_prestador
+        assert ProcessedFile.objects.get().path == path
+
+    def test_restart_skips_processed_files(self, inbox, get_executor):
+        """Após um reinício, arquivos inalterados não são extraídos de novo."""
+        FolderIngestor([inbox], get_executor).run_once()
+
+        ingestor = FolderIngestor([inbox], get_executor)
+        assert ingestor.run_once() == []
+        assert NFSeRecord.objects.count() == 1
+
+    def test_modified_file_is_processed_again(self, inbox, get_executor):
+        """Um arquivo alterado desde o checkpoint é processado de novo."""
+        FolderIngestor([inbox], get_executor).run_once()
+        with open(inbox / 'nota.pdf', 'ab') as pdf:
+            pdf.write(b'\n')
+
+        assert len(FolderIngestor([inbox], get_executor).run_once()) == 1
+        assert ProcessedFile.objects.count() == 1
+
+    def test_failed_file_is_recorded_and_retried_after_restart(
+        self, inbox, get_executor
+    ):
+        """Uma falha fica registrada com o erro e é tentada de novo."""
+        with patch(
+            'extractor.watch.extract_file',
+            side_effect=RuntimeError('Tesseract indisponível'),
+        ):
+            ingestor = FolderIngestor([inbox], get_executor)
+            assert len(ingestor.run_once()) == 1
+            assert ingestor.run_once() == []
+
+        failed = ProcessedFile.objects.get()
+        assert 'Tesseract indisponível' in failed.error
+        assert NFSeRecord.objects.count() == 0
+
+        assert len(FolderIngestor([inbox], get_executor).run_once()) == 1
+        assert not ProcessedFile.objects.get().error
+        assert NFSeRecord.objects.count() == 1
+
+    @patch('extractor.watch.extract_file', _crash_on_bomb)
+    def test_worker_crash_only_fails_its_file(self, temp_dir):
+        """Um worker que morre só marca como falha o arquivo que o derrubou."""
+        names = [f'nota{index}.pdf' for index in range(6)] + ['bomba.pdf']
+        for name in names:
+            (temp_dir / name).write_bytes(b'%PDF')
+        get_executor = functools.cache(
+            functools.partial(ProcessPoolExecutor, max_workers=2)
+        )
+        try:
+            done = FolderIngestor([temp_dir], get_executor).run_once()
+        finally:
+            get_executor().shutdown()
+
+        assert sorted(Path(entry[0]).name for entry in done) == sorted(names)
+        failed = ProcessedFile.objects.exclude(error='')
+        assert [Path(file.path).name for file in failed] == ['bomba.pdf']
+        assert 'Falha no worker' in failed[0].error
+        assert ProcessedFile.objects.count() == len(names)
+
+    def test_retry_replaces_records_of_failed_attempt(
+        self, temp_dir, get_executor
+    ):
+        """Ao tentar de novo, os registros da tentativa anterior saem."""
+        archive = temp_dir / 'notas.zip'
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.write(SAMPLE_PDF, 'a.pdf')
+            zf.writestr('b.pdf', b'corrompido')
+        FolderIngestor([temp_dir], get_executor).run_once()
+        assert ProcessedFile.objects.get().error
+        assert NFSeRecord.objects.count() == 1
+
+        FolderIngestor([temp_dir], get_executor).run_once()
+        assert NFSeRecord.objects.count() == 1
+
+    @patch('extractor.watch.time.monotonic')
+    def test_waits_until_file_is_stable(
+        self, mock_monotonic, temp_dir, get_executor
+    ):
+        """Um arquivo ainda sendo gravado só fica pronto depois de estável."""
+        mock_monotonic.return_value = 0
+        ingestor = FolderIngestor([temp_dir], get_executor, settle=2)
+        file_path = temp_dir / 'nota.pdf'
+        file_path.write_bytes(b'%PDF parcial')
+
+        ingestor.offer([file_path])
+        assert ingestor.ready() == []
+
+        mock_monotonic.return_value = 3
+        file_path.write_bytes(b'%PDF parcial, agora completo')
+        assert ingestor.ready() == []
+
+        mock_monotonic.return_value = 5
+        assert [path for path, _ in ingestor.ready()] == [str(file_path)]
+
+    def test_new_file_is_picked_up_by_inotify(self, temp_dir, get_executor):
+        """Com inotify, um arquivo novo é notado sem varrer a pasta."""
+        try:
+            watcher = InotifyWatcher([temp_dir])
+        except OSError:
+            pytest.skip('inotify indisponível')
+        ingestor = FolderIngestor([temp_dir], get_executor, settle=0)
+
+        try:
+            (temp_dir / 'sub').mkdir()
+            shutil.copy(SAMPLE_PDF, temp_dir / 'sub' / 'nota.pdf')
+            ingestor.step(watcher)
+            done = ingestor.drain()
+        finally:
+            watcher.close()
+
+        assert [Path(entry[0]).name for entry in done] == ['nota.pdf']
+
+    def test_polling_watcher_requests_scan(self):
+        """Sem inotify, uma varredura é pedida a cada intervalo."""
+        watcher = PollingWatcher(interval=0)
+        assert watcher.wait(0) is None
+
+
+@pytest.mark.django_db
+class TestWatchFolderCommand:
+    """Valida o comando de gerenciamento watch_folder."""
+
+    def test_once_processes_folder(self, inbox):
+        """Com --once, o conteúdo atual é processado e o comando termina."""
+        out = io.StringIO()
+        call_command(
+            'watch_folder',
+            str(inbox),
+            '--once',
+            '--executor=thread',
+            '--competencia=2025-01',
+            stdout=out,
+        )
+
+        assert '1 arquivo(s) processado(s), 1 registro(s)' in out.getvalue()
+        assert NFSeRecord.objects.get().competencia == JANEIRO
+
+    def test_missing_directory(self, temp_dir):
+        """Uma pasta inexistente é um erro do comando."""
+        with pytest.raises(CommandError, match='Pasta não encontrada'):
+            call_command('watch_folder', str(temp_dir / 'nada'), '--once')